@@ -2,6 +2,7 @@ from .constants import HTTPX_ERRORS
 from .iterators import (
     CandleCacheIterator,
     TradeDataIterator,
+    aggregate_candle_groups,
     aggregate_candles,
 )
 from .rest import (
@@ -18,6 +19,7 @@ __all__ = [
     "HTTPX_ERRORS",
     "CandleCacheIterator",
     "TradeDataIterator",
+    "aggregate_candle_groups",
     "aggregate_candles",
     "ExchangeREST",
     "IntegerPaginationMixin",
@@ -1,18 +1,24 @@
 import logging
-from collections.abc import Generator
+from bisect import bisect_left
+from collections.abc import Generator, Iterable
 from datetime import datetime
 
+import numpy as np
 import pandas as pd
 from django.db.models import Q
+from pandas import DataFrame
 
 from quant_tick.constants import Frequency
 from quant_tick.lib import (
+    filter_by_timestamp,
     get_current_time,
     get_existing,
     get_min_time,
     has_timestamps,
     iter_missing,
     iter_timeframe,
+    map_processes,
+    plan_windows,
 )
 from quant_tick.models import (
     Candle,
@@ -21,6 +27,7 @@ from quant_tick.models import (
     Symbol,
     TimeBasedCandle,
     TradeData,
+    TradeDataCoverage,
 )
 
 logger = logging.getLogger(__name__)
@@ -31,26 +38,203 @@ def aggregate_candles(
     timestamp_from: datetime,
     timestamp_to: datetime,
     retry: bool = False,
+    max_processes: int | None = None,
 ) -> None:
-    """Aggregate candles."""
+    """Aggregate candles.
+
+    Independent shards, for example days of time based candles, are aggregated
+    concurrently by process, if max processes is more than 1.
+    """
     # First, adjust timestamps.
     min_timestamp_from, max_timestamp_to, cache_data = candle.initialize(
         timestamp_from, timestamp_to, retry
     )
     # Next, aggregate candles.
+    shards = candle.get_shards(min_timestamp_from, max_timestamp_to, cache_data)
+    map_processes(
+        aggregate_candle_shard,
+        [candle] * len(shards),
+        [ts_from for ts_from, _ in shards],
+        [ts_to for _, ts_to in shards],
+        [cache_data] + [None] * (len(shards) - 1),
+        [retry] * len(shards),
+        max_processes=max_processes,
+    )
+
+
+def aggregate_candle_shard(
+    candle: Candle,
+    timestamp_from: datetime,
+    timestamp_to: datetime,
+    cache_data: dict | None = None,
+    retry: bool = False,
+) -> None:
+    """Aggregate candle shard, from initial cache if none."""
+    if cache_data is None:
+        cache_data = candle.get_initial_cache(timestamp_from)
+    daily = {}
     for ts_from, ts_to in CandleCacheIterator(candle).iter_all(
-        min_timestamp_from, max_timestamp_to, retry=retry
+        timestamp_from, timestamp_to, retry=retry
     ):
-        data_frame = candle.get_data_frame(ts_from, ts_to)
-        cache_data = candle.get_cache_data(ts_from, cache_data)
-        data, cache_data = candle.aggregate(ts_from, ts_to, data_frame, cache_data)
-        candle.write_cache(ts_from, ts_to, cache_data)
-        candle.write_data(ts_from, ts_to, data)
-        logger.info(
-            "Candle {candle}: {timestamp}".format(
-                **{"candle": str(candle), "timestamp": ts_to.replace(tzinfo=None)}
+        data_frame = get_window_data_frame(candle, ts_from, ts_to, daily)
+        cache_data = aggregate_candle_window(
+            candle, ts_from, ts_to, data_frame, cache_data
+        )
+
+
+def get_window_data_frame(
+    candle: Candle, timestamp_from: datetime, timestamp_to: datetime, daily: dict
+) -> DataFrame:
+    """Get window data frame.
+
+    Trade data by day is checked and read once, then sliced for each window.
+    """
+    daily_ts_from = get_min_time(timestamp_from, value="1d")
+    daily_ts_to = daily_ts_from + pd.Timedelta("1d")
+    if timestamp_to <= daily_ts_to:
+        if daily_ts_from not in daily:
+            daily.clear()
+            # None, if without daily trade data.
+            daily[daily_ts_from] = (
+                candle.get_data_frame(daily_ts_from, daily_ts_to)
+                if candle.has_daily_trade_data(daily_ts_from)
+                else None
+            )
+        data_frame = daily[daily_ts_from]
+        if data_frame is not None:
+            return filter_by_timestamp(
+                data_frame, timestamp_from, timestamp_to
+            ).reset_index(drop=True)
+    return candle.get_data_frame(timestamp_from, timestamp_to)
+
+
+def aggregate_candle_groups(
+    candles: Iterable[Candle],
+    timestamp_from: datetime,
+    timestamp_to: datetime,
+    retry: bool = False,
+    max_processes: int | None = None,
+) -> None:
+    """Aggregate candles, grouped by symbols and source data.
+
+    Candles with the same symbols and source data read the same trade data, so each
+    day is read once, then sliced for each candle.
+    """
+    groups = {}
+    for candle in candles:
+        symbols = frozenset(symbol.pk for symbol in candle.symbols.all())
+        key = symbols, candle.json_data["source_data"]
+        groups.setdefault(key, []).append(candle)
+    for group in groups.values():
+        if len(group) == 1:
+            aggregate_candles(
+                group[0],
+                timestamp_from,
+                timestamp_to,
+                retry=retry,
+                max_processes=max_processes,
             )
+        else:
+            aggregate_candle_group(
+                group,
+                timestamp_from,
+                timestamp_to,
+                retry=retry,
+                max_processes=max_processes,
+            )
+
+
+def aggregate_candle_group(
+    candles: list[Candle],
+    timestamp_from: datetime,
+    timestamp_to: datetime,
+    retry: bool = False,
+    max_processes: int | None = None,
+) -> None:
+    """Aggregate candle group.
+
+    If all candles have the same shards, shards are aggregated concurrently by
+    process, if max processes is more than 1.
+    """
+    # First, adjust timestamps.
+    state = {
+        candle: candle.initialize(timestamp_from, timestamp_to, retry)
+        for candle in candles
+    }
+    # Next, aggregate candles.
+    shards = [candle.get_shards(*state[candle]) for candle in candles]
+    if all(s == shards[0] for s in shards):
+        group_shards = [
+            [
+                (candle, ts_from, ts_to, state[candle][2] if index == 0 else None)
+                for candle in candles
+            ]
+            for index, (ts_from, ts_to) in enumerate(shards[0])
+        ]
+    else:
+        group_shards = [[(candle, *state[candle]) for candle in candles]]
+    map_processes(
+        aggregate_candle_group_shard,
+        group_shards,
+        [retry] * len(group_shards),
+        max_processes=max_processes,
+    )
+
+
+def aggregate_candle_group_shard(
+    shard: list[tuple[Candle, datetime, datetime, dict | None]], retry: bool = False
+) -> None:
+    """Aggregate candle group shard, by day, from initial cache if none.
+
+    Daily trade data is read once, by the first candle, then sliced for each candle.
+    """
+    state = {}
+    for candle, ts_from, ts_to, cache_data in shard:
+        if cache_data is None:
+            cache_data = candle.get_initial_cache(ts_from)
+        state[candle] = ts_from, ts_to, cache_data
+    min_timestamp_from = min(ts_from for ts_from, _, _ in state.values())
+    max_timestamp_to = max(ts_to for _, ts_to, _ in state.values())
+    daily = {}
+    for daily_ts_from, daily_ts_to in iter_timeframe(
+        min_timestamp_from, max_timestamp_to, value="1d"
+    ):
+        for candle, (min_ts_from, max_ts_to, cache_data) in state.items():
+            ts_from = max(daily_ts_from, min_ts_from)
+            ts_to = min(daily_ts_to, max_ts_to)
+            if ts_from < ts_to:
+                for window_ts_from, window_ts_to in CandleCacheIterator(
+                    candle
+                ).iter_all(ts_from, ts_to, retry=retry):
+                    data_frame = get_window_data_frame(
+                        candle, window_ts_from, window_ts_to, daily
+                    )
+                    cache_data = aggregate_candle_window(
+                        candle, window_ts_from, window_ts_to, data_frame, cache_data
+                    )
+                state[candle] = min_ts_from, max_ts_to, cache_data
+
+
+def aggregate_candle_window(
+    candle: Candle,
+    timestamp_from: datetime,
+    timestamp_to: datetime,
+    data_frame: DataFrame,
+    cache_data: dict,
+) -> dict:
+    """Aggregate candle window, and write cache and data."""
+    cache_data = candle.get_cache_data(timestamp_from, cache_data)
+    data, cache_data = candle.aggregate(
+        timestamp_from, timestamp_to, data_frame, cache_data
+    )
+    candle.write_cache(timestamp_from, timestamp_to, cache_data)
+    candle.write_data(timestamp_from, timestamp_to, data)
+    logger.info(
+        "Candle {candle}: {timestamp}".format(
+            **{"candle": str(candle), "timestamp": timestamp_to.replace(tzinfo=None)}
         )
+    )
+    return cache_data
 
 
 class BaseTimeFrameIterator:
@@ -85,9 +269,16 @@ class BaseTimeFrameIterator:
             timestamp_from, timestamp_to, retry=retry
         ):
             if self.can_iter_hours(ts_from, ts_to):
-                yield from self.iter_hours(ts_from, ts_to, existing)
+                windows = list(self.iter_hours(ts_from, ts_to, existing))
+                rows = self.get_minute_rows(ts_from)
+                if rows is not None:
+                    windows = plan_windows(
+                        windows, rows, step=self.get_step(), reverse=self.reverse
+                    )
+                yield from windows
             else:
-                yield timestamp_from, timestamp_to
+                # By day, so that a long backfill is not read at once.
+                yield from iter_missing(ts_from, ts_to, existing, reverse=self.reverse)
 
     def iter_days(
         self,
@@ -95,11 +286,17 @@ class BaseTimeFrameIterator:
         timestamp_to: datetime,
         retry: bool = False,
     ) -> Generator[tuple[datetime, datetime], None, None]:
-        """Iter days."""
+        """Iter days.
+
+        Existing is queried once for the range, then partitioned by day.
+        """
+        range_existing = self.get_existing(timestamp_from, timestamp_to, retry=retry)
         for ts_from, ts_to in iter_timeframe(
             timestamp_from, timestamp_to, value="1d", reverse=self.reverse
         ):
-            existing = self.get_existing(ts_from, ts_to, retry=retry)
+            start = bisect_left(range_existing, ts_from)
+            stop = bisect_left(range_existing, ts_to)
+            existing = range_existing[start:stop]
             if not has_timestamps(ts_from, ts_to, existing):
                 if self.can_iter_days(ts_from, ts_to):
                     yield ts_from, ts_to, existing
@@ -135,6 +332,18 @@ class BaseTimeFrameIterator:
         """Get existing."""
         raise NotImplementedError
 
+    def get_minute_rows(self, timestamp: datetime) -> np.ndarray | None:
+        """Get rows, by minute of day.
+
+        If rows are known, windows are planned within a memory budget. Otherwise, by
+        hour.
+        """
+        return None
+
+    def get_step(self) -> str:
+        """Get step, of planned windows."""
+        return "1min"
+
     def can_iter_days(self, timestamp_from: datetime, timestamp_to: datetime) -> bool:
         """Can iter days."""
         return True
@@ -156,17 +365,23 @@ class TradeDataIterator(BaseTimeFrameIterator):
     def get_existing(
         self, timestamp_from: datetime, timestamp_to: datetime, retry: bool = False
     ) -> list[datetime]:
-        """Get existing."""
+        """Get existing.
+
+        Without retry, from coverage, with one query.
+        """
+        if not retry:
+            return TradeDataCoverage.objects.get_existing(
+                self.symbol, timestamp_from, timestamp_to
+            )
         queryset = TradeData.objects.filter(
             symbol=self.symbol,
             timestamp__gte=timestamp_from,
             timestamp__lt=timestamp_to,
         )
-        if retry:
-            # Delete daily data.
-            queryset.filter(frequency=Frequency.DAY, ok=False).delete()
-            # Overwrite hourly or minute data.
-            queryset = queryset.exclude(ok=False)
+        # Delete daily data.
+        queryset.filter(frequency=Frequency.DAY, ok=False).delete()
+        # Overwrite hourly or minute data.
+        queryset = queryset.exclude(ok=False)
         return get_existing(queryset.values("timestamp", "frequency"))
 
 
@@ -200,9 +415,29 @@ class CandleCacheIterator(BaseTimeFrameIterator):
         else:
             return get_existing(candle_cache.values("timestamp", "frequency"))
 
+    def iter_days(
+        self,
+        timestamp_from: datetime,
+        timestamp_to: datetime,
+        retry: bool = False,
+    ) -> Generator[tuple[datetime, datetime], None, None]:
+        """Iter days, with a plan for the range."""
+        self.plan = self.candle.get_plan(timestamp_from, timestamp_to)
+        yield from super().iter_days(timestamp_from, timestamp_to, retry=retry)
+
+    def get_minute_rows(self, timestamp: datetime) -> np.ndarray | None:
+        """Get rows, by minute of day, from statistics of trade data."""
+        return self.candle.get_minute_rows(timestamp, self.plan)
+
+    def get_step(self) -> str:
+        """Get step, of planned windows."""
+        if isinstance(self.candle, TimeBasedCandle):
+            return self.candle.json_data["window"]
+        return super().get_step()
+
     def can_iter_days(self, timestamp_from: datetime, timestamp_to: datetime) -> bool:
         """Can iter days."""
-        return self.candle.can_aggregate(timestamp_from, timestamp_to)
+        return self.candle.can_aggregate(timestamp_from, timestamp_to, self.plan)
 
     def can_iter_hours(self, *args) -> bool:
         """Can iter hours."""
@@ -8,7 +8,7 @@ from decimal import Decimal
 import pandas as pd
 from pandas import DataFrame
 
-from quant_tick.lib import assert_type_decimal
+from quant_tick.lib import assert_type_decimal, flush_write_behind
 from quant_tick.models import Symbol, TradeData
 
 from .base import BaseController
@@ -258,7 +258,11 @@ class IntegerPaginationMixin:
     """Binance, ByBit, and Coinbase REST API."""
 
     def get_pagination_id(self, timestamp_from: datetime) -> int | None:
-        """Get integer pagination_id."""
+        """Get integer pagination_id.
+
+        Pending writes are flushed first, as the last uid may not yet be saved.
+        """
+        flush_write_behind()
         return TradeData.objects.get_last_uid(self.symbol, timestamp_from)
 
 
@@ -7,10 +7,12 @@ from pandas import DataFrame
 from quant_tick.lib import (
     calculate_notional,
     calculate_tick_rule,
-    filter_by_timestamp,
     get_current_time,
+    get_data_frame_minute_rows,
     gzip_downloader,
+    plan_windows,
     set_dtypes,
+    slice_by_timestamp,
 )
 
 from .base import BaseController
@@ -73,12 +75,14 @@ class ExchangeS3(BaseController):
             date = timestamp_from.date()
             data_frame = self.get_data_frame(date)
             if data_frame is not None:
-                for ts_from, ts_to in iterator.iter_hours(
-                    timestamp_from,
-                    timestamp_to,
-                    existing,
-                ):
-                    df = filter_by_timestamp(data_frame, ts_from, ts_to)
+                # Quiet hours are batched, and hot hours split, within memory budget.
+                windows = plan_windows(
+                    list(iterator.iter_hours(timestamp_from, timestamp_to, existing)),
+                    get_data_frame_minute_rows(timestamp_from, data_frame),
+                    reverse=iterator.reverse,
+                )
+                data_frames = slice_by_timestamp(data_frame, windows)
+                for (ts_from, ts_to), df in zip(windows, data_frames, strict=True):
                     candles = self.get_candles(ts_from, ts_to)
                     self.on_data_frame(self.symbol, ts_from, ts_to, df, candles)
             # Complete
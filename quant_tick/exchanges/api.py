@@ -4,6 +4,7 @@ from datetime import datetime
 from pandas import DataFrame
 
 from quant_tick.constants import Exchange
+from quant_tick.lib import WriteBehind
 from quant_tick.models import Symbol, TradeData
 
 from .binance import binance_candles, binance_trades
@@ -35,14 +36,16 @@ def api(
         """On data_frame, write trade data."""
         TradeData.write(symbol, timestamp_from, timestamp_to, trades, candles)
 
-    trades_api(
-        symbol=symbol,
-        timestamp_from=timestamp_from,
-        timestamp_to=timestamp_to,
-        on_data_frame=on_data_frame,
-        retry=retry,
-        verbose=verbose,
-    )
+    # Upload files in the background, while downloading.
+    with WriteBehind():
+        trades_api(
+            symbol=symbol,
+            timestamp_from=timestamp_from,
+            timestamp_to=timestamp_to,
+            on_data_frame=on_data_frame,
+            retry=retry,
+            verbose=verbose,
+        )
 
 
 def trades_api(
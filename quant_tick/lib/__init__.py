@@ -3,6 +3,9 @@ from .aggregate import (
     cluster_trades,
     combine_clustered_trades,
     filter_by_timestamp,
+    iter_combine_clustered_trades,
+    merge_segments,
+    slice_by_timestamp,
     volume_filter_with_time_window,
 )
 from .cache import get_next_cache, merge_cache
@@ -21,33 +24,82 @@ from .calendar import (
     iter_window,
     parse_datetime,
     parse_period_from_to,
+    split_by_day,
     timestamp_to_inclusive,
     to_pydatetime,
 )
 from .candles import (
+    DAILY_SUMMARY,
+    SUMMARY_FIELDS,
     aggregate_candle,
     aggregate_candles,
+    aggregate_samples,
+    aggregate_windows,
     candles_to_data_frame,
+    combine_candles,
+    get_daily_summary,
+    get_imbalance_index,
+    get_run_index,
+    get_sample_indexes,
     validate_aggregated_candles,
 )
+from .coverage import (
+    bitmap_to_mask,
+    get_coverage_existing,
+    has_coverage,
+    iter_coverage,
+    mask_to_bitmap,
+)
 from .dataframe import (
     assert_type_decimal,
     calculate_notional,
     calculate_tick_rule,
+    get_statistics,
     is_decimal_close,
+    merge_statistics,
     set_dtypes,
     set_type_decimal,
 )
+from .delete import delete_files, delete_files_on_commit
 from .download import gzip_downloader
+from .executor import (
+    WriteBehind,
+    flush_write_behind,
+    iter_threaded,
+    map_processes,
+    save_behind,
+    upload_files,
+)
+from .files import get_clean_grace_period, list_files
 from .experimental import calc_notional_exponent, calc_volume_exponent
+from .mirror import get_mirror_root, invalidate_mirror, read_mirror, write_mirror
+from .parquet import ParquetStreamWriter, get_digest
+from .planner import (
+    get_data_frame_minute_rows,
+    get_max_window_rows,
+    get_minute_rows,
+    get_window_memory_budget,
+    plan_windows,
+)
+from .tiered_storage import (
+    TieredStorage,
+    get_date,
+    get_hot_storage_days,
+    get_trade_data_storage,
+)
 
 __all__ = [
+    "DAILY_SUMMARY",
+    "SUMMARY_FIELDS",
     "aggregate_candle",
     "aggregate_candles",
     "aggregate_trades",
     "cluster_trades",
     "combine_clustered_trades",
     "filter_by_timestamp",
+    "iter_combine_clustered_trades",
+    "merge_segments",
+    "slice_by_timestamp",
     "volume_filter_with_time_window",
     "get_next_cache",
     "merge_cache",
@@ -65,17 +117,57 @@ __all__ = [
     "iter_window",
     "parse_datetime",
     "parse_period_from_to",
+    "split_by_day",
     "timestamp_to_inclusive",
     "to_pydatetime",
+    "aggregate_samples",
+    "aggregate_windows",
     "candles_to_data_frame",
+    "combine_candles",
+    "get_daily_summary",
+    "get_imbalance_index",
+    "get_run_index",
+    "get_sample_indexes",
     "validate_aggregated_candles",
+    "bitmap_to_mask",
+    "get_coverage_existing",
+    "has_coverage",
+    "iter_coverage",
+    "mask_to_bitmap",
     "assert_type_decimal",
     "calculate_notional",
     "calculate_tick_rule",
+    "get_statistics",
     "is_decimal_close",
+    "merge_statistics",
     "set_dtypes",
     "set_type_decimal",
+    "delete_files",
+    "delete_files_on_commit",
     "gzip_downloader",
+    "iter_threaded",
+    "map_processes",
+    "WriteBehind",
+    "flush_write_behind",
+    "save_behind",
+    "upload_files",
+    "get_clean_grace_period",
+    "list_files",
     "calc_notional_exponent",
     "calc_volume_exponent",
+    "get_mirror_root",
+    "invalidate_mirror",
+    "read_mirror",
+    "write_mirror",
+    "ParquetStreamWriter",
+    "get_digest",
+    "get_data_frame_minute_rows",
+    "get_max_window_rows",
+    "get_minute_rows",
+    "get_window_memory_budget",
+    "plan_windows",
+    "TieredStorage",
+    "get_date",
+    "get_hot_storage_days",
+    "get_trade_data_storage",
 ]
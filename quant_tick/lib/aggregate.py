@@ -1,5 +1,6 @@
 import datetime
 import math
+from collections.abc import Generator, Iterable
 from typing import Any
 
 import pandas as pd
@@ -132,6 +133,59 @@ def filter_by_timestamp(
         return pd.DataFrame([])
 
 
+def slice_by_timestamp(
+    data_frame: DataFrame, windows: list[tuple[datetime.datetime, datetime.datetime]]
+) -> list[DataFrame]:
+    """Slice by timestamp, for each window.
+
+    Sorted data frames are sliced with searchsorted, rather than a boolean mask per
+    window. Slices are in the order of the data frame.
+    """
+    if not windows:
+        return []
+    elif not len(data_frame):
+        return [pd.DataFrame([]) for _ in windows]
+    is_index = isinstance(data_frame.index, pd.DatetimeIndex)
+    values = data_frame.index if is_index else data_frame.timestamp
+    timestamps = pd.DatetimeIndex(values)
+    if timestamps.is_monotonic_increasing:
+        df = data_frame
+    elif timestamps.is_monotonic_decreasing:
+        df = data_frame.iloc[::-1]
+        timestamps = timestamps[::-1]
+    else:
+        return [filter_by_timestamp(data_frame, *window) for window in windows]
+    starts = timestamps.searchsorted(pd.DatetimeIndex([w[0] for w in windows]))
+    stops = timestamps.searchsorted(pd.DatetimeIndex([w[1] for w in windows]))
+    slices = [df.iloc[start:stop] for start, stop in zip(starts, stops, strict=True)]
+    if df is not data_frame:
+        return [s.iloc[::-1] for s in slices]
+    return slices
+
+
+def merge_segments(
+    data_frame: DataFrame | None,
+    segments: list[tuple[datetime.datetime, datetime.datetime, DataFrame | None]],
+) -> DataFrame | None:
+    """Merge segments, in order, each in place of data within its window."""
+    data_frames = [] if data_frame is None else [data_frame]
+    for timestamp_from, timestamp_to, segment in segments:
+        dfs = []
+        for df in data_frames:
+            attr = "index" if isinstance(df.index, pd.DatetimeIndex) else "timestamp"
+            a = getattr(df, attr)
+            dfs.append(df[(a < timestamp_from) | (a >= timestamp_to)])
+        data_frames = dfs
+        if segment is not None:
+            data_frames.append(segment)
+    data_frames = [df for df in data_frames if len(df)]
+    if data_frames:
+        df = pd.concat(data_frames)
+        if isinstance(df.index, pd.DatetimeIndex):
+            return df.sort_index(kind="stable")
+        return df.sort_values("timestamp", kind="stable").reset_index(drop=True)
+
+
 def volume_filter_with_time_window(
     data_frame: DataFrame, min_volume: int = 1000, window: str = "1min"
 ) -> DataFrame:
@@ -146,8 +200,7 @@ def volume_filter_with_time_window(
             iterator = iter_window(timestamp_from, timestamp_to, window)
         else:
             iterator = iter_once(timestamp_from, timestamp_to)
-        for ts_from, ts_to in iterator:
-            df = filter_by_timestamp(data_frame, ts_from, ts_to)
+        for df in slice_by_timestamp(data_frame, list(iterator)):
             if len(df):
                 next_index = 0
                 df = df.reset_index()
@@ -335,6 +388,31 @@ def combine_clustered_trades(data_frame: DataFrame) -> DataFrame:
     )
 
 
+def iter_combine_clustered_trades(
+    data_frames: Iterable[DataFrame],
+) -> Generator[DataFrame, None, None]:
+    """Iter combine clustered trades.
+
+    The last cluster with a tick rule, and any rows after it, may be combined with the
+    next data frame, so are carried.
+    """
+    carry = None
+    for data_frame in data_frames:
+        if carry is not None:
+            data_frame = pd.concat([carry, data_frame])
+        combined = combine_clustered_trades(data_frame)
+        has_tick_rule = combined.tickRule.notna()
+        if has_tick_rule.any():
+            index = has_tick_rule[has_tick_rule].index[-1]
+            if index:
+                yield combined.iloc[:index]
+            carry = combined.iloc[index:]
+        else:
+            carry = combined
+    if carry is not None and len(carry):
+        yield carry
+
+
 def combine_clusters(data: list[dict]) -> list[dict]:
     """Combine clusters."""
     first = data[0]
@@ -1,10 +1,14 @@
 import re
-from collections.abc import Generator
-from datetime import date, datetime, time, timezone
+from collections.abc import Generator, Iterable
+from datetime import date, datetime, time, timedelta, timezone
 
+import numpy as np
 import pandas as pd
 from pandas import Timestamp
 
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+ONE_MINUTE = timedelta(minutes=1)
+
 
 def parse_datetime(value: str, unit: str = "ns") -> datetime:
     """Parse datetime with pandas for nanosecond accuracy."""
@@ -16,6 +20,19 @@ def to_pydatetime(timestamp: Timestamp) -> datetime:
     return timestamp.replace(nanosecond=0).to_pydatetime().replace(tzinfo=timezone.utc)
 
 
+def to_minutes(timestamps: Iterable[datetime]) -> np.ndarray:
+    """Timestamps to epoch minutes."""
+    return np.fromiter(
+        ((timestamp - EPOCH) // ONE_MINUTE for timestamp in timestamps),
+        dtype=np.int64,
+    )
+
+
+def from_minutes(values: np.ndarray) -> list[datetime]:
+    """Epoch minutes to timestamps."""
+    return [EPOCH + timedelta(minutes=value) for value in values.tolist()]
+
+
 def get_current_time(tzinfo: str = timezone.utc) -> datetime:
     """Get current time."""
     return datetime.utcnow().replace(tzinfo=tzinfo)
@@ -93,39 +110,43 @@ def get_range(
     timestamp_from: datetime, timestamp_to: datetime, value: str = "1min"
 ) -> list[datetime]:
     """Get timestamps in range, step by value."""
-    ts_from_rounded = get_min_time(timestamp_from, value)
-    ts_to_rounded = get_next_time(timestamp_to, value)
-    return [
-        to_pydatetime(timestamp)
-        for timestamp in pd.date_range(ts_from_rounded, ts_to_rounded, freq=value)
-        if timestamp >= ts_from_rounded and timestamp <= timestamp_to
-    ]
+    return from_minutes(get_range_minutes(timestamp_from, timestamp_to, value))
+
+
+def get_range_minutes(
+    timestamp_from: datetime, timestamp_to: datetime, value: str = "1min"
+) -> np.ndarray:
+    """Get epoch minutes in range, step by value, inclusive."""
+    ts_from = get_min_time(timestamp_from, value)
+    step = pd.Timedelta(value)
+    total = max((timestamp_to - ts_from) // step + 1, 0)
+    start = (ts_from - EPOCH) // ONE_MINUTE
+    return start + np.arange(total, dtype=np.int64) * (step // ONE_MINUTE)
 
 
 def get_existing(values: list) -> list[datetime]:
     """Get existing."""
-    result = []  # List of 1m timestamps.
-    for item in values:
-        timestamp = item["timestamp"]
-        frequency = item["frequency"]
-        result += [
-            timestamp + pd.Timedelta(f"{index}min") for index in range(frequency)
-        ]
-    return sorted(result)
+    values = list(values)
+    timestamps = to_minutes(item["timestamp"] for item in values)
+    frequency = np.fromiter((item["frequency"] for item in values), dtype=np.int64)
+    # 1m timestamps, from each timestamp and frequency.
+    offsets = np.arange(frequency.sum()) - np.repeat(
+        np.cumsum(frequency) - frequency, frequency
+    )
+    return from_minutes(np.sort(np.repeat(timestamps, frequency) + offsets))
 
 
 def get_missing(
     timestamp_from: datetime, timestamp_to: datetime, existing: list[datetime]
 ) -> list[datetime]:
     """Get missing."""
-    return [
-        timestamp
-        for timestamp in get_range(timestamp_from, timestamp_to)
-        if timestamp not in existing
-        # Get missing result is assumed to not be inclusive.
-        # However, result from get_range is.
-        and timestamp != timestamp_to
-    ]
+    values = get_range_minutes(timestamp_from, timestamp_to)
+    # Get missing result is assumed to not be inclusive.
+    # However, result from get_range is.
+    minute, remainder = divmod(timestamp_to - EPOCH, ONE_MINUTE)
+    if not remainder:
+        values = values[values != minute]
+    return from_minutes(values[~np.isin(values, to_minutes(existing))])
 
 
 def iter_window(
@@ -159,6 +180,24 @@ def iter_once(
     yield get_min_time(timestamp_from, "1d"), get_next_time(timestamp_to, "1d")
 
 
+def split_by_day(
+    timestamp_from: datetime, timestamp_to: datetime, weekday: int | None = None
+) -> list[tuple[datetime, datetime]]:
+    """Split by day, or by week if weekday, including partial days."""
+    days = [
+        timestamp
+        for timestamp in pd.date_range(
+            get_next_time(timestamp_from, value="1d"),
+            timestamp_to,
+            freq="1d",
+            inclusive="left",
+        )
+        if weekday is None or timestamp.weekday() == weekday
+    ]
+    timestamps = [timestamp_from, *days, timestamp_to]
+    return list(zip(timestamps, timestamps[1:], strict=False))
+
+
 def iter_timeframe(
     timestamp_from: datetime,
     timestamp_to: datetime,
@@ -216,38 +255,15 @@ def iter_missing(
     existing: list[datetime],
     reverse: bool = False,
 ) -> Generator[tuple[datetime, datetime], None, None]:
-    """Iter missing, by 1 minute intervals."""
-    values = []
-    for ts_from, ts_to in iter_window(timestamp_from, timestamp_to, reverse=reverse):
-        if ts_from not in existing:
-            values.append((ts_from, ts_to))
-    if reverse:
-        values.reverse()
-    if len(values):
-        index = 0
-        next_index = index + 1
-        counter = 0
-        one_minute = pd.Timedelta("1min")
-        start = values[0][0]
-        stop = None
-        while next_index < len(values):
-            next_start = values[next_index][0]
-            total_minutes = one_minute * (counter + 1)
-            if next_start == start + total_minutes:
-                # Don't increment next_index, as value will be deleted.
-                stop = values[next_index][1]
-                del values[next_index]
-                counter += 1
-            else:
-                if stop:
-                    values[index] = start, stop
-                    index = next_index
-                    stop = None
-                start = next_start
-                counter = 0
-                next_index += 1
-        if stop:
-            values[-1] = values[-1][0], stop
+    """Iter missing, by 1 minute intervals, merged into consecutive runs."""
+    values = get_range_minutes(timestamp_from, timestamp_to)[:-1]
+    values = values[~np.isin(values, to_minutes(existing))]
+    if not len(values):
+        return []
+    breaks = np.flatnonzero(np.diff(values) != 1) + 1
+    starts = values[np.r_[0, breaks]]
+    stops = values[np.r_[breaks - 1, len(values) - 1]] + 1
+    values = list(zip(from_minutes(starts), from_minutes(stops), strict=True))
     if reverse:
         values.reverse()
     return values
@@ -1,15 +1,39 @@
+from bisect import bisect_left
 from datetime import datetime
 from decimal import Decimal
+from itertools import compress
+from typing import Any
 
+import numpy as np
 import pandas as pd
 from pandas import DataFrame
 
-from .aggregate import filter_by_timestamp
+from .aggregate import filter_by_timestamp, slice_by_timestamp
 from .calendar import iter_window
 from .dataframe import is_decimal_close
 
 ZERO = Decimal("0")
 
+# Daily summary, by candle key.
+SUMMARY_FIELDS = {
+    "volume": "volume",
+    "buyVolume": "buy_volume",
+    "notional": "notional",
+    "buyNotional": "buy_notional",
+    "ticks": "ticks",
+    "buyTicks": "buy_ticks",
+}
+DAILY_SUMMARY = (
+    "minutes",
+    "first_timestamp",
+    "last_timestamp",
+    "open",
+    "high",
+    "low",
+    "close",
+    *SUMMARY_FIELDS.values(),
+)
+
 
 def candles_to_data_frame(
     timestamp_from: datetime,
@@ -40,8 +64,9 @@ def aggregate_candles(
 ) -> list[dict]:
     """Aggregate candles"""
     data = []
-    for ts_from, ts_to in iter_window(timestamp_from, timestamp_to, window):
-        df = filter_by_timestamp(data_frame, ts_from, ts_to)
+    windows = list(iter_window(timestamp_from, timestamp_to, window))
+    data_frames = slice_by_timestamp(data_frame, windows)
+    for (ts_from, _), df in zip(windows, data_frames, strict=True):
         if len(df):
             candle = aggregate_candle(df, timestamp=ts_from)
             data.append(candle)
@@ -117,6 +142,191 @@ def aggregate_candle(data_frame: DataFrame, timestamp: datetime | None = None) -
     }
 
 
+def combine_candles(candles: DataFrame) -> dict:
+    """Combine candles, in order."""
+    first_row = candles.iloc[0]
+    last_row = candles.iloc[-1]
+    return {
+        "timestamp": first_row.timestamp,
+        "open": first_row.open,
+        "high": candles.high.max(),
+        "low": candles.low.min(),
+        "close": last_row.close,
+        "volume": candles.volume.sum(),
+        "buyVolume": candles.buyVolume.sum(),
+        "notional": candles.notional.sum(),
+        "buyNotional": candles.buyNotional.sum(),
+        "ticks": candles.ticks.sum(),
+        "buyTicks": candles.buyTicks.sum(),
+    }
+
+
+def get_sample_indexes(
+    values: np.ndarray, target_value: Any, sample_value: Any = 0
+) -> tuple[list[int], Any]:
+    """Get sample indexes.
+
+    Sample value is accumulated until target value, then reset to zero. As values are
+    not negative, each crossing is found by bisection of the cumulative sum.
+    Returns the last index of each sample, and the remaining sample value.
+    """
+    cumsum = np.cumsum(values)
+    indexes = []
+    start = 0
+    while start < len(values):
+        base = cumsum[start - 1] if start else 0
+        index = bisect_left(
+            cumsum,
+            True,
+            lo=start,
+            key=lambda value: value - base + sample_value >= target_value,
+        )
+        if index == len(values):
+            break
+        indexes.append(index)
+        sample_value = 0
+        start = index + 1
+    return indexes, sum(values[start:], sample_value)
+
+
+def get_imbalance_index(
+    buy_cumsum: np.ndarray,
+    sell_cumsum: np.ndarray,
+    threshold: float,
+    start: int = 0,
+    imbalance: float = 0,
+) -> int:
+    """Get index, where the absolute imbalance of buy less sell first reaches threshold.
+
+    Cumulative sums are from zero, so the sum of rows before index i is at i. As the
+    imbalance is not monotonic, it is compared in chunks of increasing size, so that
+    each value is compared about once.
+    """
+    offset = imbalance - buy_cumsum[start] + sell_cumsum[start]
+    size = 64
+    lo = start + 1
+    while lo < len(buy_cumsum):
+        hi = min(lo + size, len(buy_cumsum))
+        values = offset + buy_cumsum[lo:hi] - sell_cumsum[lo:hi]
+        crossed = np.flatnonzero(np.abs(values) >= threshold)
+        if len(crossed):
+            return lo + int(crossed[0]) - 1
+        lo = hi
+        size *= 2
+    return len(buy_cumsum) - 1
+
+
+def get_run_index(
+    buy_cumsum: np.ndarray,
+    sell_cumsum: np.ndarray,
+    threshold: float,
+    start: int = 0,
+    buy: float = 0,
+    sell: float = 0,
+) -> int:
+    """Get index, where the larger of buy and sell runs first reaches threshold.
+
+    Cumulative sums are from zero, as in get_imbalance_index. As runs are monotonic,
+    each is found by binary search.
+    """
+    stops = [
+        np.searchsorted(cumsum, cumsum[start] + threshold - run)
+        for cumsum, run in ((buy_cumsum, buy), (sell_cumsum, sell))
+    ]
+    return min(max(int(stop), start + 1) for stop in stops) - 1
+
+
+def aggregate_samples(data_frame: DataFrame, indexes: list[int]) -> list[dict]:
+    """Aggregate samples, as in aggregate_candle, with grouped reductions.
+
+    Each sample ends at an index, and starts after the previous one.
+    """
+    if not indexes:
+        return []
+    df = data_frame.iloc[: indexes[-1] + 1]
+    starts = np.array([0] + [index + 1 for index in indexes[:-1]])
+    stops = np.array(indexes)
+    buy = df.tickRule.to_numpy() == 1
+
+    def get_sum(column: str, is_buy: bool = False) -> np.ndarray:
+        values = df[column].to_numpy()
+        if is_buy:
+            values = np.where(buy, values, 0)
+        return np.add.reduceat(values, starts)
+
+    if "totalVolume" in df.columns:
+        volume = get_sum("totalVolume")
+    else:
+        volume = get_sum("volume")
+    if "totalBuyVolume" in df.columns:
+        buy_volume = get_sum("totalBuyVolume")
+    else:
+        buy_volume = get_sum("volume", is_buy=True)
+    if "totalNotional" in df.columns:
+        notional = get_sum("totalNotional")
+    else:
+        notional = get_sum("notional")
+    if "totalBuyNotional" in df.columns:
+        buy_notional = get_sum("totalBuyNotional")
+    else:
+        buy_notional = get_sum("notional", is_buy=True)
+    if "totalTicks" in df.columns:
+        ticks = get_sum("totalTicks")
+    elif "ticks" in df.columns:
+        ticks = get_sum("ticks")
+    else:
+        ticks = stops - starts + 1
+    if "totalBuyTicks" in df.columns:
+        buy_ticks = get_sum("totalBuyTicks")
+    elif "ticks" in df.columns:
+        buy_ticks = get_sum("ticks", is_buy=True)
+    else:
+        buy_ticks = np.add.reduceat(buy.astype(int), starts)
+    price = df.price.to_numpy()
+    high = np.maximum.reduceat(price, starts)
+    low = np.minimum.reduceat(price, starts)
+    timestamps = df.timestamp.iloc[starts].tolist()
+    return [
+        {
+            "timestamp": timestamps[i],
+            "open": price[start],
+            "high": high[i],
+            "low": low[i],
+            "close": price[stop],
+            "volume": volume[i],
+            "buyVolume": buy_volume[i],
+            "notional": notional[i],
+            "buyNotional": buy_notional[i],
+            "ticks": int(ticks[i]),
+            "buyTicks": int(buy_ticks[i]),
+        }
+        for i, (start, stop) in enumerate(zip(starts, stops, strict=True))
+    ]
+
+
+def aggregate_windows(
+    data_frame: DataFrame, windows: list[tuple[datetime, datetime]]
+) -> list[dict]:
+    """Aggregate windows, as in aggregate_candle, with grouped reductions.
+
+    Windows are consecutive, and data frame is sorted. Windows without rows are
+    skipped.
+    """
+    if not windows or not len(data_frame):
+        return []
+    df = slice_by_timestamp(data_frame, [(windows[0][0], windows[-1][1])])[0]
+    if not len(df):
+        return []
+    timestamps = pd.DatetimeIndex(df.timestamp)
+    stops = timestamps.searchsorted(pd.DatetimeIndex([w[1] for w in windows]))
+    starts = np.concatenate([[0], stops[:-1]])
+    is_sample = stops > starts
+    candles = aggregate_samples(df, (stops[is_sample] - 1).tolist())
+    for candle, (ts_from, _) in zip(candles, compress(windows, is_sample), strict=True):
+        candle["timestamp"] = ts_from
+    return candles
+
+
 def validate_aggregated_candles(
     aggregated_candles: DataFrame, exchange_candles: DataFrame
 ) -> tuple[DataFrame, bool | None]:
@@ -180,3 +390,36 @@ def validate_aggregated_candles(
                     ok = False
 
     return aggregated_candles, ok
+
+
+def get_daily_summary(trade_data: list[dict], summary: dict | None = None) -> dict:
+    """Get daily summary, of trade data, optionally merged with a previous summary.
+
+    Open and close are of the first and last trade data with trades.
+    """
+    data = {key: None for key in DAILY_SUMMARY}
+    data["minutes"] = 0
+    data.update({field: ZERO for field in SUMMARY_FIELDS.values()})
+    data.update(summary or {})
+    for t in trade_data:
+        data["minutes"] += t["frequency"]
+        # Without trades, trade data may have segments only.
+        if not t["json_data"] or "candle" not in t["json_data"]:
+            continue
+        candle = t["json_data"]["candle"]
+        timestamp = t["timestamp"]
+        if data["first_timestamp"] is None or timestamp < data["first_timestamp"]:
+            data["first_timestamp"] = timestamp
+            data["open"] = candle.get("open")
+        if data["last_timestamp"] is None or timestamp > data["last_timestamp"]:
+            data["last_timestamp"] = timestamp
+            data["close"] = candle.get("close")
+        high = candle.get("high")
+        if high is not None and (data["high"] is None or high > data["high"]):
+            data["high"] = high
+        low = candle.get("low")
+        if low is not None and (data["low"] is None or low < data["low"]):
+            data["low"] = low
+        for key, field in SUMMARY_FIELDS.items():
+            data[field] += candle.get(key, 0)
+    return data
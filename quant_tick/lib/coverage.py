@@ -0,0 +1,63 @@
+import datetime
+from collections.abc import Generator
+
+import pandas as pd
+
+from .calendar import get_min_time
+
+MINUTES_PER_DAY = 1440
+# 1 bit per minute.
+BITMAP_SIZE = MINUTES_PER_DAY // 8
+
+
+def iter_coverage(
+    timestamp_from: datetime.datetime, timestamp_to: datetime.datetime
+) -> Generator[tuple[datetime.datetime, int], None, None]:
+    """Iter coverage, by day, as a mask with 1 bit per minute."""
+    ts_from = timestamp_from
+    while ts_from < timestamp_to:
+        day = get_min_time(ts_from, value="1d")
+        ts_to = min(day + pd.Timedelta("1d"), timestamp_to)
+        start = int((ts_from - day).total_seconds() // 60)
+        minutes = int((ts_to - ts_from).total_seconds() // 60)
+        yield day, ((1 << minutes) - 1) << start
+        ts_from = ts_to
+
+
+def mask_to_bitmap(mask: int) -> bytes:
+    """Mask to bitmap."""
+    return mask.to_bytes(BITMAP_SIZE, "little")
+
+
+def bitmap_to_mask(bitmap: bytes) -> int:
+    """Bitmap to mask."""
+    return int.from_bytes(bitmap, "little")
+
+
+def has_coverage(
+    timestamp_from: datetime.datetime,
+    timestamp_to: datetime.datetime,
+    coverage: dict[datetime.date, int],
+) -> bool:
+    """Has coverage, for all minutes?"""
+    return all(
+        coverage.get(day.date(), 0) & mask == mask
+        for day, mask in iter_coverage(timestamp_from, timestamp_to)
+    )
+
+
+def get_coverage_existing(
+    timestamp_from: datetime.datetime,
+    timestamp_to: datetime.datetime,
+    coverage: dict[datetime.date, int],
+) -> list[datetime.datetime]:
+    """Get existing, from coverage, as in get_existing."""
+    existing = []
+    for day, mask in iter_coverage(timestamp_from, timestamp_to):
+        value = coverage.get(day.date(), 0) & mask
+        while value:
+            lowest = value & -value
+            minute = lowest.bit_length() - 1
+            existing.append(day + pd.Timedelta(f"{minute}min"))
+            value ^= lowest
+    return existing
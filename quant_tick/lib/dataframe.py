@@ -3,8 +3,11 @@ from decimal import Decimal
 from typing import Any
 
 import numpy as np
+import pandas as pd
 from pandas import DataFrame
 
+from .calendar import to_pydatetime
+
 
 def calculate_notional(data_frame: DataFrame) -> DataFrame:
     """Calculate notional."""
@@ -48,3 +51,36 @@ def assert_decimal(x: Any) -> None:
 def is_decimal_close(d1: Decimal, d2: Decimal) -> bool:
     """Is decimal one close to decimal two?"""
     return np.isclose(float(d1), float(d2))
+
+
+def get_statistics(data_frame: DataFrame) -> dict:
+    """Get statistics, so files need not be opened to be validated or pruned."""
+    if isinstance(data_frame.index, pd.DatetimeIndex):
+        timestamps = data_frame.index
+    else:
+        timestamps = data_frame.timestamp
+    data = {"rows": len(data_frame)}
+    if len(data_frame):
+        data["timestamp_from"] = to_pydatetime(timestamps.min())
+        data["timestamp_to"] = to_pydatetime(timestamps.max())
+    for key in ("volume", "notional"):
+        total_key = f"total{key.title()}"
+        column = total_key if total_key in data_frame.columns else key
+        if column in data_frame.columns:
+            data[key] = data_frame[column].sum()
+    return data
+
+
+def merge_statistics(data: list[dict]) -> dict:
+    """Merge statistics, of consecutive data frames."""
+    stats = {"rows": sum([d["rows"] for d in data])}
+    timestamps_from = [d["timestamp_from"] for d in data if "timestamp_from" in d]
+    timestamps_to = [d["timestamp_to"] for d in data if "timestamp_to" in d]
+    if timestamps_from:
+        stats["timestamp_from"] = min(timestamps_from)
+        stats["timestamp_to"] = max(timestamps_to)
+    for key in ("volume", "notional"):
+        values = [d[key] for d in data if key in d]
+        if values:
+            stats[key] = sum(values)
+    return stats
@@ -0,0 +1,96 @@
+import threading
+from collections.abc import Iterable
+from itertools import islice
+
+from django.apps import apps
+from django.core.files.storage import Storage
+from django.db import models, transaction
+from django.db.models import Q
+
+from .executor import iter_threaded
+from .mirror import invalidate_mirror
+from .tiered_storage import TieredStorage
+
+# Max calls per Google Cloud Storage batch request.
+MAX_BATCH_SIZE = 100
+
+# Max names per query, for SQLite's limit on query parameters.
+MAX_QUERY_SIZE = 500
+
+DELETE_QUEUE = threading.local()
+
+
+def delete_files(files: Iterable[tuple[Storage, str]]) -> None:
+    """Delete files.
+
+    If storage is tiered, files are deleted from each tier. If storage is Google Cloud
+    Storage, files are deleted with batch requests. Otherwise, files are deleted
+    concurrently.
+    """
+    names_by_storage = {}
+    for storage, name in files:
+        invalidate_mirror(name)
+        if isinstance(storage, TieredStorage):
+            tiers = (storage.hot, storage.cold)
+        else:
+            tiers = (storage,)
+        for tier in tiers:
+            names_by_storage.setdefault(tier, []).append(name)
+    for storage, names in names_by_storage.items():
+        bucket = getattr(storage, "bucket", None)
+        if bucket is not None:
+            from storages.utils import clean_name, safe_join
+
+            names = iter(names)
+            while chunk := list(islice(names, MAX_BATCH_SIZE)):
+                # Files that don't exist are ignored.
+                with storage.client.batch(raise_exception=False):
+                    for name in chunk:
+                        blob_name = safe_join(storage.location, clean_name(name))
+                        bucket.blob(blob_name).delete()
+        else:
+            for _ in iter_threaded(storage.delete, names):
+                pass
+
+
+def delete_files_on_commit(files: Iterable[tuple[Storage, str]]) -> None:
+    """Delete files, batched, once the transaction is committed.
+
+    Files are queued, and the first callback to run flushes the queue. On rollback,
+    callbacks are discarded, but files may remain queued, so files still referenced by
+    a row are not deleted.
+    """
+    if not hasattr(DELETE_QUEUE, "files"):
+        DELETE_QUEUE.files = []
+    DELETE_QUEUE.files.extend(files)
+    # If not within a transaction, executed immediately.
+    transaction.on_commit(flush_deletes)
+
+
+def flush_deletes() -> None:
+    """Flush deletes, of files not referenced by a row."""
+    files = getattr(DELETE_QUEUE, "files", None)
+    if files:
+        DELETE_QUEUE.files = []
+        names = get_referenced_names({name for _, name in files})
+        delete_files([(storage, name) for storage, name in files if name not in names])
+
+
+def get_referenced_names(names: set[str]) -> set[str]:
+    """Get names, referenced by a file field of a row."""
+    referenced = set()
+    for model in apps.get_app_config("quant_tick").get_models():
+        fields = [
+            field.attname
+            for field in model._meta.fields
+            if isinstance(field, models.FileField)
+        ]
+        if fields:
+            values = iter(names)
+            while chunk := list(islice(values, MAX_QUERY_SIZE)):
+                query = Q()
+                for field in fields:
+                    query |= Q(**{f"{field}__in": chunk})
+                for row in model.objects.filter(query).values_list(*fields):
+                    referenced.update(row)
+    return referenced & names
@@ -0,0 +1,241 @@
+import multiprocessing
+from collections import deque
+from collections.abc import Callable, Generator, Iterable
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from contextvars import ContextVar
+from itertools import islice
+from typing import Any
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import Storage
+from django.db import connection, connections, models
+from django.db.models.fields.files import FieldFile
+
+WRITE_BEHIND = ContextVar("write_behind", default=None)
+
+
+def get_max_workers() -> int:
+    """Get max workers, for concurrent reads and writes of storage."""
+    return getattr(settings, "QUANT_TICK_MAX_WORKERS", 8)
+
+
+def get_max_pending() -> int:
+    """Get max pending, objects with uploads in flight before writes block."""
+    return getattr(settings, "QUANT_TICK_MAX_PENDING", get_max_workers() * 2)
+
+
+def get_max_processes() -> int:
+    """Get max processes, for CPU bound aggregation.
+
+    By default, 1, so processes are only forked if opted in.
+    """
+    return getattr(settings, "QUANT_TICK_MAX_PROCESSES", 1)
+
+
+def map_processes(
+    func: Callable, *iterables: Iterable, max_processes: int | None = None
+) -> list:
+    """Map processes, preserving order.
+
+    Processes are forked, after database connections are closed, so that each process
+    opens its own. Within a transaction, uncommitted data would not be visible to other
+    processes, so values are mapped in process.
+    """
+    max_processes = max_processes or get_max_processes()
+    values = list(zip(*iterables, strict=True))
+    if max_processes == 1 or len(values) <= 1 or connection.in_atomic_block:
+        return [func(*value) for value in values]
+    connections.close_all()
+    with ProcessPoolExecutor(
+        max_workers=min(max_processes, len(values)),
+        mp_context=multiprocessing.get_context("fork"),
+    ) as executor:
+        return list(executor.map(func, *zip(*values, strict=True)))
+
+
+def iter_threaded(
+    func: Callable, values: Iterable, max_workers: int | None = None
+) -> Generator[Any, None, None]:
+    """Iter threaded, preserving order.
+
+    Storage round trips are I/O bound. No more than max workers are in flight, so
+    results are bounded in memory.
+    """
+    max_workers = max_workers or get_max_workers()
+    values = iter(values)
+    if max_workers == 1:
+        for value in values:
+            yield func(value)
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = deque(
+                executor.submit(func, value) for value in islice(values, max_workers)
+            )
+            while futures:
+                future = futures.popleft()
+                for value in islice(values, 1):
+                    futures.append(executor.submit(func, value))
+                yield future.result()
+
+
+class WriteBehind:
+    """Write behind.
+
+    Files are uploaded on a thread pool. Each object is saved, on the calling thread,
+    only once all of its files are uploaded. If more than max pending objects are in
+    flight, writes block until the oldest is saved.
+    """
+
+    def __init__(
+        self, max_workers: int | None = None, max_pending: int | None = None
+    ) -> None:
+        """Initialize."""
+        self.max_workers = max_workers or get_max_workers()
+        self.max_pending = max_pending or get_max_pending()
+        self.pending = deque()
+
+    def __enter__(self) -> "WriteBehind":
+        """Enter."""
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        self.token = WRITE_BEHIND.set(self)
+        return self
+
+    def __exit__(self, exc_type: type[BaseException] | None, *args) -> None:
+        """Exit, saving pending objects unless there was an exception."""
+        try:
+            if exc_type is None:
+                try:
+                    self.flush()
+                except BaseException:
+                    self.discard()
+                    raise
+            else:
+                self.discard()
+        finally:
+            self.executor.shutdown()
+            WRITE_BEHIND.reset(self.token)
+
+    def save(self, obj: models.Model) -> None:
+        """Upload files, then save object."""
+        uploads = [
+            (
+                field,
+                self.executor.submit(
+                    upload_file, file.storage, name, file.file, field.max_length
+                ),
+            )
+            for field, name, file in iter_uncommitted_files(obj)
+        ]
+        self.pending.append((obj, uploads))
+        while self.pending and (
+            len(self.pending) > self.max_pending or self.is_done(self.pending[0])
+        ):
+            self.complete(*self.pending.popleft())
+
+    def is_done(self, item: tuple[models.Model, list[tuple]]) -> bool:
+        """Are all files uploaded?"""
+        _, uploads = item
+        return all(future.done() for _, future in uploads)
+
+    def complete(
+        self, obj: models.Model, uploads: list[tuple[models.FileField, Future]]
+    ) -> None:
+        """Complete, by saving object with uploaded names.
+
+        If any upload, or the save, fails, uploaded files are deleted.
+        """
+        wait([future for _, future in uploads])
+        try:
+            for field, future in uploads:
+                setattr(obj, field.attname, future.result())
+            obj.save()
+        except BaseException:
+            delete_uploads(uploads)
+            raise
+
+    def flush(self) -> None:
+        """Flush, saving all pending objects."""
+        while self.pending:
+            self.complete(*self.pending.popleft())
+
+    def discard(self) -> None:
+        """Discard pending objects, and delete their uploaded files."""
+        while self.pending:
+            _, uploads = self.pending.popleft()
+            wait([future for _, future in uploads])
+            delete_uploads(uploads)
+
+
+def iter_uncommitted_files(
+    obj: models.Model,
+) -> Generator[tuple[models.FileField, str, FieldFile], None, None]:
+    """Iter uncommitted files, of object, with names.
+
+    Names are generated on the calling thread, as upload to may query the database.
+    """
+    for field in obj._meta.fields:
+        if isinstance(field, models.FileField):
+            file = getattr(obj, field.attname)
+            if file and not file._committed:
+                yield field, field.generate_filename(obj, file.name), file
+
+
+def upload_file(
+    storage: Storage, name: str, content: File, max_length: int | None = None
+) -> str:
+    """Upload file, returning saved name."""
+    return storage.save(name, content, max_length)
+
+
+def delete_uploads(uploads: list[tuple[models.FileField, Future]]) -> None:
+    """Delete uploaded files, of finished uploads."""
+    for field, future in uploads:
+        if future.done() and not future.cancelled() and not future.exception():
+            field.storage.delete(future.result())
+
+
+def upload_files(objs: Iterable[models.Model]) -> None:
+    """Upload files of objects concurrently, for example before a bulk save.
+
+    If any upload fails, uploaded files are deleted.
+    """
+    uploads = [
+        (obj, field, name, file)
+        for obj in objs
+        for field, name, file in iter_uncommitted_files(obj)
+    ]
+    with ThreadPoolExecutor(max_workers=get_max_workers()) as executor:
+        futures = [
+            executor.submit(
+                upload_file, file.storage, name, file.file, field.max_length
+            )
+            for _, field, name, file in uploads
+        ]
+    try:
+        for (obj, field, __, __), future in zip(uploads, futures, strict=True):
+            setattr(obj, field.attname, future.result())
+    except BaseException:
+        delete_uploads(
+            [
+                (field, f)
+                for (__, field, __, __), f in zip(uploads, futures, strict=True)
+            ]
+        )
+        raise
+
+
+def save_behind(obj: models.Model) -> None:
+    """Save object, write behind if within a write behind context."""
+    write_behind = WRITE_BEHIND.get()
+    if write_behind:
+        write_behind.save(obj)
+    else:
+        obj.save()
+
+
+def flush_write_behind() -> None:
+    """Flush write behind, if within a write behind context."""
+    write_behind = WRITE_BEHIND.get()
+    if write_behind:
+        write_behind.flush()
@@ -0,0 +1,53 @@
+import datetime
+
+from django.conf import settings
+from django.core.files.storage import Storage
+
+from .tiered_storage import TieredStorage
+
+
+def get_clean_grace_period() -> datetime.timedelta:
+    """Get clean grace period, within which files without objects are not deleted.
+
+    Files are uploaded before objects are saved.
+    """
+    return getattr(
+        settings, "QUANT_TICK_CLEAN_GRACE_PERIOD", datetime.timedelta(hours=1)
+    )
+
+
+def list_files(storage: Storage, prefix: str) -> dict[str, datetime.datetime]:
+    """List files, recursively, with prefix, and their modified times.
+
+    If storage is tiered, each tier is listed. If storage is Google Cloud Storage,
+    blobs are listed once, with pagination. Otherwise, directories are walked.
+    """
+    bucket = getattr(storage, "bucket", None)
+    if isinstance(storage, TieredStorage):
+        files = {}
+        for tier in (storage.hot, storage.cold):
+            for name, modified in list_files(tier, prefix).items():
+                # File may be in both tiers, until migrated.
+                files[name] = max(modified, files.get(name, modified))
+        return files
+    elif bucket is not None:
+        from storages.utils import clean_name, safe_join
+
+        location = storage.location.strip("/")
+        start = len(location) + 1 if location else 0
+        path = safe_join(storage.location, clean_name(prefix)).rstrip("/") + "/"
+        return {
+            blob.name[start:]: blob.updated for blob in bucket.list_blobs(prefix=path)
+        }
+    else:
+        try:
+            directories, filenames = storage.listdir(prefix)
+        except FileNotFoundError:
+            return {}
+        files = {}
+        for filename in filenames:
+            name = f"{prefix}/{filename}"
+            files[name] = storage.get_modified_time(name)
+        for directory in directories:
+            files |= list_files(storage, f"{prefix}/{directory}")
+        return files
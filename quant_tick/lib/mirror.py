@@ -0,0 +1,138 @@
+import logging
+import threading
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+
+import pyarrow as pa
+from django.conf import settings
+from pandas import DataFrame
+from pyarrow import feather
+
+logger = logging.getLogger(__name__)
+
+# Approximate size of the mirror, in bytes, so the directory is only walked when
+# eviction may be necessary.
+MIRROR_SIZE = {}
+MIRROR_SIZE_LOCK = threading.Lock()
+
+# Schema metadata key, so a mirrored file that no longer matches the stored file is
+# never read.
+MIRROR_VERSION = b"quant_tick_version"
+
+
+def get_mirror_root() -> Path | None:
+    """Get mirror root, if a local mirror is configured."""
+    directory = getattr(settings, "QUANT_TICK_LOCAL_MIRROR", None)
+    if directory:
+        return Path(directory)
+
+
+def get_mirror_max_size() -> int | None:
+    """Get mirror max size, in bytes."""
+    return getattr(settings, "QUANT_TICK_LOCAL_MIRROR_MAX_SIZE", None)
+
+
+def get_mirror_path(name: str) -> Path | None:
+    """Get mirror path.
+
+    Example:
+    trades / coinbase / BTCUSD / blaring-crocodile / raw / 2022-01-01 / 0000.arrow
+    """
+    root = get_mirror_root()
+    if root and name:
+        return (root / name).with_suffix(".arrow")
+
+
+def read_mirror(name: str, version: str) -> DataFrame | None:
+    """Read mirror.
+
+    Arrow IPC files are memory mapped, so the read is zero-copy until conversion to
+    pandas. Files are keyed by name and version, as names are reused when a file is
+    rewritten.
+    """
+    path = get_mirror_path(name)
+    if path:
+        try:
+            table = feather.read_table(path, memory_map=True)
+        except (FileNotFoundError, pa.ArrowInvalid):
+            return None
+        else:
+            metadata = table.schema.metadata or {}
+            if metadata.get(MIRROR_VERSION) != version.encode():
+                return None
+            # Most recently used.
+            path.touch()
+            return table.to_pandas()
+
+
+def write_mirror(name: str, table: pa.Table, version: str) -> None:
+    """Write mirror.
+
+    Uncompressed, as compressed buffers can't be memory mapped.
+    """
+    path = get_mirror_path(name)
+    if path:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        metadata = {**(table.schema.metadata or {}), MIRROR_VERSION: version.encode()}
+        table = table.replace_schema_metadata(metadata)
+        previous_size = path.stat().st_size if path.exists() else 0
+        with NamedTemporaryFile(dir=path.parent, delete=False) as temp:
+            temp_path = Path(temp.name)
+        try:
+            feather.write_feather(table, temp_path, compression="uncompressed")
+            # Atomic, so concurrent readers never see a partial file.
+            temp_path.replace(path)
+        finally:
+            temp_path.unlink(missing_ok=True)
+        root = get_mirror_root()
+        with MIRROR_SIZE_LOCK:
+            MIRROR_SIZE[root] = (
+                get_mirror_size(root) - previous_size + path.stat().st_size
+            )
+        evict_mirror()
+
+
+def invalidate_mirror(name: str) -> None:
+    """Invalidate mirror."""
+    path = get_mirror_path(name)
+    if path and path.exists():
+        size = path.stat().st_size
+        path.unlink(missing_ok=True)
+        root = get_mirror_root()
+        with MIRROR_SIZE_LOCK:
+            if root in MIRROR_SIZE:
+                MIRROR_SIZE[root] -= size
+
+
+def get_mirror_size(root: Path) -> int:
+    """Get mirror size.
+
+    Callers should hold the lock.
+    """
+    if root not in MIRROR_SIZE:
+        MIRROR_SIZE[root] = sum(
+            path.stat().st_size for path in root.rglob("*.arrow") if path.is_file()
+        )
+    return MIRROR_SIZE[root]
+
+
+def evict_mirror() -> None:
+    """Evict least recently used files, until mirror is less than max size."""
+    root = get_mirror_root()
+    max_size = get_mirror_max_size()
+    with MIRROR_SIZE_LOCK:
+        is_full = bool(root and max_size and get_mirror_size(root) > max_size)
+    if is_full:
+        files = sorted(
+            [(path.stat(), path) for path in root.rglob("*.arrow") if path.is_file()],
+            key=lambda item: item[0].st_mtime,
+        )
+        total = sum(stat.st_size for stat, _ in files)
+        for stat, path in files:
+            if total <= max_size:
+                break
+            path.unlink(missing_ok=True)
+            total -= stat.st_size
+            logger.debug(f"Evicted {path}")
+        with MIRROR_SIZE_LOCK:
+            MIRROR_SIZE[root] = total
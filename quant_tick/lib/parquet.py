@@ -0,0 +1,99 @@
+import hashlib
+from io import BytesIO
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from django.core.files.base import File
+from pandas import DataFrame
+
+from quant_tick.constants import NUMERIC_PRECISION, NUMERIC_SCALE
+
+# Decimals are stored with the same precision and scale as the database, so row
+# groups with differently inferred decimals share one schema.
+DECIMAL = pa.decimal256(NUMERIC_PRECISION, NUMERIC_SCALE)
+
+
+class ParquetStreamWriter:
+    """Parquet stream writer.
+
+    Data frames are written as row groups, so only one data frame need be in memory.
+    """
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self.buffer = BytesIO()
+        self.writer = None
+        self.schema = None
+        self.pending = []
+        self.rows = 0
+
+    def write(self, data_frame: DataFrame) -> None:
+        """Write data frame, as a row group."""
+        drop_columns = [c for c in ("index", "uid") if c in data_frame.columns]
+        if len(drop_columns):
+            data_frame = data_frame.drop(columns=drop_columns)
+        # Only a timestamp index, i.e. candles, is preserved.
+        preserve_index = data_frame.index.name is not None
+        table = pa.Table.from_pandas(data_frame, preserve_index=preserve_index)
+        table = table.cast(get_schema(table.schema))
+        self.rows += table.num_rows
+        if self.writer is None:
+            self.pending.append(table)
+            schema = pa.unify_schemas(
+                [t.schema for t in self.pending], promote_options="permissive"
+            )
+            # Columns that are entirely null, have no type until a later row group.
+            if not any(pa.types.is_null(field.type) for field in schema):
+                self.open(schema)
+        else:
+            self.write_table(table)
+
+    def open(self, schema: pa.Schema) -> None:
+        """Open writer, and write pending row groups."""
+        self.schema = schema
+        self.writer = pq.ParquetWriter(self.buffer, schema, compression="snappy")
+        for table in self.pending:
+            self.write_table(table)
+        self.pending = []
+
+    def write_table(self, table: pa.Table) -> None:
+        """Write table, conformed to schema."""
+        columns = [
+            (
+                table.column(field.name).cast(field.type)
+                if field.name in table.column_names
+                else pa.nulls(table.num_rows, type=field.type)
+            )
+            for field in self.schema
+        ]
+        self.writer.write_table(pa.Table.from_arrays(columns, schema=self.schema))
+
+    def close(self) -> bytes | None:
+        """Close writer, and get bytes."""
+        if self.writer is None and self.pending:
+            schema = pa.unify_schemas(
+                [t.schema for t in self.pending], promote_options="permissive"
+            )
+            self.open(schema)
+        if self.writer is not None:
+            self.writer.close()
+            return self.buffer.getvalue()
+
+
+def get_schema(schema: pa.Schema) -> pa.Schema:
+    """Get schema, with canonical decimals."""
+    return pa.schema(
+        [
+            field.with_type(DECIMAL) if pa.types.is_decimal(field.type) else field
+            for field in schema
+        ],
+        metadata=schema.metadata,
+    )
+
+
+def get_digest(content: File) -> str:
+    """Get digest, of file content."""
+    content.seek(0)
+    digest = hashlib.md5(content.read()).hexdigest()
+    content.seek(0)
+    return digest
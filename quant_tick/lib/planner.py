@@ -0,0 +1,96 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from pandas import DataFrame
+
+from .calendar import ONE_MINUTE, get_min_time
+
+# Estimated memory per row of trades, with decimal columns and intermediate copies.
+BYTES_PER_ROW = 1024
+
+
+def get_window_memory_budget() -> int:
+    """Get window memory budget, in bytes."""
+    return getattr(settings, "QUANT_TICK_WINDOW_MEMORY_BUDGET", 256 * 1024**2)
+
+
+def get_max_window_rows() -> int:
+    """Get max window rows, within memory budget."""
+    return max(get_window_memory_budget() // BYTES_PER_ROW, 1)
+
+
+def get_minute_rows(timestamp: datetime, values: list[dict]) -> np.ndarray | None:
+    """Get rows, by minute of day, from statistics.
+
+    Rows of hourly or daily statistics are spread evenly. Without statistics, rows
+    are unknown.
+    """
+    timestamp_from = get_min_time(timestamp, value="1d")
+    rows = np.zeros(1440)
+    for value in values:
+        if value["rows"] is None:
+            return None
+        start = (value["timestamp"] - timestamp_from) // ONE_MINUTE
+        stop = start + value["frequency"]
+        rows[start:stop] += value["rows"] / value["frequency"]
+    return rows
+
+
+def get_data_frame_minute_rows(
+    timestamp: datetime, data_frame: DataFrame
+) -> np.ndarray:
+    """Get rows, by minute of day, from data frame."""
+    timestamp_from = get_min_time(timestamp, value="1d")
+    if not len(data_frame):
+        return np.zeros(1440)
+    minutes = (data_frame.timestamp - timestamp_from) // pd.Timedelta("1min")
+    return np.bincount(minutes.to_numpy(dtype=np.int64), minlength=1440)[:1440]
+
+
+def plan_windows(
+    windows: list[tuple[datetime, datetime]],
+    rows: np.ndarray,
+    step: str = "1min",
+    max_rows: int | None = None,
+    reverse: bool = False,
+) -> list[tuple[datetime, datetime]]:
+    """Plan windows, within a day.
+
+    Consecutive quiet windows are merged, and hot windows are split by step, so that
+    each window is within max rows.
+    """
+    max_rows = max_rows or get_max_window_rows()
+    step = pd.Timedelta(step)
+    values = sorted(windows)
+    if not values:
+        return []
+    timestamp_from = get_min_time(values[0][0], value="1d")
+    cumsum = np.concatenate([[0], np.cumsum(rows)])
+
+    def get_rows(ts_from: datetime, ts_to: datetime) -> float:
+        start = (ts_from - timestamp_from) // ONE_MINUTE
+        stop = (ts_to - timestamp_from) // ONE_MINUTE
+        return cumsum[stop] - cumsum[start]
+
+    def split(ts_from: datetime, ts_to: datetime) -> list[tuple[datetime, datetime]]:
+        steps = (ts_to - ts_from) // step
+        if steps <= 1 or get_rows(ts_from, ts_to) <= max_rows:
+            return [(ts_from, ts_to)]
+        ts = ts_from + step * (steps // 2)
+        return split(ts_from, ts) + split(ts, ts_to)
+
+    planned = []
+    for ts_from, ts_to in values:
+        for window in split(ts_from, ts_to):
+            if planned:
+                previous_from, previous_to = planned[-1]
+                is_consecutive = previous_to == window[0]
+                if is_consecutive and get_rows(previous_from, window[1]) <= max_rows:
+                    planned[-1] = previous_from, window[1]
+                    continue
+            planned.append(window)
+    if reverse:
+        planned.reverse()
+    return planned
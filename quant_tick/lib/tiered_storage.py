@@ -0,0 +1,144 @@
+import datetime
+import re
+from typing import IO
+
+import pandas as pd
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import Storage, default_storage, storages
+
+from .calendar import get_current_time
+
+DATE_REGEX = re.compile(r"/(\d{4}-\d{2}-\d{2})/")
+
+
+def get_hot_storage_days() -> int:
+    """Get hot storage days."""
+    return getattr(settings, "QUANT_TICK_HOT_STORAGE_DAYS", 7)
+
+
+def get_trade_data_storage() -> Storage:
+    """Get trade data storage.
+
+    If hot and cold storages are configured, trade data is tiered.
+    """
+    hot = getattr(settings, "QUANT_TICK_HOT_STORAGE", None)
+    cold = getattr(settings, "QUANT_TICK_COLD_STORAGE", None)
+    if hot and cold:
+        return TieredStorage(storages[hot], storages[cold])
+    return default_storage
+
+
+def get_date(name: str) -> datetime.date | None:
+    """Get date, from upload path.
+
+    Example:
+    trades / coinbase / BTCUSD / blaring-crocodile / raw / 2022-01-01 / 0000.parquet
+    """
+    match = DATE_REGEX.search(name)
+    if match:
+        return datetime.date.fromisoformat(match.group(1))
+
+
+class TieredStorage(Storage):
+    """Tiered storage.
+
+    Files for the last N days are saved to hot storage, and older files to cold
+    storage. The tier is resolved by the date of the name, not by the database, and
+    the other tier is only tried if a file is not found. Files are not migrated in
+    the background, but with the migrate_trade_data_to_cold_storage command, with the
+    same name.
+    """
+
+    def __init__(
+        self, hot: Storage, cold: Storage, hot_storage_days: int | None = None
+    ) -> None:
+        """Initialize."""
+        self.hot = hot
+        self.cold = cold
+        self.hot_storage_days = hot_storage_days
+
+    def is_hot(self, name: str) -> bool:
+        """Is hot?"""
+        date = get_date(name)
+        if date is None:
+            return True
+        days = self.hot_storage_days or get_hot_storage_days()
+        return date >= (get_current_time() - pd.Timedelta(f"{days}d")).date()
+
+    def get_tiers(self, name: str) -> tuple[Storage, Storage]:
+        """Get tiers, expected tier first."""
+        if self.is_hot(name):
+            return self.hot, self.cold
+        return self.cold, self.hot
+
+    def _open(self, name: str, mode: str = "rb") -> File:
+        """Open, from expected tier, or other tier if not found."""
+        expected, other = self.get_tiers(name)
+        try:
+            return expected.open(name, mode)
+        # File may not yet be migrated.
+        except FileNotFoundError:
+            return other.open(name, mode)
+
+    def _save(self, name: str, content: IO) -> str:
+        """Save."""
+        expected, _ = self.get_tiers(name)
+        return expected.save(name, content)
+
+    def delete(self, name: str) -> None:
+        """Delete, from all tiers."""
+        for storage in (self.hot, self.cold):
+            storage.delete(name)
+
+    def exists(self, name: str) -> bool:
+        """Exists, in any tier."""
+        return any(storage.exists(name) for storage in self.get_tiers(name))
+
+    def listdir(self, path: str) -> tuple[list[str], list[str]]:
+        """List directory, of all tiers."""
+        directories, files = set(), set()
+        for storage in (self.hot, self.cold):
+            try:
+                d, f = storage.listdir(path)
+            except FileNotFoundError:
+                continue
+            directories.update(d)
+            files.update(f)
+        return sorted(directories), sorted(files)
+
+    def size(self, name: str) -> int:
+        """Size, from expected tier, or other tier if not found."""
+        expected, other = self.get_tiers(name)
+        try:
+            return expected.size(name)
+        except FileNotFoundError:
+            return other.size(name)
+
+    def get_modified_time(self, name: str) -> datetime.datetime:
+        """Get modified time, from expected tier, or other tier if not found."""
+        expected, other = self.get_tiers(name)
+        try:
+            return expected.get_modified_time(name)
+        except FileNotFoundError:
+            return other.get_modified_time(name)
+
+    def url(self, name: str) -> str:
+        """URL, of expected tier."""
+        expected, _ = self.get_tiers(name)
+        return expected.url(name)
+
+    def migrate(self, name: str) -> bool:
+        """Migrate file, to its expected tier.
+
+        Returns whether the file was migrated.
+        """
+        expected, other = self.get_tiers(name)
+        if other.exists(name):
+            if not expected.exists(name):
+                with other.open(name) as f:
+                    saved_name = expected.save(name, f)
+                assert saved_name == name
+            other.delete(name)
+            return True
+        return False
@@ -1,6 +1,8 @@
 import logging
 
-from quant_tick.controllers import aggregate_candles
+from django.core.management.base import CommandParser
+
+from quant_tick.controllers import aggregate_candle_groups, aggregate_candles
 from quant_tick.management.base import BaseCandleCommand
 
 logger = logging.getLogger(__name__)
@@ -11,8 +13,26 @@ class Command(BaseCandleCommand):
 
     help = "Create candles from trade data."
 
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add arguments."""
+        super().add_arguments(parser)
+        parser.add_argument("--fan-out", action="store_true")
+        parser.add_argument("--processes", type=int, default=None)
+
     def handle(self, *args, **options) -> None:
         """Run command."""
         kwargs = super().handle(*args, **options)
-        for k in kwargs:
-            aggregate_candles(**k)
+        max_processes = options.get("processes")
+        if options.get("fan_out"):
+            kwargs = list(kwargs)
+            if kwargs:
+                aggregate_candle_groups(
+                    [k["candle"] for k in kwargs],
+                    kwargs[0]["timestamp_from"],
+                    kwargs[0]["timestamp_to"],
+                    retry=kwargs[0]["retry"],
+                    max_processes=max_processes,
+                )
+        else:
+            for k in kwargs:
+                aggregate_candles(**k, max_processes=max_processes)
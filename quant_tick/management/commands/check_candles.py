@@ -8,6 +8,7 @@ from django.db.models import Q, QuerySet
 from quant_tick.constants import Frequency
 from quant_tick.controllers import aggregate_candles
 from quant_tick.lib import (
+    SUMMARY_FIELDS,
     get_current_time,
     get_min_time,
     is_decimal_close,
@@ -70,53 +71,19 @@ class Command(BaseCandleCommand):
         self, candle: Candle, timestamp_from: datetime, timestamp_to: datetime
     ) -> None:
         """Check daily range."""
-        expected_ = candle.get_expected_daily_candle(timestamp_from, timestamp_to)
+        expected = candle.get_expected_daily_candles(timestamp_from, timestamp_to)
         delta = timestamp_to - timestamp_from
-        if len(trade_data_summary) == delta.days:
+        total_days = expected.pop("total_days")
+        if total_days and total_days == delta.days * candle.symbols.count():
             candles = candle.get_data(timestamp_from, timestamp_to)
             if len(candles):
-                candles.reverse()
-                keys = (
-                    "volume",
-                    "buyVolume",
-                    "notional",
-                    "buyNotional",
-                    "ticks",
-                    "buyTicks",
-                )
-                expected = {
-                    "high": max(
-                        [
-                            t.json_data["candle"]["high"]
-                            for t in trade_data_summary
-                            if t.json_data
-                        ],
-                        default=None,
-                    ),
-                    "low": min(
-                        [
-                            t.json_data["candle"]["low"]
-                            for t in trade_data_summary
-                            if t.json_data
-                        ],
-                        default=None,
-                    ),
-                }
-                for key in keys:
-                    expected[key] = sum(
-                        [
-                            t.json_data["candle"][key]
-                            for t in trade_data_summary
-                            if t.json_data
-                        ]
-                    )
                 actual = {
                     "high": max(
                         [c["json_data"]["high"] for c in candles], default=None
                     ),
                     "low": min([c["json_data"]["low"] for c in candles], default=None),
                 }
-                for key in keys:
+                for key in SUMMARY_FIELDS:
                     actual[key] = sum([c["json_data"][key] for c in candles])
 
                 is_close = all(
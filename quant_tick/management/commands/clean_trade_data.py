@@ -1,18 +1,14 @@
 from quant_tick.management.base import BaseTradeDataCommand
-from quant_tick.storage import (
-    clean_trade_data_with_non_existing_files,
-    clean_unlinked_trade_data_files,
-)
+from quant_tick.storage import clean_trade_data
 
 
 class Command(BaseTradeDataCommand):
     """Clean trade data."""
 
-    help = "Clean storage, and decrease storage frequency."
+    help = "Clean trade data with non-existing files, and unlinked files."
 
     def handle(self, *args, **options) -> None:
         """Run command."""
         kwargs = super().handle(*args, **options)
         for k in kwargs:
-            clean_trade_data_with_non_existing_files(**k)
-            clean_unlinked_trade_data_files(**k)
+            clean_trade_data(**k)
@@ -0,0 +1,14 @@
+from quant_tick.management.base import BaseTradeDataCommand
+from quant_tick.storage import compact_trade_data
+
+
+class Command(BaseTradeDataCommand):
+    """Compact trade data."""
+
+    help = "Compact trade data, by merging segments into hourly or daily files."
+
+    def handle(self, *args, **options) -> None:
+        """Run command."""
+        kwargs = super().handle(*args, **options)
+        for k in kwargs:
+            compact_trade_data(**k)
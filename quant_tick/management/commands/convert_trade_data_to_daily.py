@@ -0,0 +1,14 @@
+from quant_tick.management.base import BaseTradeDataCommand
+from quant_tick.storage import convert_trade_data_to_daily
+
+
+class Command(BaseTradeDataCommand):
+    """Convert trade data to daily."""
+
+    help = "Convert trade data by hour, to daily."
+
+    def handle(self, *args, **options) -> None:
+        """Run command."""
+        kwargs = super().handle(*args, **options)
+        for k in kwargs:
+            convert_trade_data_to_daily(**k)
@@ -0,0 +1,14 @@
+from quant_tick.management.base import BaseTradeDataCommand
+from quant_tick.storage import migrate_trade_data_to_cold_storage
+
+
+class Command(BaseTradeDataCommand):
+    """Migrate trade data to cold storage."""
+
+    help = "Migrate trade data files, older than hot storage days, to cold storage."
+
+    def handle(self, *args, **options) -> None:
+        """Run command."""
+        kwargs = super().handle(*args, **options)
+        for k in kwargs:
+            migrate_trade_data_to_cold_storage(**k)
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("quant_tick", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="tradedata",
+            name="frequency",
+            field=models.PositiveIntegerField(
+                choices=[(1, "Minute"), (60, "Hour"), (1440, "Day")],
+                db_index=True,
+                verbose_name="frequency",
+            ),
+        ),
+    ]
@@ -0,0 +1,106 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+import quant_tick.models.base
+import quant_tick.models.trades
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("quant_tick", "0002_trade_data_daily_frequency"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TradeDataSegment",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "uid",
+                    models.CharField(blank=True, max_length=255, verbose_name="uid"),
+                ),
+                (
+                    "raw_data",
+                    models.FileField(
+                        blank=True,
+                        upload_to=quant_tick.models.trades.upload_raw_data_to,
+                        verbose_name="raw data",
+                    ),
+                ),
+                (
+                    "aggregated_data",
+                    models.FileField(
+                        blank=True,
+                        upload_to=quant_tick.models.trades.upload_aggregated_data_to,
+                        verbose_name="aggregated data",
+                    ),
+                ),
+                (
+                    "filtered_data",
+                    models.FileField(
+                        blank=True,
+                        upload_to=quant_tick.models.trades.upload_filtered_data_to,
+                        verbose_name="filtered data",
+                    ),
+                ),
+                (
+                    "clustered_data",
+                    models.FileField(
+                        blank=True,
+                        upload_to=quant_tick.models.trades.upload_clustered_data_to,
+                        verbose_name="clustered data",
+                    ),
+                ),
+                (
+                    "candle_data",
+                    models.FileField(
+                        blank=True,
+                        upload_to=quant_tick.models.trades.upload_candle_data_to,
+                        verbose_name="candle data",
+                    ),
+                ),
+                (
+                    "json_data",
+                    models.JSONField(
+                        decoder=quant_tick.models.base.QuantTickDecoder,
+                        encoder=quant_tick.models.base.QuantTickEncoder,
+                        null=True,
+                        verbose_name="json data",
+                    ),
+                ),
+                (
+                    "ok",
+                    models.BooleanField(
+                        db_index=True, default=False, null=True, verbose_name="ok"
+                    ),
+                ),
+                ("timestamp", models.DateTimeField(verbose_name="timestamp")),
+                ("frequency", models.PositiveIntegerField(verbose_name="frequency")),
+                (
+                    "trade_data",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="segments",
+                        to="quant_tick.tradedata",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "trade data segment",
+                "verbose_name_plural": "trade data segments",
+                "db_table": "quant_tick_trade_data_segment",
+                "ordering": ("pk",),
+            },
+        ),
+    ]
@@ -0,0 +1,115 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:56
+
+from django.db import migrations, models
+
+import quant_tick.lib.tiered_storage
+import quant_tick.models.trades
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("quant_tick", "0003_trade_data_segment"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="tradedata",
+            name="aggregated_data",
+            field=models.FileField(
+                blank=True,
+                storage=quant_tick.lib.tiered_storage.get_trade_data_storage,
+                upload_to=quant_tick.models.trades.upload_aggregated_data_to,
+                verbose_name="aggregated data",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="tradedata",
+            name="candle_data",
+            field=models.FileField(
+                blank=True,
+                storage=quant_tick.lib.tiered_storage.get_trade_data_storage,
+                upload_to=quant_tick.models.trades.upload_candle_data_to,
+                verbose_name="candle data",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="tradedata",
+            name="clustered_data",
+            field=models.FileField(
+                blank=True,
+                storage=quant_tick.lib.tiered_storage.get_trade_data_storage,
+                upload_to=quant_tick.models.trades.upload_clustered_data_to,
+                verbose_name="clustered data",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="tradedata",
+            name="filtered_data",
+            field=models.FileField(
+                blank=True,
+                storage=quant_tick.lib.tiered_storage.get_trade_data_storage,
+                upload_to=quant_tick.models.trades.upload_filtered_data_to,
+                verbose_name="filtered data",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="tradedata",
+            name="raw_data",
+            field=models.FileField(
+                blank=True,
+                storage=quant_tick.lib.tiered_storage.get_trade_data_storage,
+                upload_to=quant_tick.models.trades.upload_raw_data_to,
+                verbose_name="raw data",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="tradedatasegment",
+            name="aggregated_data",
+            field=models.FileField(
+                blank=True,
+                storage=quant_tick.lib.tiered_storage.get_trade_data_storage,
+                upload_to=quant_tick.models.trades.upload_aggregated_data_to,
+                verbose_name="aggregated data",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="tradedatasegment",
+            name="candle_data",
+            field=models.FileField(
+                blank=True,
+                storage=quant_tick.lib.tiered_storage.get_trade_data_storage,
+                upload_to=quant_tick.models.trades.upload_candle_data_to,
+                verbose_name="candle data",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="tradedatasegment",
+            name="clustered_data",
+            field=models.FileField(
+                blank=True,
+                storage=quant_tick.lib.tiered_storage.get_trade_data_storage,
+                upload_to=quant_tick.models.trades.upload_clustered_data_to,
+                verbose_name="clustered data",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="tradedatasegment",
+            name="filtered_data",
+            field=models.FileField(
+                blank=True,
+                storage=quant_tick.lib.tiered_storage.get_trade_data_storage,
+                upload_to=quant_tick.models.trades.upload_filtered_data_to,
+                verbose_name="filtered data",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="tradedatasegment",
+            name="raw_data",
+            field=models.FileField(
+                blank=True,
+                storage=quant_tick.lib.tiered_storage.get_trade_data_storage,
+                upload_to=quant_tick.models.trades.upload_raw_data_to,
+                verbose_name="raw data",
+            ),
+        ),
+    ]
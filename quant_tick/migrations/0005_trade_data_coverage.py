@@ -0,0 +1,90 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:12
+
+import django.db.migrations.operations.special
+import django.db.models.deletion
+import pandas as pd
+from django.db import migrations, models
+
+# Frozen copies of quant_tick.lib.coverage, so the migration doesn't change with it.
+MINUTES_PER_DAY = 1440
+BITMAP_SIZE = MINUTES_PER_DAY // 8
+
+
+def iter_coverage(timestamp_from, timestamp_to):
+    ts_from = timestamp_from
+    while ts_from < timestamp_to:
+        day = pd.Timestamp(ts_from).floor("1d").to_pydatetime()
+        ts_to = min(day + pd.Timedelta("1d"), timestamp_to)
+        start = int((ts_from - day).total_seconds() // 60)
+        minutes = int((ts_to - ts_from).total_seconds() // 60)
+        yield day, ((1 << minutes) - 1) << start
+        ts_from = ts_to
+
+
+def mask_to_bitmap(mask):
+    return mask.to_bytes(BITMAP_SIZE, "little")
+
+
+def backfill_coverage(apps, schema_editor):
+    TradeData = apps.get_model("quant_tick", "TradeData")
+    TradeDataCoverage = apps.get_model("quant_tick", "TradeDataCoverage")
+    coverage = {}
+    trade_data = TradeData.objects.values("symbol_id", "timestamp", "frequency")
+    for t in trade_data.iterator():
+        ts_to = t["timestamp"] + pd.Timedelta(f"{t['frequency']}min")
+        for day, mask in iter_coverage(t["timestamp"], ts_to):
+            key = t["symbol_id"], day.date()
+            coverage[key] = coverage.get(key, 0) | mask
+    TradeDataCoverage.objects.bulk_create(
+        [
+            TradeDataCoverage(
+                symbol_id=symbol_id, date=date, bitmap=mask_to_bitmap(mask)
+            )
+            for (symbol_id, date), mask in coverage.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("quant_tick", "0004_trade_data_tiered_storage"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TradeDataCoverage",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField(verbose_name="date")),
+                ("bitmap", models.BinaryField(verbose_name="bitmap")),
+                (
+                    "symbol",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="trade_data_coverage",
+                        to="quant_tick.symbol",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "trade data coverage",
+                "verbose_name_plural": "trade data coverage",
+                "db_table": "quant_tick_trade_data_coverage",
+                "ordering": ("date",),
+                "unique_together": {("symbol", "date")},
+            },
+        ),
+        migrations.RunPython(
+            code=backfill_coverage,
+            reverse_code=django.db.migrations.operations.special.RunPython.noop,
+        ),
+    ]
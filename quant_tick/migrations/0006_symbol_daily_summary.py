@@ -0,0 +1,211 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:40
+
+from decimal import Decimal
+
+import django.db.migrations.operations.special
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Frozen copies of quant_tick.lib.candles, so the migration doesn't change with it.
+SUMMARY_FIELDS = {
+    "volume": "volume",
+    "buyVolume": "buy_volume",
+    "notional": "notional",
+    "buyNotional": "buy_notional",
+    "ticks": "ticks",
+    "buyTicks": "buy_ticks",
+}
+DAILY_SUMMARY = (
+    "minutes",
+    "first_timestamp",
+    "last_timestamp",
+    "open",
+    "high",
+    "low",
+    "close",
+    *SUMMARY_FIELDS.values(),
+)
+
+
+def get_daily_summary(trade_data):
+    data = {key: None for key in DAILY_SUMMARY}
+    data["minutes"] = 0
+    data.update({field: Decimal("0") for field in SUMMARY_FIELDS.values()})
+    for t in trade_data:
+        data["minutes"] += t["frequency"]
+        # Without trades, trade data may have segments only.
+        if not t["json_data"] or "candle" not in t["json_data"]:
+            continue
+        candle = t["json_data"]["candle"]
+        timestamp = t["timestamp"]
+        if data["first_timestamp"] is None or timestamp < data["first_timestamp"]:
+            data["first_timestamp"] = timestamp
+            data["open"] = candle.get("open")
+        if data["last_timestamp"] is None or timestamp > data["last_timestamp"]:
+            data["last_timestamp"] = timestamp
+            data["close"] = candle.get("close")
+        high = candle.get("high")
+        if high is not None and (data["high"] is None or high > data["high"]):
+            data["high"] = high
+        low = candle.get("low")
+        if low is not None and (data["low"] is None or low < data["low"]):
+            data["low"] = low
+        for key, field in SUMMARY_FIELDS.items():
+            data[field] += candle.get(key, 0)
+    return data
+
+
+def backfill_daily_summary(apps, schema_editor):
+    TradeData = apps.get_model("quant_tick", "TradeData")
+    SymbolDailySummary = apps.get_model("quant_tick", "SymbolDailySummary")
+    trade_data = {}
+    values = TradeData.objects.values(
+        "symbol_id", "timestamp", "frequency", "json_data"
+    )
+    for t in values.iterator():
+        key = t["symbol_id"], t["timestamp"].date()
+        trade_data.setdefault(key, []).append(t)
+    SymbolDailySummary.objects.bulk_create(
+        [
+            SymbolDailySummary(
+                symbol_id=symbol_id, date=date, **get_daily_summary(value)
+            )
+            for (symbol_id, date), value in trade_data.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("quant_tick", "0005_trade_data_coverage"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SymbolDailySummary",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField(verbose_name="date")),
+                (
+                    "minutes",
+                    models.PositiveIntegerField(default=0, verbose_name="minutes"),
+                ),
+                (
+                    "first_timestamp",
+                    models.DateTimeField(null=True, verbose_name="first timestamp"),
+                ),
+                (
+                    "last_timestamp",
+                    models.DateTimeField(null=True, verbose_name="last timestamp"),
+                ),
+                (
+                    "open",
+                    models.DecimalField(
+                        decimal_places=38,
+                        max_digits=76,
+                        null=True,
+                        verbose_name="open",
+                    ),
+                ),
+                (
+                    "high",
+                    models.DecimalField(
+                        decimal_places=38,
+                        max_digits=76,
+                        null=True,
+                        verbose_name="high",
+                    ),
+                ),
+                (
+                    "low",
+                    models.DecimalField(
+                        decimal_places=38,
+                        max_digits=76,
+                        null=True,
+                        verbose_name="low",
+                    ),
+                ),
+                (
+                    "close",
+                    models.DecimalField(
+                        decimal_places=38,
+                        max_digits=76,
+                        null=True,
+                        verbose_name="close",
+                    ),
+                ),
+                (
+                    "volume",
+                    models.DecimalField(
+                        decimal_places=38,
+                        default=Decimal("0"),
+                        max_digits=76,
+                        verbose_name="volume",
+                    ),
+                ),
+                (
+                    "buy_volume",
+                    models.DecimalField(
+                        decimal_places=38,
+                        default=Decimal("0"),
+                        max_digits=76,
+                        verbose_name="buy volume",
+                    ),
+                ),
+                (
+                    "notional",
+                    models.DecimalField(
+                        decimal_places=38,
+                        default=Decimal("0"),
+                        max_digits=76,
+                        verbose_name="notional",
+                    ),
+                ),
+                (
+                    "buy_notional",
+                    models.DecimalField(
+                        decimal_places=38,
+                        default=Decimal("0"),
+                        max_digits=76,
+                        verbose_name="buy notional",
+                    ),
+                ),
+                (
+                    "ticks",
+                    models.PositiveBigIntegerField(default=0, verbose_name="ticks"),
+                ),
+                (
+                    "buy_ticks",
+                    models.PositiveBigIntegerField(default=0, verbose_name="buy ticks"),
+                ),
+                (
+                    "symbol",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_summaries",
+                        to="quant_tick.symbol",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "symbol daily summary",
+                "verbose_name_plural": "symbol daily summaries",
+                "db_table": "quant_tick_symbol_daily_summary",
+                "ordering": ("date",),
+                "unique_together": {("symbol", "date")},
+            },
+        ),
+        migrations.RunPython(
+            code=backfill_daily_summary,
+            reverse_code=django.db.migrations.operations.special.RunPython.noop,
+        ),
+    ]
@@ -7,7 +7,12 @@ from .candle_types import (
 )
 from .candles import Candle, CandleCache, CandleData
 from .symbols import GlobalSymbol, Symbol
-from .trades import TradeData
+from .trades import (
+    SymbolDailySummary,
+    TradeData,
+    TradeDataCoverage,
+    TradeDataSegment,
+)
 
 __all__ = [
     "AdaptiveCandle",
@@ -20,5 +25,8 @@ __all__ = [
     "CandleData",
     "GlobalSymbol",
     "Symbol",
+    "SymbolDailySummary",
     "TradeData",
+    "TradeDataCoverage",
+    "TradeDataSegment",
 ]
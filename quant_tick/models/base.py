@@ -7,6 +7,7 @@ from typing import Any
 
 import numpy as np
 import pandas as pd
+import pyarrow.parquet as pq
 import randomname
 from django.core.files.base import ContentFile
 from django.core.serializers.json import DjangoJSONEncoder
@@ -14,7 +15,13 @@ from django.db import models
 from pandas import DataFrame
 
 from quant_tick.constants import NUMERIC_PRECISION, NUMERIC_SCALE
-from quant_tick.lib import to_pydatetime
+from quant_tick.lib import (
+    delete_files_on_commit,
+    get_mirror_root,
+    read_mirror,
+    to_pydatetime,
+    write_mirror,
+)
 from quant_tick.utils import gettext_lazy as _
 
 
@@ -135,10 +142,66 @@ class AbstractDataStorage(models.Model):
         data = getattr(self, field)
         return data.name != ""
 
+    def get_mirror_version(self, field: str) -> str | None:
+        """Get mirror version, of field.
+
+        Without a version, a rewritten file can't be told apart from a mirrored file
+        of the same name, so it is not mirrored.
+        """
+        return None
+
     def get_data_frame(self, field: str) -> DataFrame:
-        """Get data frame."""
+        """Get data frame.
+
+        If there is a local mirror, read through it.
+        """
         if self.has_data_frame(field):
-            return pd.read_parquet(getattr(self, field).open())
+            data = getattr(self, field)
+            version = self.get_mirror_version(field)
+            if get_mirror_root() and version:
+                data_frame = read_mirror(data.name, version)
+                if data_frame is None:
+                    table = pq.read_table(data.open())
+                    write_mirror(data.name, table, version)
+                    data_frame = table.to_pandas()
+            else:
+                data_frame = pd.read_parquet(data.open())
+            return data_frame
+
+    def delete_data_frame(self, field: str) -> None:
+        """Delete data frame.
+
+        The file is deleted once the object, without the file, is saved.
+        """
+        data = getattr(self, field)
+        if data.name:
+            self.replaced_files = getattr(self, "replaced_files", [])
+            self.replaced_files.append((data.storage, data.name))
+        setattr(self, field, "")
+
+    def delete_replaced_files(self) -> None:
+        """Delete replaced files, once the transaction is committed.
+
+        A file saved with the same name as a replaced file is not deleted.
+        """
+        names = {
+            getattr(self, field.attname).name
+            for field in self._meta.fields
+            if isinstance(field, models.FileField)
+        }
+        files = [
+            (storage, name)
+            for storage, name in getattr(self, "replaced_files", [])
+            if name not in names
+        ]
+        self.replaced_files = []
+        if files:
+            delete_files_on_commit(files)
+
+    def save(self, *args, **kwargs) -> None:
+        """Save, then delete replaced files."""
+        super().save(*args, **kwargs)
+        self.delete_replaced_files()
 
     class Meta:
         abstract = True
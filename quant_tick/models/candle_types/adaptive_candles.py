@@ -1,13 +1,14 @@
-from datetime import datetime
+from bisect import bisect_left
+from datetime import datetime, timedelta
 from decimal import Decimal
 
 import pandas as pd
+from django.db.models import QuerySet, Sum
 
 from quant_tick.constants import Frequency
-from quant_tick.lib import get_existing, get_min_time
+from quant_tick.lib import SUMMARY_FIELDS, get_min_time
 from quant_tick.utils import gettext_lazy as _
 
-from ..trades import TradeData
 from .constant_candles import ConstantCandle
 
 
@@ -34,47 +35,61 @@ class AdaptiveCandle(ConstantCandle):
             data["target_value"] = self.get_moving_average_value(timestamp)
         return data
 
-    def get_trade_data_for_moving_average(self, timestamp: datetime) -> bool:
-        """Get trade data for moving average."""
+    def get_daily_summaries_for_moving_average(self, timestamp: datetime) -> QuerySet:
+        """Get daily summaries for moving average."""
         days = self.json_data["moving_average_number_of_days"]
-        delta = pd.Timedelta(f"{days}d")
-        ts = get_min_time(timestamp, value="1d") - delta
-        return TradeData.objects.filter(
-            symbol__in=self.symbols.all(), timestamp__gte=ts, timestamp__lt=ts + delta
-        )
+        timestamp_to = get_min_time(timestamp, value="1d")
+        timestamp_from = timestamp_to - pd.Timedelta(f"{days}d")
+        return self.get_daily_summaries(timestamp_from, timestamp_to)
 
     def get_moving_average_value(self, timestamp: datetime) -> Decimal:
-        """Get moving average value."""
+        """Get moving average value, from daily summaries."""
         days = self.json_data["moving_average_number_of_days"]
-        trade_data = (
-            self.get_trade_data_for_moving_average(timestamp)
-            .only("json_data")
-            .values("json_data")
-            .order_by("-timestamp")
-        )
+        field = SUMMARY_FIELDS[self.json_data["sample_type"]]
+        summaries = self.get_daily_summaries_for_moving_average(timestamp)
+        total = summaries.aggregate(total=Sum(field))["total"] or 0
         total_symbols = self.symbols.all().count()
-        sample_type = self.json_data["sample_type"]
-        total = sum(
-            [
-                t["json_data"]["candle"][sample_type]
-                for t in trade_data
-                if t["json_data"] is not None
-            ]
-        )
         return total / total_symbols / days / self.json_data["target_candles_per_day"]
 
-    def can_aggregate(self, timestamp_from: datetime, timestamp_to: datetime) -> bool:
-        """Can aggregate."""
-        can_agg = super().can_aggregate(timestamp_from, timestamp_to)
-        trade_data_ma = self.get_trade_data_for_moving_average(timestamp_from)
-        existing = get_existing(trade_data_ma.values("timestamp", "frequency"))
+    def get_plan(self, timestamp_from: datetime, timestamp_to: datetime) -> dict:
+        """Get plan, with dates of complete trade data for the moving average."""
         days = self.json_data["moving_average_number_of_days"]
-        can_calculate_moving_average = len(existing) == Frequency.DAY * days
+        ts_from = get_min_time(timestamp_from, value="1d") - pd.Timedelta(f"{days}d")
+        plan = super().get_plan(ts_from, timestamp_to)
+        full_mask = (1 << Frequency.DAY) - 1
+        dates = [
+            {
+                date
+                for date, mask in plan["coverage"].get(symbol, {}).items()
+                if mask == full_mask
+            }
+            for symbol in plan["symbols"]
+        ]
+        plan["complete_dates"] = sorted(set.intersection(*dates) if dates else [])
+        return plan
+
+    def can_aggregate(
+        self,
+        timestamp_from: datetime,
+        timestamp_to: datetime,
+        plan: dict | None = None,
+    ) -> bool:
+        """Can aggregate, if all days of the moving average are complete."""
+        plan = plan or self.get_plan(timestamp_from, timestamp_to)
+        can_agg = super().can_aggregate(timestamp_from, timestamp_to, plan)
+        days = self.json_data["moving_average_number_of_days"]
+        date_to = get_min_time(timestamp_from, value="1d").date()
+        date_from = date_to - timedelta(days=days)
+        complete_dates = plan["complete_dates"]
+        total_days = bisect_left(complete_dates, date_to) - bisect_left(
+            complete_dates, date_from
+        )
+        can_calculate_moving_average = total_days == days
         return can_agg and can_calculate_moving_average
 
-    def should_aggregate_candle(self, data: dict) -> bool:
-        """Should aggregate candle."""
-        return data["sample_value"] >= data["target_value"]
+    def get_target_value(self, data: dict) -> Decimal:
+        """Get target value."""
+        return data["target_value"]
 
     class Meta:
         proxy = True
@@ -1,10 +1,19 @@
+from bisect import bisect_right, insort
 from datetime import datetime
+from typing import Any
 
 import pandas as pd
 from pandas import DataFrame
 
 from quant_tick.constants import Frequency
-from quant_tick.lib import aggregate_candle, get_next_cache, merge_cache
+from quant_tick.lib import (
+    aggregate_samples,
+    get_min_time,
+    get_next_cache,
+    get_sample_indexes,
+    merge_cache,
+    split_by_day,
+)
 from quant_tick.utils import gettext_lazy as _
 
 from ..candles import Candle, CandleCache
@@ -47,21 +56,71 @@ class ConstantCandle(Candle):
                     return True
         return False
 
-    def can_aggregate(self, timestamp_from: datetime, timestamp_to: datetime) -> bool:
-        """Can aggregate."""
-        can_agg = super().can_aggregate(timestamp_from, timestamp_to)
-        last_cache = (
-            CandleCache.objects.filter(candle=self, timestamp__lt=timestamp_from)
-            .only("timestamp", "frequency")
-            .last()
+    def is_cache_reset(self, timestamp: datetime) -> bool:
+        """Is cache reset, at the start of a day or week?"""
+        cache_reset = self.json_data.get("cache_reset")
+        if timestamp != get_min_time(timestamp, value="1d"):
+            return False
+        is_daily_reset = cache_reset == Frequency.DAY
+        is_weekly_reset = cache_reset == Frequency.WEEK and timestamp.weekday() == 0
+        return is_daily_reset or is_weekly_reset
+
+    def get_shards(
+        self,
+        timestamp_from: datetime,
+        timestamp_to: datetime,
+        cache_data: dict | None = None,
+    ) -> list[tuple[datetime, datetime]]:
+        """Get shards.
+
+        If the cache resets daily or weekly, each period is independent, as the
+        incomplete candle is saved before the cache resets.
+        """
+        cache_reset = self.json_data.get("cache_reset")
+        if cache_reset == Frequency.DAY:
+            return split_by_day(timestamp_from, timestamp_to)
+        elif cache_reset == Frequency.WEEK:
+            return split_by_day(timestamp_from, timestamp_to, weekday=0)
+        return super().get_shards(timestamp_from, timestamp_to, cache_data)
+
+    def get_plan(self, timestamp_from: datetime, timestamp_to: datetime) -> dict:
+        """Get plan, with timestamps to of cache."""
+        plan = super().get_plan(timestamp_from, timestamp_to)
+        candle_cache = CandleCache.objects.filter(candle=self).only(
+            "timestamp", "frequency"
         )
-        if last_cache:
-            ts_from = last_cache.timestamp + pd.Timedelta(f"{last_cache.frequency}min")
-            # Don't aggregate without last cache.
-            return can_agg and timestamp_from == ts_from
-        else:
+        last_cache = candle_cache.filter(timestamp__lt=timestamp_from).last()
+        cache = candle_cache.filter(
+            timestamp__gte=timestamp_from, timestamp__lt=timestamp_to
+        )
+        plan["cache"] = [
+            c.timestamp + pd.Timedelta(f"{c.frequency}min")
+            for c in ([last_cache] if last_cache else []) + list(cache)
+        ]
+        return plan
+
+    def can_aggregate(
+        self,
+        timestamp_from: datetime,
+        timestamp_to: datetime,
+        plan: dict | None = None,
+    ) -> bool:
+        """Can aggregate.
+
+        If so, the plan is updated, as the cache will be written to timestamp to.
+        """
+        plan = plan or self.get_plan(timestamp_from, timestamp_to)
+        can_agg = super().can_aggregate(timestamp_from, timestamp_to, plan)
+        index = bisect_right(plan["cache"], timestamp_from)
+        if index and not self.is_cache_reset(timestamp_from):
+            # Don't aggregate without last cache, unless the cache resets.
+            can_agg = can_agg and timestamp_from == plan["cache"][index - 1]
+        elif not index:
             # There will only be no cache, if first iteration.
-            return True
+            can_agg = True
+        if can_agg:
+            insort(plan["cache"], timestamp_to)
+        return can_agg
 
     def aggregate(
         self,
@@ -70,34 +129,38 @@ class ConstantCandle(Candle):
         data_frame: DataFrame,
         cache_data: dict,
     ) -> tuple[list, dict | None]:
-        """Aggregate."""
-        start = 0
-        data = []
-        column = "total" + self.json_data["sample_type"].title()
-        for index, row in data_frame.iterrows():
-            cache_data["sample_value"] += row[column]
-            if self.should_aggregate_candle(cache_data):
-                df = data_frame.loc[start:index]
-                candle = aggregate_candle(df)
-                if "next" in cache_data:
-                    previous = cache_data.pop("next")
-                    candle = merge_cache(previous, candle)
-                data.append(candle)
-                # Reinitialize cache
-                cache_data["sample_value"] = 0
-                # Next index
-                start = index + 1
+        """Aggregate.
+
+        Samples are found, then aggregated with grouped reductions.
+        """
+        indexes = self.get_indexes(data_frame, cache_data)
+        data = aggregate_samples(data_frame, indexes)
+        if data and "next" in cache_data:
+            previous = cache_data.pop("next")
+            data[0] = merge_cache(previous, data[0])
         # Cache
-        is_last_row = start == len(data_frame)
-        if not is_last_row:
-            df = data_frame.loc[start:]
-            cache_data = get_next_cache(df, cache_data)
+        start = indexes[-1] + 1 if indexes else 0
+        if start < len(data_frame):
+            cache_data = get_next_cache(data_frame.iloc[start:], cache_data)
         data, cache_data = self.get_incomplete_candle(timestamp_to, data, cache_data)
         return data, cache_data
 
-    def should_aggregate_candle(self, data: dict) -> bool:
-        """Should aggregate candle."""
-        return data["sample_value"] >= self.json_data["target_value"]
+    def get_indexes(self, data_frame: DataFrame, cache_data: dict) -> list[int]:
+        """Get last index of each sample, with the cumulative sum of the sample type.
+
+        Cache is updated with the remaining sample value.
+        """
+        column = "total" + self.json_data["sample_type"].title()
+        indexes, cache_data["sample_value"] = get_sample_indexes(
+            data_frame[column].to_numpy(),
+            self.get_target_value(cache_data),
+            cache_data["sample_value"],
+        )
+        return indexes
+
+    def get_target_value(self, data: dict) -> Any:
+        """Get target value."""
+        return self.json_data["target_value"]
 
     def get_incomplete_candle(
         self, timestamp: datetime, data: list, cache_data: dict
@@ -1,3 +1,10 @@
+from datetime import datetime
+
+import numpy as np
+from django.db.models import Sum
+from pandas import DataFrame
+
+from quant_tick.lib import SUMMARY_FIELDS, get_imbalance_index
 from quant_tick.utils import gettext_lazy as _
 
 from .adaptive_candles import AdaptiveCandle
@@ -7,9 +14,126 @@ class ImbalanceCandle(AdaptiveCandle):
     """Imbalance candle.
 
     For example, 1 candle when:
-    * Ticks exceed 1 standard deviation of the 7 day average tick imbalance.
+    * Tick imbalance exceeds its expected value. Expected value is initially from the
+      7 day moving average, then the exponentially weighted moving average of candles.
+
+    Threshold, and expected value, are at least min imbalance times target value, so
+    that balanced flow does not degenerate to 1 candle per row.
     """
 
+    def get_initial_cache(self, timestamp: datetime) -> dict:
+        """Get initial cache."""
+        cache = super().get_initial_cache(timestamp)
+        cache.update(
+            {"imbalance": 0, "expected_value": None, "expected_imbalance": None}
+        )
+        return cache
+
+    def get_cache_data(self, timestamp: datetime, data: dict) -> dict:
+        """Get cache data.
+
+        Expected values are initialized from the moving average, then carried.
+        """
+        data = super().get_cache_data(timestamp, data)
+        if data.get("expected_value") is None:
+            data["imbalance"] = 0
+            data["expected_value"] = float(data["target_value"])
+            data["expected_imbalance"] = max(
+                abs(self.get_moving_average_imbalance(timestamp)),
+                self.get_min_imbalance(),
+            )
+        return data
+
+    def get_moving_average_imbalance(self, timestamp: datetime) -> float:
+        """Get moving average imbalance, as buy less sell, divided by total."""
+        sample_type = self.json_data["sample_type"]
+        buy_sample_type = "buy" + sample_type.title()
+        summaries = self.get_daily_summaries_for_moving_average(timestamp)
+        data = summaries.aggregate(
+            total=Sum(SUMMARY_FIELDS[sample_type]),
+            buy=Sum(SUMMARY_FIELDS[buy_sample_type]),
+        )
+        total = data["total"]
+        return float((2 * data["buy"] - total) / total) if total else 0.0
+
+    def get_alpha(self) -> float:
+        """Get alpha, of exponentially weighted moving averages."""
+        return 2 / (self.json_data.get("ewma_span", 20) + 1)
+
+    def get_min_imbalance(self) -> float:
+        """Get min imbalance, as a fraction of target value."""
+        return self.json_data.get("min_imbalance", 0.1)
+
+    def get_min_threshold(self, data: dict) -> float:
+        """Get min threshold, of absolute imbalance."""
+        return float(data["target_value"]) * self.get_min_imbalance()
+
+    def get_threshold(self, data: dict) -> float:
+        """Get threshold, of absolute imbalance."""
+        threshold = data["expected_value"] * data["expected_imbalance"]
+        return max(threshold, self.get_min_threshold(data))
+
+    def get_indexes(self, data_frame: DataFrame, cache_data: dict) -> list[int]:
+        """Get last index of each sample, where imbalance exceeds its expected value.
+
+        Imbalance is buy less sell of the sample type. Cache is updated with the
+        remaining sample value and imbalance, and expected values.
+        """
+        sample_type = self.json_data["sample_type"].title()
+        values = data_frame[f"total{sample_type}"].to_numpy(dtype=float)
+        buy_values = data_frame[f"totalBuy{sample_type}"].to_numpy(dtype=float)
+        buy_cumsum = np.concatenate([[0], np.cumsum(buy_values)])
+        sell_cumsum = np.concatenate([[0], np.cumsum(values - buy_values)])
+        indexes = []
+        start = 0
+        while start < len(values):
+            index = self.get_index(buy_cumsum, sell_cumsum, start, cache_data)
+            stop = min(index + 1, len(values))
+            buy = buy_cumsum[stop] - buy_cumsum[start]
+            sell = sell_cumsum[stop] - sell_cumsum[start]
+            sample_value = float(cache_data["sample_value"]) + buy + sell
+            imbalance = float(cache_data["imbalance"]) + buy - sell
+            if index == len(values):
+                cache_data["sample_value"] = float(sample_value)
+                cache_data["imbalance"] = float(imbalance)
+                break
+            self.update_expected(cache_data, sample_value, imbalance)
+            cache_data["sample_value"] = cache_data["imbalance"] = 0
+            indexes.append(index)
+            start = stop
+        return indexes
+
+    def get_index(
+        self,
+        buy_cumsum: np.ndarray,
+        sell_cumsum: np.ndarray,
+        start: int,
+        cache_data: dict,
+    ) -> int:
+        """Get index, of the next sample."""
+        return get_imbalance_index(
+            buy_cumsum,
+            sell_cumsum,
+            self.get_threshold(cache_data),
+            start=start,
+            imbalance=float(cache_data["imbalance"]),
+        )
+
+    def update_expected(
+        self, data: dict, sample_value: float, imbalance: float
+    ) -> None:
+        """Update expected values, with the sample value and imbalance of a candle.
+
+        Expected imbalance is of the absolute imbalance, divided by sample value.
+        """
+        alpha = self.get_alpha()
+        ratio = abs(imbalance) / sample_value if sample_value else 0
+        value = data["expected_value"]
+        value += alpha * (sample_value - value)
+        data["expected_value"] = float(max(value, self.get_min_threshold(data)))
+        value = data["expected_imbalance"]
+        data["expected_imbalance"] = float(value + alpha * (ratio - value))
+
     class Meta:
         proxy = True
         verbose_name = _("imbalance candle")
@@ -1,3 +1,6 @@
+import numpy as np
+
+from quant_tick.lib import get_run_index
 from quant_tick.utils import gettext_lazy as _
 
 from .imbalance_candles import ImbalanceCandle
@@ -7,9 +10,39 @@ class RunCandle(ImbalanceCandle):
     """Run candle.
 
     For example, 1 candle when:
-    * Ticks exceed 1 standard deviation of the 7 day moving average of tick runs.
+    * The larger of buy and sell tick runs exceeds its expected value. Expected value
+      is of imbalance candles.
     """
 
+    def get_threshold(self, data: dict) -> float:
+        """Get threshold, of the larger of buy and sell runs.
+
+        With expected imbalance r, the expected ratio of the larger is (1 + |r|) / 2.
+        """
+        return data["expected_value"] * (1 + abs(data["expected_imbalance"])) / 2
+
+    def get_index(
+        self,
+        buy_cumsum: np.ndarray,
+        sell_cumsum: np.ndarray,
+        start: int,
+        cache_data: dict,
+    ) -> int:
+        """Get index, of the next sample.
+
+        Buy and sell runs are carried, as sample value and imbalance.
+        """
+        sample_value = float(cache_data["sample_value"])
+        imbalance = float(cache_data["imbalance"])
+        return get_run_index(
+            buy_cumsum,
+            sell_cumsum,
+            self.get_threshold(cache_data),
+            start=start,
+            buy=(sample_value + imbalance) / 2,
+            sell=(sample_value - imbalance) / 2,
+        )
+
     class Meta:
         proxy = True
         verbose_name = _("run candle")
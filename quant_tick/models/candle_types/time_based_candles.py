@@ -5,12 +5,13 @@ from pandas import DataFrame
 
 from quant_tick.constants import Frequency
 from quant_tick.lib import (
-    aggregate_candle,
-    filter_by_timestamp,
+    aggregate_windows,
     get_min_time,
     get_next_cache,
     iter_window,
     merge_cache,
+    slice_by_timestamp,
+    split_by_day,
 )
 from quant_tick.utils import gettext_lazy as _
 
@@ -32,6 +33,28 @@ class TimeBasedCandle(Candle):
             ts_to += delta
         return ts_to
 
+    def get_shards(
+        self,
+        timestamp_from: datetime,
+        timestamp_to: datetime,
+        cache_data: dict | None = None,
+    ) -> list[tuple[datetime, datetime]]:
+        """Get shards.
+
+        If the window divides a day evenly, and windows are aligned to midnight, no
+        candle crosses a day, so by day. Windows are from the next candle of cache, if
+        any, otherwise from timestamp from.
+        """
+        window = pd.Timedelta(self.json_data["window"])
+        if cache_data and "next" in cache_data:
+            ts_from = cache_data["next"]["timestamp"]
+        else:
+            ts_from = timestamp_from
+        is_aligned = not (ts_from - get_min_time(ts_from, value="1d")) % window
+        if pd.Timedelta("1d") % window or not is_aligned:
+            return super().get_shards(timestamp_from, timestamp_to, cache_data)
+        return split_by_day(timestamp_from, timestamp_to)
+
     def aggregate(
         self,
         timestamp_from: datetime,
@@ -41,28 +64,26 @@ class TimeBasedCandle(Candle):
     ) -> tuple[list, dict | None]:
         """Aggregate.
 
-        Iterate forward. Intermediate results will be saved to CandleCache.json_data
+        Iterate forward, with grouped reductions by window. Intermediate results will be
+        saved to CandleCache.json_data
         """
         cache_data = cache_data or {}
-        data = []
         window = self.json_data["window"]
         if "next" in cache_data:
             ts_from = cache_data["next"]["timestamp"]
         else:
             ts_from = timestamp_from
         max_ts_to = self.get_max_timestamp_to(ts_from, timestamp_to)
-        ts_to = None
-        for ts_from, ts_to in iter_window(ts_from, max_ts_to, window):  # noqa: B020
-            df = filter_by_timestamp(data_frame, ts_from, ts_to)
-            if len(df):
-                candle = aggregate_candle(df, timestamp=ts_from)
-                if "next" in cache_data:
-                    previous = cache_data.pop("next")
-                    candle = merge_cache(previous, candle)
-                data.append(candle)
-            elif "next" in cache_data:
-                candle = cache_data.pop("next")
-                data.append(candle)
+        windows = list(iter_window(ts_from, max_ts_to, window))
+        data = aggregate_windows(data_frame, windows)
+        ts_to = windows[-1][1] if windows else None
+        if windows and "next" in cache_data:
+            previous = cache_data.pop("next")
+            # Previous is of the first window.
+            if data and data[0]["timestamp"] == windows[0][0]:
+                data[0] = merge_cache(previous, data[0])
+            else:
+                data.insert(0, previous)
         could_not_iterate = ts_to is None
         could_not_complete_iteration = ts_to and ts_to != timestamp_to
         if could_not_iterate or could_not_complete_iteration:
@@ -70,7 +91,8 @@ class TimeBasedCandle(Candle):
                 cache_ts_from = ts_from
             else:
                 cache_ts_from = ts_to
-            cache_df = filter_by_timestamp(data_frame, cache_ts_from, timestamp_to)
+            window = cache_ts_from, timestamp_to
+            cache_df = slice_by_timestamp(data_frame, [window])[0]
             if len(cache_df):
                 cache_data = get_next_cache(
                     cache_df, cache_data, timestamp=cache_ts_from
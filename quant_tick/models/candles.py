@@ -1,23 +1,39 @@
 from datetime import datetime
+from itertools import islice
 
+import numpy as np
 import pandas as pd
 from django.db import models
-from django.db.models import QuerySet
+from django.db.models import (
+    Case,
+    Count,
+    Max,
+    Min,
+    QuerySet,
+    Sum,
+    Value,
+    When,
+    prefetch_related_objects,
+)
+from django.db.models.fields.json import KT
+from django.db.models.functions import Cast
 from pandas import DataFrame
 from polymorphic.models import PolymorphicModel
 
 from quant_tick.constants import FileData, Frequency
 from quant_tick.lib import (
+    SUMMARY_FIELDS,
     filter_by_timestamp,
-    get_existing,
     get_min_time,
-    has_timestamps,
+    get_minute_rows,
+    has_coverage,
+    iter_threaded,
     parse_datetime,
 )
 from quant_tick.utils import gettext_lazy as _
 
 from .base import AbstractCodeName, JSONField
-from .trades import TradeData
+from .trades import SymbolDailySummary, TradeData, TradeDataCoverage
 
 
 class Candle(AbstractCodeName, PolymorphicModel):
@@ -94,6 +110,19 @@ class Candle(AbstractCodeName, PolymorphicModel):
         """Get initial cache."""
         return {}
 
+    def get_shards(
+        self,
+        timestamp_from: datetime,
+        timestamp_to: datetime,
+        cache_data: dict | None = None,
+    ) -> list[tuple[datetime, datetime]]:
+        """Get shards, of range, which can be aggregated independently.
+
+        Each shard, except the first, is aggregated from initial cache. By default,
+        there is 1 shard.
+        """
+        return [(timestamp_from, timestamp_to)]
+
     def get_cache_data(self, timestamp: datetime, data: dict) -> dict:
         """Get cache data."""
         return data
@@ -119,34 +148,67 @@ class Candle(AbstractCodeName, PolymorphicModel):
             .only(*["timestamp", "frequency"] + only)
         )
 
+    def get_daily_summaries(
+        self, timestamp_from: datetime, timestamp_to: datetime
+    ) -> QuerySet:
+        """Get daily summaries."""
+        return SymbolDailySummary.objects.filter(
+            symbol__in=self.symbols.all(),
+            date__gte=timestamp_from.date(),
+            date__lte=(timestamp_to - pd.Timedelta("1min")).date(),
+        )
+
     def get_expected_daily_candles(
         self, timestamp_from: datetime, timestamp_to: datetime
     ) -> dict:
-        """Get expected daily candles."""
-        trade_data = self.get_trade_data(timestamp_from, timestamp_to, only="json_data")
-        return trade_data.values_list("json_data", flat=True)
+        """Get expected daily candles, aggregated from summaries of complete days.
+
+        Total days is by symbol.
+        """
+        summaries = self.get_daily_summaries(timestamp_from, timestamp_to)
+        return summaries.filter(minutes=Frequency.DAY).aggregate(
+            total_days=Count("pk"),
+            high=Max("high"),
+            low=Min("low"),
+            **{key: Sum(field) for key, field in SUMMARY_FIELDS.items()},
+        )
 
     def get_data_frame(
         self, timestamp_from: datetime, timestamp_to: datetime
     ) -> DataFrame:
         """Get data frame."""
         trade_data = self.get_trade_data(
-            timestamp_from, timestamp_to, only=["symbol"] + list(FileData)
+            timestamp_from, timestamp_to, only=["symbol", "json_data"] + list(FileData)
         )
-        data_frames = []
+        source_data = self.json_data["source_data"]
+        targets = {}
         for symbol in self.symbols.all():
-            target = sorted(
-                [obj for obj in trade_data if obj.symbol == symbol],
+            targets[symbol] = sorted(
+                [
+                    obj
+                    for obj in trade_data
+                    # Query may contain trade data by minute.
+                    # Only target timestamps.
+                    if obj.symbol == symbol
+                    and timestamp_from
+                    <= obj.timestamp + pd.Timedelta(f"{obj.frequency}min")
+                    # Without opening empty files, or files outside of range.
+                    and obj.is_within_statistics(
+                        source_data, timestamp_from, timestamp_to
+                    )
+                ],
                 key=lambda obj: obj.timestamp,
             )
-            dfs = []
-            for t in target:
-                # Query may contain trade data by minute.
-                # Only target timestamps.
-                if timestamp_from <= t.timestamp + pd.Timedelta(f"{t.frequency}min"):
-                    df = t.get_data_frame(self.json_data["source_data"])
-                    if df is not None:
-                        dfs.append(df)
+        objs = [obj for target in targets.values() for obj in target]
+        # Segments are prefetched, as files are read by thread.
+        prefetch_related_objects(
+            [obj for obj in objs if obj.has_segments()], "segments"
+        )
+        # Read files concurrently, in order.
+        iterator = iter_threaded(lambda obj: obj.get_data_frame(source_data), objs)
+        data_frames = []
+        for symbol, target in targets.items():
+            dfs = [df for df in islice(iterator, len(target)) if df is not None]
             if dfs:
                 df = pd.concat(dfs)
                 df.insert(2, "exchange", symbol.exchange)
@@ -162,24 +224,67 @@ class Candle(AbstractCodeName, PolymorphicModel):
         else:
             return pd.DataFrame([])
 
-    def can_aggregate(self, timestamp_from: datetime, timestamp_to: datetime) -> bool:
-        """Can aggregate."""
-        values = []
-        for symbol in self.symbols.all():
-            # Trade data may be daily, so timestamp from >= daily timestmap.
-            trade_data = TradeData.objects.filter(
-                symbol=symbol,
-                timestamp__gte=get_min_time(timestamp_from, value="1d"),
-                timestamp__lt=timestamp_to,
+    def has_daily_trade_data(self, timestamp: datetime) -> bool:
+        """Has daily trade data, for all symbols?"""
+        symbols = self.symbols.all()
+        trade_data = TradeData.objects.filter(
+            symbol__in=symbols, timestamp=timestamp, frequency=Frequency.DAY
+        )
+        total = symbols.count()
+        return total > 0 and trade_data.count() == total
+
+    def get_plan(self, timestamp_from: datetime, timestamp_to: datetime) -> dict:
+        """Get plan, to check whether days in range can be aggregated."""
+        symbols = self.symbols.all()
+        return {
+            "symbols": [symbol.pk for symbol in symbols],
+            "coverage": TradeDataCoverage.objects.get_symbol_coverage(
+                symbols, timestamp_from, timestamp_to
+            ),
+        }
+
+    def get_minute_rows(self, timestamp: datetime, plan: dict) -> np.ndarray | None:
+        """Get rows, by minute of day, of trade data.
+
+        Rows are only queried for the day, and extracted from statistics by the
+        database, so that json data is not decoded.
+        """
+        timestamp_from = get_min_time(timestamp, value="1d")
+        source_data = self.json_data.get("source_data")
+        trade_data = (
+            TradeData.objects.filter(
+                symbol__in=plan["symbols"],
+                timestamp__gte=timestamp_from,
+                timestamp__lt=timestamp_from + pd.Timedelta("1d"),
             )
-            # Only target timestamps.
-            existing = [
-                t
-                for t in get_existing(trade_data.values("timestamp", "frequency"))
-                if t >= timestamp_from and t < timestamp_to
-            ]
-            values.append(has_timestamps(timestamp_from, timestamp_to, existing))
-        return all(values)
+            .annotate(
+                rows=Case(
+                    # Without trades.
+                    When(json_data__isnull=True, then=Value(0)),
+                    default=Cast(
+                        KT(f"json_data__files__{source_data}__rows"),
+                        models.BigIntegerField(),
+                    ),
+                    output_field=models.BigIntegerField(),
+                )
+            )
+            .values("timestamp", "frequency", "rows")
+        )
+        return get_minute_rows(timestamp, trade_data)
+
+    def can_aggregate(
+        self,
+        timestamp_from: datetime,
+        timestamp_to: datetime,
+        plan: dict | None = None,
+    ) -> bool:
+        """Can aggregate."""
+        plan = plan or self.get_plan(timestamp_from, timestamp_to)
+        coverage = plan["coverage"]
+        return all(
+            has_coverage(timestamp_from, timestamp_to, coverage.get(symbol, {}))
+            for symbol in plan["symbols"]
+        )
 
     def aggregate(
         self,
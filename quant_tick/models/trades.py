@@ -1,32 +1,52 @@
 import datetime
+from contextvars import ContextVar
+from copy import deepcopy
 from pathlib import Path
+from uuid import uuid4
 
 import pandas as pd
 from django.conf import settings
-from django.db import models
+from django.core.files.base import ContentFile
+from django.db import models, transaction
 from django.db.models import QuerySet
 from pandas import DataFrame
 
-from quant_tick.constants import FileData, Frequency
+from quant_tick.constants import ZERO, FileData, Frequency
 from quant_tick.lib import (
+    DAILY_SUMMARY,
     aggregate_candle,
     aggregate_candles,
     aggregate_trades,
+    bitmap_to_mask,
     cluster_trades,
-    filter_by_timestamp,
-    get_existing,
+    combine_candles,
+    get_coverage_existing,
+    get_daily_summary,
+    get_digest,
     get_missing,
     get_next_time,
-    has_timestamps,
+    get_statistics,
+    get_trade_data_storage,
+    has_coverage,
     is_decimal_close,
+    iter_coverage,
+    iter_timeframe,
+    mask_to_bitmap,
+    merge_segments,
+    save_behind,
+    slice_by_timestamp,
+    upload_files,
     validate_aggregated_candles,
     volume_filter_with_time_window,
 )
 from quant_tick.utils import gettext_lazy as _
 
-from .base import AbstractDataStorage, JSONField
+from .base import AbstractDataStorage, BigDecimalField, JSONField
 from .symbols import Symbol
 
+# Symbol and date of deleted trade data, recomputed once per queryset delete.
+DELETED_DATES = ContextVar("deleted_dates", default=None)
+
 
 def upload_raw_data_to(instance: "TradeData", filename: str) -> str:
     """Upload raw data to."""
@@ -85,64 +105,192 @@ class TradeDataQuerySet(QuerySet):
         self, symbol: Symbol, timestamp_from: datetime, timestamp_to: datetime
     ) -> bool:
         """Has timestamps."""
-        trade_data = (
-            TradeData.objects.filter(
-                symbol=symbol,
-                timestamp__gte=timestamp_from,
-                timestamp__lt=timestamp_to,
-            )
-            .only("timestamp", "frequency")
-            .values("timestamp", "frequency")
+        coverage = TradeDataCoverage.objects.get_coverage(
+            symbol, timestamp_from, timestamp_to
         )
-        existing = get_existing(trade_data.values("timestamp", "frequency"))
-        return has_timestamps(timestamp_from, timestamp_to, existing)
+        return has_coverage(timestamp_from, timestamp_to, coverage)
 
+    def delete(self) -> tuple[int, dict[str, int]]:
+        """Delete, recomputing coverage and daily summaries once per symbol and date."""
+        deleted_dates = set()
+        token = DELETED_DATES.set(deleted_dates)
+        try:
+            with transaction.atomic():
+                deleted = super().delete()
+                for symbol_id, date in sorted(deleted_dates):
+                    TradeDataCoverage.objects.recompute(symbol_id, date)
+                    SymbolDailySummary.objects.recompute(symbol_id, date)
+        finally:
+            DELETED_DATES.reset(token)
+        return deleted
 
-class TradeData(AbstractDataStorage):
-    """Trade data."""
 
-    symbol = models.ForeignKey(
-        "quant_tick.Symbol", related_name="trade_data", on_delete=models.CASCADE
-    )
-    timestamp = models.DateTimeField(_("timestamp"), db_index=True)
+class AbstractTradeData(AbstractDataStorage):
+    """Abstract trade data."""
+
     uid = models.CharField(_("uid"), blank=True, max_length=255)
-    frequency = models.PositiveIntegerField(
-        _("frequency"),
-        choices=[
-            c for c in Frequency.choices if c[0] not in (Frequency.DAY, Frequency.WEEK)
-        ],
-        db_index=True,
+    raw_data = models.FileField(
+        _("raw data"),
+        blank=True,
+        upload_to=upload_raw_data_to,
+        storage=get_trade_data_storage,
     )
-    raw_data = models.FileField(_("raw data"), blank=True, upload_to=upload_raw_data_to)
     aggregated_data = models.FileField(
-        _("aggregated data"), blank=True, upload_to=upload_aggregated_data_to
+        _("aggregated data"),
+        blank=True,
+        upload_to=upload_aggregated_data_to,
+        storage=get_trade_data_storage,
     )
     filtered_data = models.FileField(
-        _("filtered data"), blank=True, upload_to=upload_filtered_data_to
+        _("filtered data"),
+        blank=True,
+        upload_to=upload_filtered_data_to,
+        storage=get_trade_data_storage,
     )
     clustered_data = models.FileField(
-        _("clustered data"), blank=True, upload_to=upload_clustered_data_to
+        _("clustered data"),
+        blank=True,
+        upload_to=upload_clustered_data_to,
+        storage=get_trade_data_storage,
     )
     candle_data = models.FileField(
-        _("candle data"), blank=True, upload_to=upload_candle_data_to
+        _("candle data"),
+        blank=True,
+        upload_to=upload_candle_data_to,
+        storage=get_trade_data_storage,
     )
     json_data = JSONField(_("json data"), null=True)
     ok = models.BooleanField(_("ok"), null=True, default=False, db_index=True)
+
+    def set_data_frame(
+        self,
+        file_data: FileData,
+        data_frame: DataFrame,
+        previous: dict | None = None,
+    ) -> None:
+        """Set data frame, with statistics.
+
+        If content is unchanged from previous statistics, the saved file is kept.
+        """
+        content = self.prepare_data(data_frame)
+        digest = get_digest(content)
+        is_unchanged = (
+            previous
+            and previous.get("digest") == digest
+            and self.has_data_frame(file_data)
+        )
+        if is_unchanged:
+            self.set_statistics(file_data, previous, size=previous["size"])
+        else:
+            if self.has_data_frame(file_data):
+                self.delete_data_frame(file_data)
+            data = {**get_statistics(data_frame), "digest": digest}
+            self.set_content(file_data, content, data)
+
+    def set_content(
+        self, file_data: FileData, content: ContentFile, data: dict
+    ) -> None:
+        """Set content, with statistics."""
+        setattr(self, file_data, content)
+        if "digest" not in data:
+            data = {**data, "digest": get_digest(content)}
+        self.set_statistics(file_data, data, size=content.size)
+
+    def get_mirror_version(self, file_data: FileData) -> str | None:
+        """Get mirror version, from statistics."""
+        stats = self.get_statistics(file_data)
+        if stats:
+            return stats.get("digest")
+
+    def get_statistics(self, file_data: FileData) -> dict | None:
+        """Get statistics, for file data."""
+        if self.json_data:
+            return self.json_data.get("files", {}).get(file_data)
+
+    def set_statistics(self, file_data: FileData, data: dict, size: int) -> None:
+        """Set statistics, for file data."""
+        self.json_data = self.json_data or {}
+        self.json_data.setdefault("files", {})[file_data] = {**data, "size": size}
+
+    def is_within_statistics(
+        self,
+        file_data: FileData,
+        timestamp_from: datetime.datetime,
+        timestamp_to: datetime.datetime,
+    ) -> bool:
+        """Is within statistics?
+
+        Without statistics, file must be opened.
+        """
+        stats = self.get_statistics(file_data)
+        if stats is not None:
+            if not stats["rows"]:
+                return False
+            is_before = stats["timestamp_to"] < timestamp_from
+            is_after = stats["timestamp_from"] >= timestamp_to
+            return not (is_before or is_after)
+        return True
+
+    class Meta:
+        abstract = True
+
+
+class TradeData(AbstractTradeData):
+    """Trade data."""
+
+    symbol = models.ForeignKey(
+        "quant_tick.Symbol", related_name="trade_data", on_delete=models.CASCADE
+    )
+    timestamp = models.DateTimeField(_("timestamp"), db_index=True)
+    frequency = models.PositiveIntegerField(
+        _("frequency"),
+        choices=[c for c in Frequency.choices if c[0] != Frequency.WEEK],
+        db_index=True,
+    )
     objects = TradeDataQuerySet.as_manager()
 
+    @classmethod
+    def from_db(cls, db: str, field_names: list[str], values: list) -> "TradeData":
+        """From database, with the loaded candle, to check whether it changed."""
+        obj = super().from_db(db, field_names, values)
+        if "json_data" not in obj.get_deferred_fields():
+            obj.loaded_candle = obj.get_candle()
+        return obj
+
+    def get_candle(self) -> dict | None:
+        """Get candle, as a copy."""
+        return deepcopy((self.json_data or {}).get("candle"))
+
+    def has_candle_changed(self) -> bool:
+        """Has candle changed, since loaded from the database?"""
+        return (
+            not hasattr(self, "loaded_candle")
+            or self.loaded_candle != self.get_candle()
+        )
+
     def upload_path(self, directory: str, filename: str) -> str:
         """Upload data to.
 
         Example:
         trades / coinbase / BTCUSD / blaring-crocodile / raw / 2022-01-01 / 0000.parquet
         """
-        path = ["test-trades"] if settings.TEST else ["trades"]
-        path += self.symbol.upload_path + [directory, self.timestamp.date().isoformat()]
+        path = [self.get_upload_prefix(self.symbol)]
+        path += [directory, self.timestamp.date().isoformat()]
         fname = self.timestamp.time().strftime("%H%M")
         ext = Path(filename).suffix
         path.append(f"{fname}{ext}")
         return "/".join(path)
 
+    @staticmethod
+    def get_upload_prefix(symbol: Symbol) -> str:
+        """Get upload prefix, of symbol.
+
+        Example:
+        trades / coinbase / BTCUSD / blaring-crocodile
+        """
+        path = ["test-trades"] if settings.TEST else ["trades"]
+        return "/".join(path + symbol.upload_path)
+
     @classmethod
     def write(
         cls,
@@ -152,19 +300,61 @@ class TradeData(AbstractDataStorage):
         trades: DataFrame,
         candles: DataFrame,
     ) -> None:
-        """Write data."""
+        """Write data.
+
+        A window within hourly or daily data is written as a segment of that data. A
+        window of 1 day is written as daily data. Otherwise, a window of more than 1
+        hour is written by hour.
+        """
         delta = timestamp_to - timestamp_from
         frequency = delta.total_seconds() / 60
-        assert frequency <= Frequency.HOUR
+        assert frequency <= Frequency.DAY
         is_first_minute = timestamp_from.time().minute == 0
+        is_daily = timestamp_from.time() == datetime.time.min
         is_hourly = timestamp_from == timestamp_to - pd.Timedelta("1h")
-        if is_first_minute and is_hourly:
-            cls.write_hour(symbol, timestamp_from, timestamp_to, trades, candles)
+        parent = None
+        if frequency < Frequency.DAY:
+            parent = cls.get_parent(symbol, timestamp_from, timestamp_to)
+        if parent:
+            parent.write_segment(timestamp_from, timestamp_to, trades, candles)
+        elif is_daily and frequency == Frequency.DAY:
+            cls.write_timeframe(symbol, timestamp_from, timestamp_to, trades, candles)
+        elif frequency > Frequency.HOUR:
+            windows = list(iter_timeframe(timestamp_from, timestamp_to, value="1h"))
+            data_frames = zip(
+                windows,
+                slice_by_timestamp(trades, windows),
+                slice_by_timestamp(candles, windows),
+                strict=True,
+            )
+            for (ts_from, ts_to), hourly_trades, hourly_candles in data_frames:
+                cls.write(symbol, ts_from, ts_to, hourly_trades, hourly_candles)
+        elif is_first_minute and is_hourly:
+            cls.write_timeframe(symbol, timestamp_from, timestamp_to, trades, candles)
         else:
             cls.write_minutes(symbol, timestamp_from, timestamp_to, trades, candles)
 
     @classmethod
-    def write_hour(
+    def get_parent(
+        cls,
+        symbol: Symbol,
+        timestamp_from: datetime.datetime,
+        timestamp_to: datetime.datetime,
+    ) -> "TradeData | None":
+        """Get parent, i.e. hourly or daily data within which is the timeframe."""
+        delta = timestamp_to - timestamp_from
+        trade_data = cls.objects.filter(
+            symbol=symbol,
+            timestamp__gt=timestamp_from - pd.Timedelta("1d"),
+            timestamp__lte=timestamp_from,
+            frequency__gt=delta.total_seconds() / 60,
+        )
+        for t in trade_data:
+            if t.timestamp + pd.Timedelta(f"{t.frequency}min") >= timestamp_to:
+                return t
+
+    @classmethod
+    def write_timeframe(
         cls,
         symbol: Symbol,
         timestamp_from: datetime.datetime,
@@ -172,16 +362,30 @@ class TradeData(AbstractDataStorage):
         trades: DataFrame,
         candles: DataFrame,
     ) -> None:
-        """Write hourly data."""
+        """Write hourly or daily data.
+
+        Data of lower frequency, within the timeframe, is overwritten.
+        """
+        delta = timestamp_to - timestamp_from
         params = {
             "symbol": symbol,
             "timestamp": timestamp_from,
-            "frequency": Frequency.HOUR,
+            "frequency": int(delta.total_seconds() / 60),
         }
+        cls.objects.filter(
+            symbol=symbol,
+            timestamp__gte=timestamp_from,
+            timestamp__lt=timestamp_to,
+            frequency__lt=params["frequency"],
+        ).delete()
         try:
             obj = cls.objects.get(**params)
         except cls.DoesNotExist:
             obj = cls(**params)
+        else:
+            # Segments are superseded.
+            if obj.has_segments():
+                obj.segments.all().delete()
         finally:
             cls.write_data_frame(obj, trades, candles)
 
@@ -194,11 +398,14 @@ class TradeData(AbstractDataStorage):
         trades: DataFrame,
         candles: DataFrame,
     ) -> None:
-        """Write minute data."""
-        queryset = cls.objects.filter(
-            symbol=symbol, timestamp__gte=timestamp_from, timestamp__lt=timestamp_to
+        """Write minute data.
+
+        Trades and candles are sliced once. A single minute is saved as other data,
+        otherwise minutes are saved in bulk.
+        """
+        existing = TradeDataCoverage.objects.get_existing(
+            symbol, timestamp_from, timestamp_to
         )
-        existing = get_existing(queryset.values("timestamp", "frequency"))
         timestamps = get_missing(timestamp_from, timestamp_to, existing)
         existing = {
             obj.timestamp: obj
@@ -208,8 +415,16 @@ class TradeData(AbstractDataStorage):
                 frequency=Frequency.MINUTE,
             )
         }
-        for ts_from in timestamps:
-            ts_to = get_next_time(ts_from, "1min")
+        windows = [(ts_from, get_next_time(ts_from, "1min")) for ts_from in timestamps]
+        data_frames = zip(
+            windows,
+            slice_by_timestamp(trades, windows),
+            slice_by_timestamp(candles, windows),
+            strict=True,
+        )
+        is_bulk = len(windows) > 1
+        objs = []
+        for (ts_from, __), minute_trades, minute_candles in data_frames:
             if ts_from in existing:
                 obj = existing[ts_from]
             else:
@@ -218,49 +433,73 @@ class TradeData(AbstractDataStorage):
                     timestamp=ts_from,
                     frequency=Frequency.MINUTE,
                 )
-            cls.write_data_frame(
-                obj,
-                filter_by_timestamp(trades, ts_from, ts_to),
-                filter_by_timestamp(candles, ts_from, ts_to),
-            )
+            objs.append(obj)
+            cls.write_data_frame(obj, minute_trades, minute_candles, save=not is_bulk)
+        if is_bulk:
+            upload_files(objs)
+            with transaction.atomic():
+                cls.objects.bulk_create([obj for obj in objs if not obj.pk])
+                cls.objects.bulk_update(
+                    list(existing.values()), ["uid", "json_data", "ok", *FileData]
+                )
+                for obj in existing.values():
+                    obj.delete_replaced_files()
+                # Bulk saves do not send signals.
+                TradeDataCoverage.objects.add_many(symbol, windows)
+                if existing:
+                    for date in sorted({ts_from.date() for ts_from, __ in windows}):
+                        SymbolDailySummary.objects.recompute(symbol.pk, date)
+                else:
+                    SymbolDailySummary.objects.add_many(symbol, objs)
 
     @classmethod
     def write_data_frame(
-        cls, obj: "TradeData", trades: DataFrame, candles: DataFrame
+        cls,
+        obj: "AbstractTradeData",
+        trades: DataFrame,
+        candles: DataFrame,
+        save: bool = True,
     ) -> None:
-        """Write data frame."""
-        # Delete previously saved data.
+        """Write data frame.
+
+        Previously saved files are only rewritten if their content changed.
+        """
+        previous = {}
         if obj.pk:
-            for file_data in FileData:
-                getattr(obj, file_data).delete()
+            previous = {
+                file_data: obj.get_statistics(file_data) for file_data in FileData
+            }
+            obj.json_data = None
 
         # Set TradeData.uid as first uid.
         if len(trades):
             obj.uid = trades.iloc[0].uid
 
         # Are there any trades?
+        data_frames = {}
         aggregated_candles = pd.DataFrame([])
         if len(trades):
+            obj.json_data = {"candle": aggregate_candle(trades)}
             symbol = obj.symbol
             if symbol.save_aggregated or symbol.save_filtered or symbol.save_clustered:
                 aggregated = aggregate_trades(trades)
                 filtered = aggregated
             if symbol.save_raw:
-                obj.raw_data = cls.prepare_data(trades)
+                data_frames[FileData.RAW] = trades
             if symbol.save_aggregated:
-                obj.aggregated_data = cls.prepare_data(aggregated)
+                data_frames[FileData.AGGREGATED] = aggregated
             if symbol.save_filtered:
                 if symbol.save_filtered and symbol.significant_trade_filter:
                     filtered = volume_filter_with_time_window(
                         aggregated, min_volume=symbol.significant_trade_filter
                     )
-                    obj.filtered_data = cls.prepare_data(filtered)
+                    data_frames[FileData.FILTERED] = filtered
             if symbol.save_clustered:
                 clustered = cluster_trades(filtered)
                 assert is_decimal_close(
                     clustered.totalNotional.sum(), aggregated.notional.sum()
                 )
-                obj.clustered_data = cls.prepare_data(clustered)
+                data_frames[FileData.CLUSTERED] = clustered
 
             aggregated_candles = aggregate_candles(
                 trades,
@@ -271,19 +510,364 @@ class TradeData(AbstractDataStorage):
                 aggregated_candles.notional.sum(), trades.notional.sum()
             )
 
-            obj.json_data = {"candle": aggregate_candle(trades)}
-
         aggregated_candles, ok = validate_aggregated_candles(
             aggregated_candles,
             candles,
         )
         if len(aggregated_candles):
-            obj.candle_data = cls.prepare_data(aggregated_candles)
+            data_frames[FileData.CANDLE] = aggregated_candles
+
+        for file_data in FileData:
+            if file_data in data_frames:
+                obj.set_data_frame(
+                    file_data, data_frames[file_data], previous.get(file_data)
+                )
+            elif obj.has_data_frame(file_data):
+                obj.delete_data_frame(file_data)
         obj.ok = ok
-        obj.save()
+        if save:
+            save_behind(obj)
+
+    def has_segments(self) -> bool:
+        """Has segments?"""
+        return bool(self.json_data and self.json_data.get("segments"))
+
+    def is_within_statistics(
+        self,
+        file_data: FileData,
+        timestamp_from: datetime.datetime,
+        timestamp_to: datetime.datetime,
+    ) -> bool:
+        """Is within statistics?
+
+        With segments, file must be opened.
+        """
+        if self.has_segments():
+            return True
+        return super().is_within_statistics(file_data, timestamp_from, timestamp_to)
+
+    def get_data_frame(self, field: str) -> DataFrame | None:
+        """Get data frame, with segments in place of data within their window."""
+        data_frame = super().get_data_frame(field)
+        if self.has_segments():
+            segments = [
+                (
+                    segment.timestamp,
+                    segment.timestamp + pd.Timedelta(f"{segment.frequency}min"),
+                    segment.get_data_frame(field),
+                )
+                for segment in self.segments.all()
+            ]
+            data_frame = merge_segments(data_frame, segments)
+        return data_frame
+
+    def write_segment(
+        self,
+        timestamp_from: datetime.datetime,
+        timestamp_to: datetime.datetime,
+        trades: DataFrame,
+        candles: DataFrame,
+    ) -> None:
+        """Write segment.
+
+        Files are not rewritten, until compacted. Statistics are of files, without
+        segments, but the candle is combined from candle data of files and segments.
+        """
+        delta = timestamp_to - timestamp_from
+        segment = TradeDataSegment(
+            trade_data=self,
+            timestamp=timestamp_from,
+            frequency=int(delta.total_seconds() / 60),
+        )
+        TradeData.write_data_frame(segment, trades, candles, save=False)
+        with transaction.atomic():
+            segment.save()
+            self.json_data = {
+                **(self.json_data or {}),
+                "segments": self.segments.count(),
+            }
+            aggregated_candles = self.get_data_frame(FileData.CANDLE)
+            if aggregated_candles is not None:
+                candle = combine_candles(aggregated_candles.reset_index())
+                self.json_data["candle"] = candle
+            else:
+                self.json_data.pop("candle", None)
+            oks = [self.ok, *self.segments.values_list("ok", flat=True)]
+            if False in oks:
+                self.ok = False
+            elif all(oks):
+                self.ok = True
+            else:
+                self.ok = None
+            self.save()
+
+    def compact(self) -> None:
+        """Compact, by rewriting files with segments merged."""
+        if self.has_segments():
+            data_frames = {
+                file_data: self.get_data_frame(file_data) for file_data in FileData
+            }
+            candle = self.json_data.get("candle")
+            self.json_data = {"candle": candle} if candle else None
+            for file_data, data_frame in data_frames.items():
+                if data_frame is not None:
+                    self.set_data_frame(file_data, data_frame)
+                elif self.has_data_frame(file_data):
+                    self.delete_data_frame(file_data)
+            with transaction.atomic():
+                self.save()
+                self.segments.all().delete()
 
     class Meta:
         db_table = "quant_tick_trade_data"
         ordering = ("timestamp",)
         unique_together = (("symbol", "timestamp", "frequency"),)
         verbose_name = verbose_name_plural = _("trade data")
+
+
+class TradeDataSegment(AbstractTradeData):
+    """Trade data segment.
+
+    Immutable trade data, within a window of hourly or daily trade data, which is read
+    in place of that data until compacted.
+    """
+
+    trade_data = models.ForeignKey(
+        "quant_tick.TradeData", related_name="segments", on_delete=models.CASCADE
+    )
+    timestamp = models.DateTimeField(_("timestamp"))
+    frequency = models.PositiveIntegerField(_("frequency"))
+
+    @property
+    def symbol(self) -> Symbol:
+        """Symbol."""
+        return self.trade_data.symbol
+
+    def upload_path(self, directory: str, filename: str) -> str:
+        """Upload data to.
+
+        Segments are immutable, so each is uniquely named.
+
+        Example:
+        trades / coinbase / BTCUSD / blaring-crocodile / raw / 2022-01-01 /
+        0000-6f1d2c3b.parquet
+        """
+        path = [TradeData.get_upload_prefix(self.symbol)]
+        path += [directory, self.timestamp.date().isoformat()]
+        fname = self.timestamp.time().strftime("%H%M")
+        ext = Path(filename).suffix
+        path.append(f"{fname}-{uuid4().hex[:8]}{ext}")
+        return "/".join(path)
+
+    class Meta:
+        db_table = "quant_tick_trade_data_segment"
+        ordering = ("pk",)
+        verbose_name = _("trade data segment")
+        verbose_name_plural = _("trade data segments")
+
+
+class TradeDataCoverageQuerySet(QuerySet):
+    """Trade data coverage queryset."""
+
+    def get_coverage(
+        self,
+        symbol: Symbol,
+        timestamp_from: datetime.datetime,
+        timestamp_to: datetime.datetime,
+    ) -> dict[datetime.date, int]:
+        """Get coverage, by date."""
+        queryset = self.filter(
+            symbol=symbol,
+            date__gte=timestamp_from.date(),
+            date__lte=(timestamp_to - pd.Timedelta("1min")).date(),
+        )
+        return {coverage.date: bitmap_to_mask(coverage.bitmap) for coverage in queryset}
+
+    def get_symbol_coverage(
+        self,
+        symbols: QuerySet,
+        timestamp_from: datetime.datetime,
+        timestamp_to: datetime.datetime,
+    ) -> dict[int, dict[datetime.date, int]]:
+        """Get coverage, by symbol and date, with one query."""
+        queryset = self.filter(
+            symbol__in=symbols,
+            date__gte=timestamp_from.date(),
+            date__lte=(timestamp_to - pd.Timedelta("1min")).date(),
+        )
+        coverage = {}
+        for c in queryset:
+            coverage.setdefault(c.symbol_id, {})[c.date] = bitmap_to_mask(c.bitmap)
+        return coverage
+
+    def get_existing(
+        self,
+        symbol: Symbol,
+        timestamp_from: datetime.datetime,
+        timestamp_to: datetime.datetime,
+    ) -> list[datetime.datetime]:
+        """Get existing, with one query."""
+        coverage = self.get_coverage(symbol, timestamp_from, timestamp_to)
+        return get_coverage_existing(timestamp_from, timestamp_to, coverage)
+
+    def add(
+        self,
+        symbol: Symbol,
+        timestamp_from: datetime.datetime,
+        timestamp_to: datetime.datetime,
+    ) -> None:
+        """Add coverage."""
+        self.add_many(symbol, [(timestamp_from, timestamp_to)])
+
+    def add_many(
+        self,
+        symbol: Symbol,
+        windows: list[tuple[datetime.datetime, datetime.datetime]],
+    ) -> None:
+        """Add coverage of windows, with one update per date."""
+        masks = {}
+        for timestamp_from, timestamp_to in windows:
+            for day, mask in iter_coverage(timestamp_from, timestamp_to):
+                masks[day.date()] = masks.get(day.date(), 0) | mask
+        with transaction.atomic():
+            for date, mask in masks.items():
+                coverage, created = self.select_for_update().get_or_create(
+                    symbol=symbol,
+                    date=date,
+                    defaults={"bitmap": mask_to_bitmap(mask)},
+                )
+                if not created:
+                    mask |= bitmap_to_mask(coverage.bitmap)
+                    coverage.bitmap = mask_to_bitmap(mask)
+                    coverage.save(update_fields=["bitmap"])
+
+    def recompute(self, symbol_id: int, date: datetime.date) -> None:
+        """Recompute coverage, of date, from trade data."""
+        timestamp_from = pd.Timestamp(date, tz=datetime.timezone.utc)
+        timestamp_to = timestamp_from + pd.Timedelta("1d")
+        trade_data = TradeData.objects.filter(
+            symbol_id=symbol_id,
+            timestamp__gte=timestamp_from,
+            timestamp__lt=timestamp_to,
+        ).values("timestamp", "frequency")
+        mask = 0
+        for t in trade_data:
+            ts_to = t["timestamp"] + pd.Timedelta(f"{t['frequency']}min")
+            for __, m in iter_coverage(t["timestamp"], ts_to):
+                mask |= m
+        if mask:
+            self.update_or_create(
+                symbol_id=symbol_id,
+                date=date,
+                defaults={"bitmap": mask_to_bitmap(mask)},
+            )
+        else:
+            self.filter(symbol_id=symbol_id, date=date).delete()
+
+
+class TradeDataCoverage(models.Model):
+    """Trade data coverage.
+
+    One bitmap per symbol and date, with 1 bit per minute of existing trade data.
+    """
+
+    symbol = models.ForeignKey(
+        "quant_tick.Symbol",
+        related_name="trade_data_coverage",
+        on_delete=models.CASCADE,
+    )
+    date = models.DateField(_("date"))
+    bitmap = models.BinaryField(_("bitmap"))
+    objects = TradeDataCoverageQuerySet.as_manager()
+
+    class Meta:
+        db_table = "quant_tick_trade_data_coverage"
+        ordering = ("date",)
+        unique_together = (("symbol", "date"),)
+        verbose_name = verbose_name_plural = _("trade data coverage")
+
+
+class SymbolDailySummaryQuerySet(QuerySet):
+    """Symbol daily summary queryset."""
+
+    def add(self, trade_data: TradeData) -> None:
+        """Add trade data."""
+        self.add_many(trade_data.symbol, [trade_data])
+
+    def add_many(self, symbol: Symbol, trade_data: list[TradeData]) -> None:
+        """Add trade data, with one update per date.
+
+        Trade data is merged into existing summaries, so it must not be summarized.
+        """
+        values = {}
+        for t in trade_data:
+            values.setdefault(t.timestamp.date(), []).append(
+                {
+                    "timestamp": t.timestamp,
+                    "frequency": t.frequency,
+                    "json_data": t.json_data,
+                }
+            )
+        with transaction.atomic():
+            for date, value in values.items():
+                summary, created = self.select_for_update().get_or_create(
+                    symbol=symbol,
+                    date=date,
+                    defaults=get_daily_summary(value),
+                )
+                if not created:
+                    data = {key: getattr(summary, key) for key in DAILY_SUMMARY}
+                    for key, v in get_daily_summary(value, data).items():
+                        setattr(summary, key, v)
+                    summary.save()
+
+    def recompute(self, symbol_id: int, date: datetime.date) -> None:
+        """Recompute summary, of date, from trade data."""
+        timestamp_from = pd.Timestamp(date, tz=datetime.timezone.utc)
+        timestamp_to = timestamp_from + pd.Timedelta("1d")
+        trade_data = TradeData.objects.filter(
+            symbol_id=symbol_id,
+            timestamp__gte=timestamp_from,
+            timestamp__lt=timestamp_to,
+        ).values("timestamp", "frequency", "json_data")
+        if trade_data:
+            self.update_or_create(
+                symbol_id=symbol_id, date=date, defaults=get_daily_summary(trade_data)
+            )
+        else:
+            self.filter(symbol_id=symbol_id, date=date).delete()
+
+
+class SymbolDailySummary(models.Model):
+    """Symbol daily summary.
+
+    One summary per symbol and date, of the candles of trade data.
+    """
+
+    symbol = models.ForeignKey(
+        "quant_tick.Symbol",
+        related_name="daily_summaries",
+        on_delete=models.CASCADE,
+    )
+    date = models.DateField(_("date"))
+    minutes = models.PositiveIntegerField(_("minutes"), default=0)
+    first_timestamp = models.DateTimeField(_("first timestamp"), null=True)
+    last_timestamp = models.DateTimeField(_("last timestamp"), null=True)
+    open = BigDecimalField(_("open"), null=True)
+    high = BigDecimalField(_("high"), null=True)
+    low = BigDecimalField(_("low"), null=True)
+    close = BigDecimalField(_("close"), null=True)
+    volume = BigDecimalField(_("volume"), default=ZERO)
+    buy_volume = BigDecimalField(_("buy volume"), default=ZERO)
+    notional = BigDecimalField(_("notional"), default=ZERO)
+    buy_notional = BigDecimalField(_("buy notional"), default=ZERO)
+    ticks = models.PositiveBigIntegerField(_("ticks"), default=0)
+    buy_ticks = models.PositiveBigIntegerField(_("buy ticks"), default=0)
+    objects = SymbolDailySummaryQuerySet.as_manager()
+
+    class Meta:
+        db_table = "quant_tick_symbol_daily_summary"
+        ordering = ("date",)
+        unique_together = (("symbol", "date"),)
+        verbose_name = _("symbol daily summary")
+        verbose_name_plural = _("symbol daily summaries")
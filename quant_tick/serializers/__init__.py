@@ -1,5 +1,9 @@
 from .candles import CandleDataSerializer, CandleSerializer
-from .timeago import TimeAgoSerializer, TimeAgoWithRetrySerializer
+from .timeago import (
+    TimeAgoSerializer,
+    TimeAgoWithRetryAndFanOutSerializer,
+    TimeAgoWithRetrySerializer,
+)
 from .timeframe import TimeFrameSerializer, TimeFrameWithLimitSerializer
 
 __all__ = [
@@ -8,5 +12,6 @@ __all__ = [
     "TimeFrameSerializer",
     "TimeFrameWithLimitSerializer",
     "TimeAgoSerializer",
+    "TimeAgoWithRetryAndFanOutSerializer",
     "TimeAgoWithRetrySerializer",
 ]
@@ -34,3 +34,9 @@ class TimeAgoWithRetrySerializer(TimeAgoSerializer):
     """Time ago with retry serializer."""
 
     retry = serializers.BooleanField(required=False, default=False)
+
+
+class TimeAgoWithRetryAndFanOutSerializer(TimeAgoWithRetrySerializer):
+    """Time ago with retry and fan out serializer."""
+
+    fan_out = serializers.BooleanField(required=False, default=False)
@@ -1,3 +1,15 @@
-from .trades import post_delete_file_data
+from .trades import (
+    post_delete_coverage,
+    post_delete_daily_summary,
+    post_delete_file_data,
+    post_save_coverage,
+    post_save_daily_summary,
+)
 
-__all__ = ["post_delete_file_data"]
+__all__ = [
+    "post_delete_coverage",
+    "post_delete_daily_summary",
+    "post_delete_file_data",
+    "post_save_coverage",
+    "post_save_daily_summary",
+]
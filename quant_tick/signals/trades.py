@@ -1,15 +1,85 @@
 from uuid import uuid4
 
-from django.db.models.signals import post_delete
+import pandas as pd
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
 from quant_tick.constants import FileData
-from quant_tick.models import TradeData
+from quant_tick.lib import delete_files_on_commit
+from quant_tick.models import (
+    SymbolDailySummary,
+    TradeData,
+    TradeDataCoverage,
+    TradeDataSegment,
+)
+from quant_tick.models.trades import DELETED_DATES
+
+
+@receiver(post_save, sender=TradeData, dispatch_uid=uuid4())
+def post_save_coverage(sender: type[TradeData], **kwargs) -> None:
+    """Post save coverage."""
+    instance = kwargs["instance"]
+    TradeDataCoverage.objects.add(
+        instance.symbol,
+        instance.timestamp,
+        instance.timestamp + pd.Timedelta(f"{instance.frequency}min"),
+    )
+
+
+@receiver(post_save, sender=TradeData, dispatch_uid=uuid4())
+def post_save_daily_summary(sender: type[TradeData], **kwargs) -> None:
+    """Post save daily summary, recomputed from trade data if the candle changed."""
+    instance = kwargs["instance"]
+    if kwargs["created"]:
+        SymbolDailySummary.objects.add(instance)
+    elif instance.has_candle_changed():
+        SymbolDailySummary.objects.recompute(
+            instance.symbol_id, instance.timestamp.date()
+        )
+    instance.loaded_candle = instance.get_candle()
+
+
+@receiver(post_delete, sender=TradeData, dispatch_uid=uuid4())
+@receiver(post_delete, sender=TradeDataSegment, dispatch_uid=uuid4())
+def post_delete_file_data(
+    sender: type[TradeData] | type[TradeDataSegment], **kwargs
+) -> None:
+    """Post delete file data, batched once the transaction is committed."""
+    instance = kwargs["instance"]
+    delete_files_on_commit(
+        [
+            (file.storage, file.name)
+            for file_data in FileData
+            if (file := getattr(instance, file_data)).name
+        ]
+    )
+
+
+@receiver(post_delete, sender=TradeData, dispatch_uid=uuid4())
+def post_delete_coverage(sender: type[TradeData], **kwargs) -> None:
+    """Post delete coverage, recomputed from remaining trade data.
+
+    If deleted with a queryset, recomputed once per symbol and date.
+    """
+    instance = kwargs["instance"]
+    key = instance.symbol_id, instance.timestamp.date()
+    deleted_dates = DELETED_DATES.get()
+    if deleted_dates is not None:
+        deleted_dates.add(key)
+    else:
+        TradeDataCoverage.objects.recompute(*key)
 
 
 @receiver(post_delete, sender=TradeData, dispatch_uid=uuid4())
-def post_delete_file_data(sender: type[TradeData], **kwargs) -> None:
-    """Post delete file data."""
+def post_delete_daily_summary(sender: type[TradeData], **kwargs) -> None:
+    """Post delete daily summary, recomputed from remaining trade data.
+
+    If deleted with a queryset, recomputed once per symbol and date.
+    """
     instance = kwargs["instance"]
-    for file_data in FileData:
-        getattr(instance, file_data).delete(save=False)
+    key = instance.symbol_id, instance.timestamp.date()
+    deleted_dates = DELETED_DATES.get()
+    if deleted_dates is not None:
+        deleted_dates.add(key)
+    else:
+        SymbolDailySummary.objects.recompute(*key)
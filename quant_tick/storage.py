@@ -1,29 +1,41 @@
 import datetime
 import logging
-from pathlib import Path
+from functools import partial
 
 import pandas as pd
+from django.core.files.base import ContentFile
 from django.db import transaction
-from django.db.models import Count, QuerySet
+from django.db.models import Count, QuerySet, prefetch_related_objects
 from django.db.models.functions import TruncDate
 
 from quant_tick.constants import FileData, Frequency
 from quant_tick.lib import (
-    combine_clustered_trades,
+    ParquetStreamWriter,
+    TieredStorage,
+    combine_candles,
+    delete_files,
+    get_clean_grace_period,
+    get_current_time,
+    get_date,
     get_existing,
+    get_hot_storage_days,
     get_min_time,
     get_next_time,
+    get_statistics,
     has_timestamps,
     is_decimal_close,
+    iter_combine_clustered_trades,
+    iter_threaded,
     iter_timeframe,
+    list_files,
+    merge_statistics,
 )
-from quant_tick.models import Candle, CandleCache, Symbol, TradeData
-from quant_tick.models.trades import (
-    upload_aggregated_data_to,
-    upload_candle_data_to,
-    upload_clustered_data_to,
-    upload_filtered_data_to,
-    upload_raw_data_to,
+from quant_tick.models import (
+    Candle,
+    CandleCache,
+    Symbol,
+    TradeData,
+    TradeDataSegment,
 )
 from quant_tick.utils import gettext_lazy as _
 
@@ -131,15 +143,44 @@ def convert_trade_data_to_hourly(
                     convert_trade_data(minute_trade_data, hourly_ts_from, hourly_ts_to)
 
 
+def convert_trade_data_to_daily(
+    symbol: Symbol, timestamp_from: datetime.datetime, timestamp_to: datetime.datetime
+) -> None:
+    """Convert trade data by hour, to daily.
+
+    * Only days with 24 hours, all of which are ok, are converted.
+    """
+    queryset = TradeData.objects.filter(symbol=symbol, frequency=Frequency.HOUR)
+    trade_data = queryset.filter(
+        timestamp__gte=get_min_time(timestamp_from, value="1d"),
+        timestamp__lt=timestamp_to,
+    )
+    if trade_data.exists():
+        timestamp_from = get_min_time(trade_data.first().timestamp, value="1d")
+        last = trade_data.last()
+        timestamp_to = last.timestamp + pd.Timedelta(f"{last.frequency}min")
+        for daily_ts_from, daily_ts_to in iter_timeframe(
+            timestamp_from, timestamp_to, value="1d", reverse=True
+        ):
+            delta = daily_ts_to - daily_ts_from
+            if delta.total_seconds() / 60 == Frequency.DAY:
+                hourly_trade_data = queryset.filter(
+                    timestamp__gte=daily_ts_from, timestamp__lt=daily_ts_to
+                )
+                is_ok = not hourly_trade_data.exclude(ok=True).exists()
+                if hourly_trade_data.count() == 24 and is_ok:
+                    convert_trade_data(hourly_trade_data, daily_ts_from, daily_ts_to)
+
+
 def convert_trade_data(
     trade_data: QuerySet,
     timestamp_from: datetime.datetime,
     timestamp_to: datetime.datetime,
 ) -> None:
-    """Convert trade data."""
+    """Convert trade data, by minute to hourly, or by hour to daily."""
     delta = timestamp_to - timestamp_from
     frequency = delta.total_seconds() / 60
-    assert frequency == Frequency.HOUR
+    assert frequency in (Frequency.HOUR, Frequency.DAY)
     first = trade_data.first()
 
     new_trade_data = TradeData.objects.create(
@@ -149,64 +190,69 @@ def convert_trade_data(
         frequency=frequency,
         ok=all(trade_data.values_list("ok", flat=True)),
     )
+    candle = get_combined_candle(trade_data)
+    if candle:
+        new_trade_data.json_data = {"candle": candle}
+    objs = list(trade_data)
+    # Segments are prefetched, as files are read by thread.
+    prefetch_related_objects([t for t in objs if t.has_segments()], "segments")
     for file_data in FileData:
-        data_frames = {
-            t: t.get_data_frame(file_data)
-            for t in trade_data
-            if getattr(t, file_data).name
-        }
-
-        if len(data_frames):
-            data_frame = pd.concat(data_frames.values())
-            key = (
-                "notional"
-                if file_data in (FileData.RAW, FileData.AGGREGATED, FileData.CANDLE)
-                else "totalNotional"
+        target = [
+            t
+            for t in objs
+            if t.has_segments()
+            or (
+                getattr(t, file_data).name
+                # Without opening empty files.
+                and (t.get_statistics(file_data) or {}).get("rows") != 0
+            )
+        ]
+        if len(target):
+            # Read files concurrently, in order, and stream them as row groups.
+            get_data_frame = partial(TradeData.get_data_frame, field=file_data)
+            data_frames = (
+                data_frame
+                for data_frame in iter_threaded(get_data_frame, target)
+                # Segments may be without file data.
+                if data_frame is not None
             )
-            expected = sum([getattr(df, key).sum() for df in data_frames.values()])
-            actual = data_frame[key].sum()
-            assert is_decimal_close(expected, actual)
-
             if file_data == FileData.CLUSTERED:
-                data_frame = combine_clustered_trades(data_frame)
+                data_frames = iter_combine_clustered_trades(data_frames)
+            writer = ParquetStreamWriter()
+            statistics = []
+            for data_frame in data_frames:
+                writer.write(data_frame)
+                statistics.append(get_statistics(data_frame))
+            content = writer.close()
+            data = merge_statistics(statistics)
+
+            # Validate with statistics, if all files have statistics, without segments.
+            stats = [t.get_statistics(file_data) for t in target]
+            has_segments = any(t.has_segments() for t in target)
+            if all(stats) and not has_segments and "notional" in data:
+                expected = sum([s["notional"] for s in stats])
+                assert is_decimal_close(expected, data["notional"])
+
+            if data["rows"]:
+                new_trade_data.set_content(
+                    file_data, ContentFile(content, "data.parquet"), data
+                )
 
-            # First, delete minutes, as naming convention is same as hourly or daily.
-            for t in trade_data:
-                getattr(t, file_data).delete()
+    # First, delete files, as naming convention is same as hourly or daily.
+    delete_files(
+        [
+            (file.storage, file.name)
+            for t in trade_data
+            for file_data in FileData
+            if (file := getattr(t, file_data)).name
+        ]
+    )
+    trade_data.update(**{file_data: "" for file_data in FileData})
 
-            # Next, create hourly or daily.
-            if file_data != FileData.CANDLE:
-                data_frame.reset_index(inplace=True)
+    # Next, create hourly or daily.
+    new_trade_data.save()
 
-            if len(data_frame):
-                setattr(
-                    new_trade_data,
-                    file_data,
-                    TradeData.prepare_data(data_frame),
-                )
-                if not new_trade_data.json_data:
-                    candles = pd.DataFrame(
-                        [t.json_data["candle"] for t in trade_data if t.json_data]
-                    )
-                    first_row = candles.iloc[0]
-                    last_row = candles.iloc[-1]
-                    candle = {
-                        "timestamp": first_row.timestamp,
-                        "open": first_row.open,
-                        "high": candles.high.max(),
-                        "low": candles.low.min(),
-                        "close": last_row.close,
-                        "volume": candles.volume.sum(),
-                        "buyVolume": candles.buyVolume.sum(),
-                        "notional": candles.notional.sum(),
-                        "buyNotional": candles.buyNotional.sum(),
-                        "ticks": candles.ticks.sum(),
-                        "buyTicks": candles.buyTicks.sum(),
-                    }
-                    new_trade_data.json_data = {"candle": candle}
-                new_trade_data.save()
-
-    # Completely delete minutes.
+    # Completely delete minutes or hours.
     trade_data.delete()
 
     logging.info(
@@ -214,126 +260,115 @@ def convert_trade_data(
             **{
                 "timestamp_from": timestamp_from,
                 "timestamp_to": timestamp_to,
-                "frequency": "hourly",
+                "frequency": "hourly" if frequency == Frequency.HOUR else "daily",
             }
         )
     )
 
 
-def clean_trade_data_with_non_existing_files(
+def compact_trade_data(
     symbol: Symbol, timestamp_from: datetime.datetime, timestamp_to: datetime.datetime
 ) -> None:
-    """Clean trade data with non-existing files."""
-    logging.info(_("Checking objects with non existent files"))
-
-    mapping = dict(
-        zip(
-            FileData,
-            [
-                "save_raw",
-                "save_aggregated",
-                "save_filtered",
-                "save_clustered",
-                "save_candles",
-            ],
-            strict=True,
-        )
-    )
-
-    trade_data = (
-        TradeData.objects.filter(symbol=symbol)
-        .exclude(file_data="")
-        .filter(
-            timestamp__gte=timestamp_from,
-            timestamp__lte=timestamp_to,
-        )
-        .only(*list(mapping.keys()) + list(mapping.values()))
+    """Compact trade data, by merging segments into files of hourly or daily data."""
+    trade_data = TradeData.objects.filter(
+        symbol=symbol,
+        timestamp__gte=get_min_time(timestamp_from, value="1d"),
+        timestamp__lt=timestamp_to,
+        segments__isnull=False,
+    ).distinct()
+    total = 0
+    for t in trade_data:
+        t.compact()
+        total += 1
+    logging.info(_("Compacted {total} objects").format(**{"total": total}))
+
+
+def get_combined_candle(trade_data: QuerySet) -> dict | None:
+    """Get combined candle, from trade data by minute or hour."""
+    candles = pd.DataFrame(
+        [
+            t.json_data["candle"]
+            for t in trade_data
+            if t.json_data and "candle" in t.json_data
+        ]
     )
-    count = 0
-    deleted = 0
-    total = trade_data.count()
-    for obj in trade_data:
-        count += 1
-        for file_data, attr in mapping.items():
-            if getattr(obj, attr):
-                name = getattr(obj, file_data).name
-                if not obj.file_data.storage.exists(name):
-                    obj.delete()
-                    break
-                    deleted += 1
-
-        logging.info(
-            _("Checked {count}/{total} objects").format(
-                **{"count": count, "total": total}
-            )
-        )
-
-    logging.info(_("Deleted {deleted} objects").format(**{"deleted": deleted}))
+    if len(candles):
+        return combine_candles(candles)
 
 
-def clean_unlinked_trade_data_files(
+def migrate_trade_data_to_cold_storage(
     symbol: Symbol, timestamp_from: datetime.datetime, timestamp_to: datetime.datetime
 ) -> None:
-    """Clean unlinked trade data files."""
-    logging.info(_("Checking unlinked trade data files"))
-
-    mapping = dict(
-        zip(
-            FileData,
-            [
-                upload_raw_data_to,
-                upload_aggregated_data_to,
-                upload_filtered_data_to,
-                upload_clustered_data_to,
-                upload_candle_data_to,
-            ],
-            strict=True,
-        )
+    """Migrate trade data files, older than hot storage days, to cold storage."""
+    hot_timestamp_from = get_min_time(
+        get_current_time() - pd.Timedelta(f"{get_hot_storage_days()}d"), value="1d"
     )
+    trade_data = TradeData.objects.filter(
+        symbol=symbol,
+        timestamp__gte=timestamp_from,
+        timestamp__lt=min(timestamp_to, hot_timestamp_from),
+    ).only("timestamp", *FileData)
+    files = []
+    for t in trade_data:
+        for file_data in FileData:
+            data = getattr(t, file_data)
+            if data.name and isinstance(data.storage, TieredStorage):
+                files.append(data)
+    migrated = sum(iter_threaded(lambda data: data.storage.migrate(data.name), files))
+    logging.info(_("Migrated {migrated} files").format(**{"migrated": migrated}))
+
+
+def clean_trade_data(
+    symbol: Symbol, timestamp_from: datetime.datetime, timestamp_to: datetime.datetime
+) -> None:
+    """Clean trade data, by reconciling database and storage, for whole days.
 
-    deleted = 0
-    trade_data = (
-        TradeData.objects.filter(symbol=symbol).exclude(file_data="").only(*FileData)
+    * Storage is listed once, by symbol prefix.
+    * Trade data with non-existing files, or segments thereof, is deleted.
+    * Files without trade data are deleted, unless modified within the grace period, as
+      they may be uploads in flight.
+    """
+    timestamp_from = get_min_time(timestamp_from, value="1d")
+    timestamp_to = get_next_time(timestamp_to, value="1d")
+    storage = TradeData._meta.get_field(FileData.RAW).storage
+    existing = list_files(storage, TradeData.get_upload_prefix(symbol))
+
+    trade_data = TradeData.objects.filter(
+        symbol=symbol, timestamp__gte=timestamp_from, timestamp__lt=timestamp_to
+    ).only("timestamp", *FileData)
+    # Segments are within trade data, so are deleted with it.
+    segments = TradeDataSegment.objects.filter(trade_data__in=trade_data).only(
+        "trade_data", *FileData
     )
-    t = trade_data.filter(
-        timestamp__gte=timestamp_from,
-        timestamp__lte=timestamp_to,
+    expected = set()
+    non_existing = []
+    for t in [*trade_data, *segments]:
+        names = {
+            file.name for file_data in FileData if (file := getattr(t, file_data)).name
+        }
+        expected |= names
+        if not names <= existing.keys():
+            non_existing.append(getattr(t, "trade_data_id", t.pk))
+
+    modified_before = get_current_time() - get_clean_grace_period()
+    unlinked = [
+        name
+        for name, modified in existing.items()
+        if name not in expected
+        and modified < modified_before
+        and (date := get_date(name))
+        and timestamp_from.date() <= date < timestamp_to.date()
+    ]
+
+    with transaction.atomic():
+        deleted, __ = TradeData.objects.filter(pk__in=non_existing).delete()
+    logging.info(
+        _("Deleted {deleted} objects with non-existing files").format(
+            **{"deleted": deleted}
+        )
     )
-    if t.exists():
-        min_timestamp_from = t.first().timestamp
-        if timestamp_from < min_timestamp_from:
-            timestamp_from = min_timestamp_from
-        max_timestamp_to = t.last().timestamp
-        if timestamp_to > max_timestamp_to:
-            timestamp_to = max_timestamp_to
-        for daily_timestamp_from, daily_timestamp_to in iter_timeframe(
-            timestamp_from, timestamp_to, value="1d"
-        ):
-            for file_data, upload_to in mapping.items():
-                expected_files = [
-                    Path(getattr(obj, file_data).name).name
-                    for obj in trade_data.filter(
-                        timestamp__gte=daily_timestamp_from,
-                        timestamp__lte=daily_timestamp_to,
-                    )
-                ]
-
-                dummy = TradeData(symbol=symbol, timestamp=daily_timestamp_from)
-                storage = getattr(dummy, file_data).storage
-                directory = Path(upload_to(dummy, "dummy.parquet")).stem
-                __, filenames = storage.listdir(directory)
-
-                should_delete = [
-                    filename for filename in filenames if filename not in expected_files
-                ]
-                for filename in should_delete:
-                    storage.delete(Path(directory) / filename)
-                    deleted += 1
-
-            logging.info(
-                _("Checked {date}").format(**{"date": daily_timestamp_from.date()})
-            )
 
-        logging.info(
-            _("Deleted {deleted} unlinked files").format(**{"deleted": deleted})
-        )
+    delete_files([(storage, name) for name in unlinked])
+    logging.info(
+        _("Deleted {deleted} unlinked files").format(**{"deleted": len(unlinked)})
+    )
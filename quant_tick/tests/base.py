@@ -1,4 +1,5 @@
 import random
+from contextlib import nullcontext
 from datetime import datetime, timezone
 from decimal import Decimal
 from pathlib import Path
@@ -6,6 +7,7 @@ from uuid import uuid4
 
 import pandas as pd
 from django.core.files.storage import default_storage
+from django.test import TestCase
 from pandas import DataFrame
 
 from quant_tick.constants import Exchange
@@ -16,6 +18,7 @@ from quant_tick.lib import (
     get_min_time,
     volume_filter_with_time_window,
 )
+from quant_tick.lib.delete import flush_deletes
 from quant_tick.models import GlobalSymbol, Symbol, TradeData
 
 
@@ -190,9 +193,16 @@ class BaseWriteTradeDataTest(BaseRandomTradeTest, BaseSymbolTest):
         return cluster_trades(data_frame)
 
     def tearDown(self):
-        # Files
-        for obj in TradeData.objects.all():
-            obj.delete()
+        # Files, deleted once the transaction is committed.
+        flush_deletes()
+        if isinstance(self, TestCase):
+            context = self.captureOnCommitCallbacks(execute=True)
+        else:
+            # Without a test case transaction, deleted immediately.
+            context = nullcontext()
+        with context:
+            for obj in TradeData.objects.all():
+                obj.delete()
         # Directories
         test_path = Path("test-trades")
         for obj in Symbol.objects.all():
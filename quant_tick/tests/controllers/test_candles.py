@@ -1,19 +1,28 @@
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timezone
 from decimal import Decimal
 from unittest.mock import patch
 
 import pandas as pd
 import time_machine
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
 from pandas import DataFrame
 
 from quant_tick.constants import FileData, Frequency, SampleType
-from quant_tick.controllers import CandleCacheIterator, aggregate_candles
+from quant_tick.controllers import (
+    CandleCacheIterator,
+    aggregate_candle_groups,
+    aggregate_candles,
+)
 from quant_tick.lib import (
     aggregate_candle,
+    filter_by_timestamp,
     get_current_time,
     get_min_time,
     get_next_cache,
+    iter_timeframe,
+    map_processes,
 )
 from quant_tick.models import (
     AdaptiveCandle,
@@ -24,6 +33,7 @@ from quant_tick.models import (
     TimeBasedCandle,
     TradeData,
 )
+from quant_tick.storage import convert_trade_data_to_daily
 
 from ..base import BaseSymbolTest, BaseWriteTradeDataTest
 
@@ -191,6 +201,50 @@ class CandleCacheIteratorTest(BaseCandleCacheIteratorTest, TestCase):
         self.assertEqual(values[0][0], self.timestamp_from)
         self.assertEqual(values[0][1], self.timestamp_to - self.one_minute)
 
+    def test_iter_days_with_one_query_per_table(self, mock_get_max_timestamp_to):
+        """Iter days, over a year, with one query per table."""
+        timestamp_to = self.timestamp_from + pd.Timedelta("365d")
+        iterator = CandleCacheIterator(self.candle)
+        # Symbols, coverage, and candle cache.
+        with self.assertNumQueries(3):
+            values = list(iterator.iter_days(self.timestamp_from, timestamp_to))
+        self.assertEqual(values, [])
+
+    def test_iter_days_with_constant_candle(self, mock_get_max_timestamp_to):
+        """Iter days, with constant candle, planned from last cache."""
+        candle = ConstantCandle.objects.create(
+            json_data={"source_data": FileData.RAW, "sample_type": SampleType.NOTIONAL}
+        )
+        candle.symbols.add(self.symbol)
+        for day in range(3):
+            TradeData.objects.create(
+                symbol=self.symbol,
+                timestamp=self.timestamp_from + pd.Timedelta(f"{day}d"),
+                frequency=Frequency.DAY,
+            )
+        CandleCache.objects.create(
+            candle=candle, timestamp=self.timestamp_from, frequency=Frequency.DAY
+        )
+        one_day = self.timestamp_from + pd.Timedelta("1d")
+        two_days = self.timestamp_from + pd.Timedelta("2d")
+        timestamp_to = self.timestamp_from + pd.Timedelta("3d")
+        iterator = CandleCacheIterator(candle)
+        # Symbols, coverage, last cache, cache, and candle cache.
+        with self.assertNumQueries(5):
+            values = [
+                (ts_from, ts_to)
+                for ts_from, ts_to, _ in iterator.iter_days(
+                    self.timestamp_from, timestamp_to
+                )
+            ]
+        self.assertEqual(
+            values,
+            [
+                (one_day, two_days),
+                (two_days, timestamp_to),
+            ],
+        )
+
 
 @time_machine.travel(datetime(2009, 1, 4), tick=False)
 class CandleTest(BaseDayIteratorTest, TestCase):
@@ -646,6 +700,179 @@ class TimeBasedTwoHourFrequencyCandleTest(
         del candle["timestamp"]
         self.assertEqual(candle_data.json_data, candle)
 
+    def test_iter_all_by_day(self, mock_get_max_timestamp_to):
+        """Iter all by day, if candle window is more than 1 hour."""
+        self.timestamp_to = self.timestamp_from + pd.Timedelta("2d")
+        for ts_from, ts_to in iter_timeframe(
+            self.timestamp_from, self.timestamp_to, value="1d"
+        ):
+            self.write_trade_data(ts_from, ts_to, self.get_filtered(ts_from))
+        one_day_from_now = self.timestamp_from + pd.Timedelta("1d")
+        self.assertEqual(
+            self.get_values(),
+            [
+                (self.timestamp_from, one_day_from_now),
+                (one_day_from_now, self.timestamp_to),
+            ],
+        )
+
+    def test_candles_aggregated_by_day(self, mock_get_max_timestamp_to):
+        """Candles aggregated by day, with the partial window carried in cache."""
+        self.candle.json_data["window"] = "5h"
+        self.candle.save()
+        self.timestamp_to = self.timestamp_from + pd.Timedelta("2d")
+        data_frames = []
+        for hour in range(48):
+            ts_from = self.timestamp_from + pd.Timedelta(f"{hour}h")
+            if hour % 3 == 0:
+                data_frame = self.get_filtered(ts_from)
+                data_frames.append(data_frame)
+            else:
+                data_frame = pd.DataFrame([])
+            self.write_trade_data(ts_from, ts_from + pd.Timedelta("1h"), data_frame)
+        aggregate_candles(self.candle, self.timestamp_from, self.timestamp_to)
+        df = pd.concat(data_frames)
+        five_hours = pd.Timedelta("5h")
+        candle_data = CandleData.objects.all()
+        self.assertEqual(candle_data.count(), 9)
+        for index, c in enumerate(candle_data):
+            ts_from = self.timestamp_from + five_hours * index
+            ts_to = ts_from + five_hours
+            candle = aggregate_candle(filter_by_timestamp(df, ts_from, ts_to))
+            del candle["timestamp"]
+            self.assertEqual(c.timestamp, ts_from)
+            self.assertEqual(c.json_data, candle)
+
+    def test_candles_aggregated_by_day_shards(self, mock_get_max_timestamp_to):
+        """Candles aggregated by day shards, as the window divides a day evenly."""
+        self.timestamp_to = self.timestamp_from + pd.Timedelta("2d")
+        data_frames = []
+        for hour in range(48):
+            ts_from = self.timestamp_from + pd.Timedelta(f"{hour}h")
+            if hour % 3 == 0:
+                data_frame = self.get_filtered(ts_from)
+                data_frames.append(data_frame)
+            else:
+                data_frame = pd.DataFrame([])
+            self.write_trade_data(ts_from, ts_from + pd.Timedelta("1h"), data_frame)
+        with patch(
+            "quant_tick.controllers.iterators.map_processes",
+            side_effect=map_processes,
+        ) as mock_map_processes:
+            aggregate_candles(self.candle, self.timestamp_from, self.timestamp_to)
+        one_day_from_now = self.timestamp_from + pd.Timedelta("1d")
+        args = mock_map_processes.call_args.args
+        self.assertEqual(args[2], [self.timestamp_from, one_day_from_now])
+        self.assertEqual(args[3], [one_day_from_now, self.timestamp_to])
+        self.assertEqual(args[4][1:], [None])
+        df = pd.concat(data_frames)
+        candle_data = CandleData.objects.all()
+        self.assertEqual(candle_data.count(), 16)
+        for c in candle_data:
+            ts_to = c.timestamp + pd.Timedelta("2h")
+            candle = aggregate_candle(filter_by_timestamp(df, c.timestamp, ts_to))
+            del candle["timestamp"]
+            self.assertEqual(c.json_data, candle)
+
+    def test_candles_aggregated_without_day_shards_if_not_aligned(
+        self, mock_get_max_timestamp_to
+    ):
+        """Candles aggregated without day shards, as windows are not aligned."""
+        self.candle.json_data["window"] = "4h"
+        self.candle.save()
+        self.timestamp_to = self.timestamp_from + pd.Timedelta("2d")
+        data_frames = []
+        for hour in range(48):
+            ts_from = self.timestamp_from + pd.Timedelta(f"{hour}h")
+            if hour % 3 == 0:
+                data_frame = self.get_filtered(ts_from)
+                data_frames.append(data_frame)
+            else:
+                data_frame = pd.DataFrame([])
+            self.write_trade_data(ts_from, ts_from + pd.Timedelta("1h"), data_frame)
+        timestamp_from = self.timestamp_from + pd.Timedelta("1h")
+        with patch(
+            "quant_tick.controllers.iterators.map_processes",
+            side_effect=map_processes,
+        ) as mock_map_processes:
+            aggregate_candles(self.candle, timestamp_from, self.timestamp_to)
+        args = mock_map_processes.call_args.args
+        self.assertEqual(args[2], [timestamp_from])
+        df = pd.concat(data_frames)
+        four_hours = pd.Timedelta("4h")
+        candle_data = CandleData.objects.all()
+        self.assertEqual(candle_data.count(), 11)
+        for index, c in enumerate(candle_data):
+            ts_from = timestamp_from + four_hours * index
+            candle = aggregate_candle(
+                filter_by_timestamp(df, ts_from, ts_from + four_hours)
+            )
+            del candle["timestamp"]
+            self.assertEqual(c.timestamp, ts_from)
+            self.assertEqual(c.json_data, candle)
+
+
+@time_machine.travel(datetime(2009, 1, 4), tick=False)
+@patch(
+    "quant_tick.controllers.iterators.CandleCacheIterator.get_max_timestamp_to",
+    return_value=datetime(2009, 1, 4, 3).replace(tzinfo=timezone.utc),
+)
+class TimeBasedCandleProcessesTest(
+    BaseHourIteratorTest,
+    BaseWriteTradeDataTest,
+    BaseCandleCacheIteratorTest,
+    TransactionTestCase,
+):
+    """Time based candle processes test.
+
+    Data is committed, so that it is visible to forked processes.
+    """
+
+    def setUp(self):
+        if connection.vendor == "sqlite" and connection.creation.is_in_memory_db(
+            connection.settings_dict["NAME"]
+        ):
+            self.skipTest("Processes don't share an in memory database.")
+        super().setUp()
+
+    def get_candle(self) -> Candle:
+        """Get candle."""
+        return TimeBasedCandle.objects.create(
+            json_data={"source_data": FileData.RAW, "window": "2h"}
+        )
+
+    def test_candles_aggregated_by_processes(self, mock_get_max_timestamp_to):
+        """Candles aggregated by day shards, with a process for each."""
+        self.timestamp_to = self.timestamp_from + pd.Timedelta("2d")
+        data_frames = []
+        for hour in range(0, 48, 3):
+            ts_from = self.timestamp_from + pd.Timedelta(f"{hour}h")
+            data_frame = self.get_filtered(ts_from)
+            data_frames.append(data_frame)
+            TradeData.write(
+                self.symbol,
+                ts_from,
+                ts_from + pd.Timedelta("3h"),
+                data_frame,
+                pd.DataFrame([]),
+            )
+        with patch(
+            "quant_tick.lib.executor.ProcessPoolExecutor",
+            side_effect=ProcessPoolExecutor,
+        ) as mock_executor:
+            aggregate_candles(
+                self.candle, self.timestamp_from, self.timestamp_to, max_processes=2
+            )
+        mock_executor.assert_called_once()
+        df = pd.concat(data_frames)
+        candle_data = CandleData.objects.all()
+        self.assertEqual(candle_data.count(), 16)
+        for c in candle_data:
+            ts_to = c.timestamp + pd.Timedelta("2h")
+            candle = aggregate_candle(filter_by_timestamp(df, c.timestamp, ts_to))
+            del candle["timestamp"]
+            self.assertEqual(c.json_data, candle)
+
 
 @time_machine.travel(datetime(2009, 1, 4), tick=False)
 @patch(
@@ -891,6 +1118,50 @@ class ConstantNotionalDayFrequencyIrregularCandleTest(
         candle_cache = CandleCache.objects.last()
         self.assertNotIn("next", candle_cache.json_data)
 
+    def test_incomplete_candles_aggregated_by_day_shards(
+        self, mock_get_max_timestamp_to
+    ):
+        """Incomplete candles by day shards, in any order, as the cache resets."""
+        one_day_ago = self.timestamp_from - pd.Timedelta("1d")
+        # Last cache is not required, as the cache resets.
+        two_days_ago = one_day_ago - pd.Timedelta("1d")
+        CandleCache.objects.create(
+            candle=self.candle,
+            timestamp=two_days_ago,
+            frequency=Frequency.MINUTE,
+            json_data=self.candle.get_initial_cache(two_days_ago),
+        )
+        last_hours = []
+        for ts_from, ts_to in (
+            (one_day_ago, self.timestamp_from),
+            (self.timestamp_from, self.one_day_from_now),
+        ):
+            last_hour = ts_to - pd.Timedelta("1h")
+            self.write_trade_data(ts_from, last_hour, pd.DataFrame([]))
+            filtered = self.get_filtered(last_hour, notional=Decimal("0.5"))
+            self.write_trade_data(last_hour, ts_to, filtered)
+            last_hours.append(last_hour)
+
+        def map_reversed(func, *iterables, **kwargs):
+            return map_processes(
+                func, *[values[::-1] for values in iterables], **kwargs
+            )
+
+        with patch(
+            "quant_tick.controllers.iterators.map_processes",
+            side_effect=map_reversed,
+        ):
+            aggregate_candles(self.candle, one_day_ago, self.one_day_from_now)
+        candle_data = CandleData.objects.all()
+        self.assertEqual([c.timestamp for c in candle_data], last_hours)
+        self.assertTrue(all(c.json_data["incomplete"] for c in candle_data))
+        candle_cache = CandleCache.objects.filter(timestamp__gte=one_day_ago)
+        self.assertEqual(candle_cache.first().timestamp, one_day_ago)
+        for c, next_c in zip(candle_cache, candle_cache[1:], strict=False):
+            self.assertEqual(
+                c.timestamp + pd.Timedelta(f"{c.frequency}min"), next_c.timestamp
+            )
+
 
 @time_machine.travel(datetime(2009, 1, 4), tick=False)
 @patch(
@@ -1061,3 +1332,170 @@ class AdaptiveNotionalCandleTest(
         self.assertEqual(candle_data.count(), 2)
         self.assertEqual(candle_data[0].timestamp, self.timestamp_from)
         self.assertEqual(candle_data[1].timestamp, self.two_hours_from_now)
+
+
+@time_machine.travel(datetime(2009, 1, 4), tick=False)
+@patch(
+    "quant_tick.controllers.iterators.CandleCacheIterator.get_max_timestamp_to",
+    return_value=datetime(2009, 1, 4, 3).replace(tzinfo=timezone.utc),
+)
+class FanOutCandleTest(
+    BaseHourIteratorTest, BaseWriteTradeDataTest, BaseCandleCacheIteratorTest, TestCase
+):
+    """Fan out candle test."""
+
+    def get_candle(self) -> Candle:
+        """Get candle."""
+        return TimeBasedCandle.objects.create(
+            json_data={"source_data": FileData.RAW, "window": "1h"}
+        )
+
+    def test_candles_with_same_symbols_read_daily_trade_data_once(
+        self, mock_get_max_timestamp_to
+    ):
+        """Candles with the same symbols read daily trade data once."""
+        constant_candle = ConstantCandle.objects.create(
+            json_data={
+                "source_data": FileData.RAW,
+                "sample_type": SampleType.NOTIONAL,
+                "target_value": 1,
+            }
+        )
+        constant_candle.symbols.add(self.symbol)
+        for hour in range(24):
+            ts_from = self.timestamp_from + pd.Timedelta(f"{hour}h")
+            TradeData.write(
+                self.symbol,
+                ts_from,
+                ts_from + pd.Timedelta("1h"),
+                self.get_filtered(ts_from, notional=1),
+                pd.DataFrame([]),
+            )
+        TradeData.objects.update(ok=True)
+        one_day_from_now = self.timestamp_from + pd.Timedelta("1d")
+        convert_trade_data_to_daily(self.symbol, self.timestamp_from, one_day_from_now)
+        with patch.object(
+            Candle, "get_data_frame", autospec=True, side_effect=Candle.get_data_frame
+        ) as mock_get_data_frame:
+            aggregate_candle_groups(
+                [self.candle, constant_candle],
+                self.timestamp_from,
+                self.two_hours_from_now,
+            )
+        self.assertEqual(mock_get_data_frame.call_count, 1)
+        for candle in (self.candle, constant_candle):
+            candle_data = CandleData.objects.filter(candle=candle)
+            self.assertEqual(candle_data.count(), 2)
+            self.assertEqual(candle_data[0].timestamp, self.timestamp_from)
+            self.assertEqual(candle_data[1].timestamp, self.one_hour_from_now)
+
+    def test_candles_with_same_symbols_without_daily_trade_data(
+        self, mock_get_max_timestamp_to
+    ):
+        """Candles with the same symbols, without daily trade data, read by window."""
+        other_candle = TimeBasedCandle.objects.create(
+            json_data={"source_data": FileData.RAW, "window": "2h"}
+        )
+        other_candle.symbols.add(self.symbol)
+        for ts_from, ts_to in (
+            (self.timestamp_from, self.one_hour_from_now),
+            (self.one_hour_from_now, self.two_hours_from_now),
+        ):
+            TradeData.write(
+                self.symbol,
+                ts_from,
+                ts_to,
+                self.get_filtered(ts_from, notional=1),
+                pd.DataFrame([]),
+            )
+        with patch.object(
+            Candle, "get_data_frame", autospec=True, side_effect=Candle.get_data_frame
+        ) as mock_get_data_frame:
+            aggregate_candle_groups(
+                [self.candle, other_candle],
+                self.timestamp_from,
+                self.two_hours_from_now,
+            )
+        for call in mock_get_data_frame.call_args_list:
+            __, timestamp_from, timestamp_to = call.args
+            self.assertLess(timestamp_from, self.two_hours_from_now)
+            self.assertGreater(timestamp_to, self.timestamp_from)
+            self.assertLessEqual(timestamp_to - timestamp_from, pd.Timedelta("2h"))
+        self.assertEqual(CandleData.objects.filter(candle=self.candle).count(), 2)
+        self.assertEqual(CandleData.objects.filter(candle=other_candle).count(), 1)
+
+    def test_candles_with_same_shards_aggregated_by_shard(
+        self, mock_get_max_timestamp_to
+    ):
+        """Candles with the same shards are aggregated by shard, with max processes."""
+        other_candle = TimeBasedCandle.objects.create(
+            json_data={"source_data": FileData.RAW, "window": "2h"}
+        )
+        other_candle.symbols.add(self.symbol)
+        timestamp_to = self.timestamp_from + pd.Timedelta("2d")
+        for hour in range(48):
+            ts_from = self.timestamp_from + pd.Timedelta(f"{hour}h")
+            TradeData.write(
+                self.symbol,
+                ts_from,
+                ts_from + pd.Timedelta("1h"),
+                self.get_filtered(ts_from, notional=1),
+                pd.DataFrame([]),
+            )
+        with patch(
+            "quant_tick.controllers.iterators.map_processes",
+            side_effect=map_processes,
+        ) as mock_map_processes:
+            aggregate_candle_groups(
+                [self.candle, other_candle],
+                self.timestamp_from,
+                timestamp_to,
+                max_processes=2,
+            )
+        mock_map_processes.assert_called_once()
+        shards = mock_map_processes.call_args.args[1]
+        self.assertEqual(len(shards), 2)
+        self.assertEqual(mock_map_processes.call_args.kwargs["max_processes"], 2)
+        candle_data = CandleData.objects.filter(candle=other_candle)
+        self.assertEqual(
+            [c.timestamp for c in candle_data],
+            [
+                self.timestamp_from + pd.Timedelta(f"{hour}h")
+                for hour in range(0, 48, 2)
+            ],
+        )
+
+    def test_candle_with_daily_trade_data_reads_trade_data_once(
+        self, mock_get_max_timestamp_to
+    ):
+        """Candle with daily trade data reads trade data once."""
+        for hour in range(24):
+            ts_from = self.timestamp_from + pd.Timedelta(f"{hour}h")
+            TradeData.write(
+                self.symbol,
+                ts_from,
+                ts_from + pd.Timedelta("1h"),
+                self.get_filtered(ts_from, notional=1),
+                pd.DataFrame([]),
+            )
+        TradeData.objects.update(ok=True)
+        one_day_from_now = self.timestamp_from + pd.Timedelta("1d")
+        convert_trade_data_to_daily(self.symbol, self.timestamp_from, one_day_from_now)
+        self.assertTrue(self.candle.has_daily_trade_data(self.timestamp_from))
+        with patch.object(
+            Candle, "get_data_frame", autospec=True, side_effect=Candle.get_data_frame
+        ) as mock_get_data_frame:
+            with patch.object(
+                Candle,
+                "has_daily_trade_data",
+                autospec=True,
+                side_effect=Candle.has_daily_trade_data,
+            ) as mock_has_daily_trade_data:
+                aggregate_candles(
+                    self.candle, self.timestamp_from, self.three_hours_from_now
+                )
+        self.assertEqual(mock_get_data_frame.call_count, 1)
+        self.assertEqual(mock_has_daily_trade_data.call_count, 1)
+        candle_data = CandleData.objects.all()
+        self.assertEqual(candle_data.count(), 3)
+        self.assertEqual(candle_data[2].timestamp, self.two_hours_from_now)
@@ -12,6 +12,9 @@ from quant_tick.lib import (
     combine_clustered_trades,
     get_current_time,
     get_min_time,
+    iter_combine_clustered_trades,
+    merge_segments,
+    slice_by_timestamp,
     volume_filter_with_time_window,
 )
 
@@ -99,6 +102,44 @@ class TradeAggregatorTest(BaseRandomTradeTest, SimpleTestCase):
         self.assertEqual(len(data), 2)
 
 
+class SliceByTimestampTest(BaseRandomTradeTest, SimpleTestCase):
+    def setUp(self):
+        self.timestamp_from = get_min_time(get_current_time(), "1d")
+        self.windows = [
+            (
+                self.timestamp_from + pd.Timedelta(f"{minute}min"),
+                self.timestamp_from + pd.Timedelta(f"{minute + 1}min"),
+            )
+            for minute in range(3)
+        ]
+        self.data_frame = pd.DataFrame(
+            [
+                self.get_random_trade(
+                    timestamp=self.timestamp_from + pd.Timedelta(f"{seconds}s")
+                )
+                for seconds in (0, 30, 120)
+            ]
+        )
+
+    def test_slice_by_timestamp(self):
+        """Slice by timestamp, for each window."""
+        data_frames = slice_by_timestamp(self.data_frame, self.windows)
+        self.assertEqual([len(df) for df in data_frames], [2, 0, 1])
+
+    def test_slice_by_timestamp_in_reverse_order(self):
+        """Slice by timestamp, in reverse order."""
+        data_frame = self.data_frame.iloc[::-1]
+        data_frames = slice_by_timestamp(data_frame, self.windows)
+        self.assertEqual([len(df) for df in data_frames], [2, 0, 1])
+        self.assertTrue(data_frames[0].timestamp.is_monotonic_decreasing)
+
+    def test_slice_by_timestamp_if_not_sorted(self):
+        """Slice by timestamp, if not sorted."""
+        data_frame = self.data_frame.iloc[[1, 2, 0]]
+        data_frames = slice_by_timestamp(data_frame, self.windows)
+        self.assertEqual([len(df) for df in data_frames], [2, 0, 1])
+
+
 class VolumeFilterTest(BaseRandomTradeTest, SimpleTestCase):
     def assert_min_volume(self, df: DataFrame) -> None:
         """Assert minimum volume."""
@@ -386,3 +427,76 @@ class CombineClusteredTradeTest(BaseRandomTradeTest, SimpleTestCase):
         self.assertEqual(first.totalNotional, Decimal("1"))
         self.assertIsNone(last.tickRule, None)
         self.assertEqual(last.totalNotional, Decimal("0.2"))
+
+    def test_iter_combine_clustered_trades(self):
+        """Iter combine clustered trades, carrying clusters across data frames."""
+        trades = [
+            {
+                "price": Decimal("1000"),
+                "notional": random.choice([Decimal("0.1"), Decimal("1")]),
+                "tick_rule": random.choice([1, -1]),
+            }
+            for _ in range(20)
+        ]
+        clustered = self.get_clustered(trades)
+        expected = combine_clustered_trades(clustered)
+        data_frames = [clustered.iloc[i : i + 3] for i in range(0, len(clustered), 3)]
+        combined = pd.concat(iter_combine_clustered_trades(data_frames))
+        self.assertTrue(
+            combined.reset_index(drop=True)
+            .convert_dtypes()
+            .equals(expected.convert_dtypes())
+        )
+
+
+class MergeSegmentsTest(BaseRandomTradeTest, SimpleTestCase):
+    def setUp(self):
+        self.timestamp_from = get_min_time(get_current_time(), "1d")
+        self.data_frame = self.get_data_frame(0, 30, 60, 90, 120)
+
+    def get_data_frame(self, *seconds: int) -> DataFrame:
+        """Get data frame, with trades at seconds."""
+        return pd.DataFrame(
+            [
+                self.get_random_trade(
+                    timestamp=self.timestamp_from + pd.Timedelta(f"{second}s")
+                )
+                for second in seconds
+            ]
+        )
+
+    def get_window(self, minute: int) -> tuple[datetime, datetime]:
+        """Get window, of minute."""
+        timestamp_from = self.timestamp_from + pd.Timedelta(f"{minute}min")
+        return timestamp_from, timestamp_from + pd.Timedelta("1min")
+
+    def test_merge_segments(self):
+        """Segments are merged in place of data within their window."""
+        segment = self.get_data_frame(75)
+        data_frame = merge_segments(self.data_frame, [(*self.get_window(1), segment)])
+        expected = [self.data_frame.iloc[0], self.data_frame.iloc[1], segment.iloc[0]]
+        expected.append(self.data_frame.iloc[-1])
+        self.assertEqual(list(data_frame.uid), [e.uid for e in expected])
+
+    def test_merge_later_segments(self):
+        """Later segments are merged in place of earlier segments."""
+        first = self.get_data_frame(75)
+        last = self.get_data_frame(80)
+        data_frame = merge_segments(
+            self.data_frame,
+            [(*self.get_window(1), first), (*self.get_window(1), last)],
+        )
+        self.assertEqual(len(data_frame), 4)
+        self.assertNotIn(first.iloc[0].uid, list(data_frame.uid))
+        self.assertIn(last.iloc[0].uid, list(data_frame.uid))
+
+    def test_merge_empty_segments(self):
+        """Empty segments are merged, without data within their window."""
+        data_frame = merge_segments(self.data_frame, [(*self.get_window(1), None)])
+        self.assertEqual(len(data_frame), 3)
+
+    def test_merge_segments_without_data_frame(self):
+        """Segments are merged, without data frame."""
+        segment = self.get_data_frame(75)
+        data_frame = merge_segments(None, [(*self.get_window(1), segment)])
+        self.assertEqual(list(data_frame.uid), list(segment.uid))
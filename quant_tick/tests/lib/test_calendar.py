@@ -1,3 +1,4 @@
+import random
 from datetime import datetime, time, timezone
 
 import pandas as pd
@@ -5,13 +6,16 @@ from django.test import SimpleTestCase
 
 from quant_tick.lib import (
     get_current_time,
+    get_existing,
     get_min_time,
+    get_missing,
     get_next_time,
     get_range,
     iter_missing,
     iter_timeframe,
     iter_window,
     parse_period_from_to,
+    split_by_day,
 )
 
 
@@ -250,3 +254,113 @@ class IterMissingTest(SimpleTestCase):
         self.assertEqual(len(values), 1)
         self.assertEqual(values[0][0], self.timestamp_from)
         self.assertEqual(values[0][1], self.timestamp_to)
+
+    def test_iter_missing_with_single_minute_before_run(self):
+        """Single missing minute, before a run of missing minutes."""
+        existing = [self.timestamps[1], self.timestamps[4]]
+        values = iter_missing(self.timestamp_from, self.timestamp_to, existing)
+        self.assertEqual(
+            values,
+            [
+                (self.timestamp_from, self.timestamps[1]),
+                (self.timestamps[2], self.timestamps[4]),
+            ],
+        )
+
+
+class SplitByDayTest(SimpleTestCase):
+    def setUp(self):
+        # Monday
+        self.timestamp_from = datetime(2009, 1, 5, 1).replace(tzinfo=timezone.utc)
+        self.timestamp_to = self.timestamp_from + pd.Timedelta("14d")
+
+    def test_split_by_day(self):
+        """Split by day, with partial first and last days."""
+        values = split_by_day(self.timestamp_from, self.timestamp_to)
+        self.assertEqual(len(values), 15)
+        self.assertEqual(values[0][0], self.timestamp_from)
+        self.assertEqual(values[-1][1], self.timestamp_to)
+        for (_, ts_to), (ts_from, _) in zip(values, values[1:], strict=False):
+            self.assertEqual(ts_to, ts_from)
+            self.assertEqual(ts_from.time(), time.min)
+
+    def test_split_by_week(self):
+        """Split by week, from Monday."""
+        values = split_by_day(self.timestamp_from, self.timestamp_to, weekday=0)
+        mondays = [
+            self.timestamp_from + pd.Timedelta(f"{days}d") - pd.Timedelta("1h")
+            for days in (7, 14)
+        ]
+        self.assertEqual(
+            values,
+            [
+                (self.timestamp_from, mondays[0]),
+                (mondays[0], mondays[1]),
+                (mondays[1], self.timestamp_to),
+            ],
+        )
+
+    def test_split_within_day(self):
+        """Split within day, is once."""
+        ts_to = self.timestamp_from + pd.Timedelta("1h")
+        values = split_by_day(self.timestamp_from, ts_to)
+        self.assertEqual(values, [(self.timestamp_from, ts_to)])
+
+
+class LongRangeTest(SimpleTestCase):
+    days = 30
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.one_minute = pd.Timedelta("1min")
+        cls.timestamp_to = get_min_time(get_current_time(), "1d")
+        cls.timestamp_from = cls.timestamp_to - pd.Timedelta(f"{cls.days}d")
+        cls.timestamps = [
+            cls.timestamp_from + cls.one_minute * index
+            for index in range(cls.days * 1440)
+        ]
+        rand = random.Random(0)
+        cls.existing = [t for t in cls.timestamps if rand.random() < 0.99]
+
+    def test_get_range(self):
+        """Get range, over a long range."""
+        values = get_range(self.timestamp_from, self.timestamp_to)
+        self.assertEqual(values, self.timestamps + [self.timestamp_to])
+
+    def test_get_existing(self):
+        """Get existing, over days of daily, hourly and minute trade data."""
+        values = [
+            {"timestamp": self.timestamp_from + pd.Timedelta(f"{day}d"), "frequency": f}
+            for day, f in zip(range(self.days), [1440, 60, 1] * self.days, strict=False)
+        ]
+        expected = sorted(
+            v["timestamp"] + self.one_minute * index
+            for v in values
+            for index in range(v["frequency"])
+        )
+        self.assertEqual(get_existing(values), expected)
+
+    def test_get_missing(self):
+        """Get missing, over a long range."""
+        existing = set(self.existing)
+        expected = [t for t in self.timestamps if t not in existing]
+        values = get_missing(self.timestamp_from, self.timestamp_to, self.existing)
+        self.assertEqual(values, expected)
+
+    def test_iter_missing(self):
+        """Iter missing, over a long range, as runs of missing minutes."""
+        existing = set(self.existing)
+        expected = []
+        for t in self.timestamps:
+            if t not in existing:
+                if expected and expected[-1][1] == t:
+                    expected[-1] = expected[-1][0], t + self.one_minute
+                else:
+                    expected.append((t, t + self.one_minute))
+        values = iter_missing(self.timestamp_from, self.timestamp_to, self.existing)
+        self.assertEqual(values, expected)
+        values = iter_missing(
+            self.timestamp_from, self.timestamp_to, self.existing, reverse=True
+        )
+        self.assertEqual(values, expected[::-1])
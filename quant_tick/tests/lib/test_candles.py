@@ -0,0 +1,165 @@
+import random
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase
+
+from quant_tick.lib import (
+    aggregate_candle,
+    aggregate_samples,
+    aggregate_trades,
+    aggregate_windows,
+    filter_by_timestamp,
+    get_current_time,
+    get_daily_summary,
+    get_imbalance_index,
+    get_min_time,
+    get_run_index,
+    get_sample_indexes,
+    iter_window,
+    volume_filter_with_time_window,
+)
+
+from ..base import BaseRandomTradeTest
+
+
+class SampleTest(BaseRandomTradeTest, SimpleTestCase):
+    def setUp(self):
+        ticks = [random.choice((1, -1)) for _ in range(100)]
+        trades = self.generate_random_trades(ticks, prices=[Decimal("100")])
+        aggregated = aggregate_trades(pd.DataFrame(trades))
+        self.data_frame = volume_filter_with_time_window(aggregated, min_volume=None)
+        self.target_value = self.data_frame.totalNotional.sum() / 10
+
+    def get_expected(self, sample_value: Decimal) -> tuple[list, Decimal]:
+        """Get expected, row by row."""
+        data = []
+        start = 0
+        for index, row in self.data_frame.iterrows():
+            sample_value += row.totalNotional
+            if sample_value >= self.target_value:
+                data.append(aggregate_candle(self.data_frame.loc[start:index]))
+                sample_value = 0
+                start = index + 1
+        return data, sample_value
+
+    def test_get_sample_indexes(self):
+        """Samples are equivalent to aggregating row by row."""
+        for sample_value in (0, self.target_value / 2):
+            indexes, value = get_sample_indexes(
+                self.data_frame.totalNotional.to_numpy(),
+                self.target_value,
+                sample_value,
+            )
+            expected, expected_value = self.get_expected(sample_value)
+            self.assertEqual(aggregate_samples(self.data_frame, indexes), expected)
+            self.assertEqual(value, expected_value)
+
+    def test_get_sample_indexes_without_samples(self):
+        """Without samples, sample value is accumulated."""
+        values = self.data_frame.totalNotional.to_numpy()
+        indexes, value = get_sample_indexes(values, values.sum() + 1)
+        self.assertEqual(indexes, [])
+        self.assertEqual(value, values.sum())
+        self.assertEqual(aggregate_samples(self.data_frame, indexes), [])
+
+    def test_aggregate_windows(self):
+        """Windows are equivalent to aggregating window by window."""
+        timestamp_from = get_min_time(self.data_frame.iloc[0].timestamp, "1min")
+        timestamp_to = self.data_frame.iloc[-1].timestamp + pd.Timedelta("1min")
+        windows = list(iter_window(timestamp_from, timestamp_to, value="1s"))
+        expected = [
+            aggregate_candle(df, timestamp=ts_from)
+            for ts_from, ts_to in windows
+            if len(df := filter_by_timestamp(self.data_frame, ts_from, ts_to))
+        ]
+        self.assertEqual(aggregate_windows(self.data_frame, windows), expected)
+
+    def get_cumsum(self, values: np.ndarray) -> np.ndarray:
+        """Get cumulative sum, from zero."""
+        return np.concatenate([[0], np.cumsum(values)])
+
+    def test_get_imbalance_index(self):
+        """Imbalance index is where absolute imbalance reaches threshold."""
+        buy_values = np.array([random.choice((0.0, 1.0)) for _ in range(1000)])
+        buy_cumsum = self.get_cumsum(buy_values)
+        sell_cumsum = self.get_cumsum(1 - buy_values)
+        imbalances = np.cumsum(2 * buy_values[10:] - 1) + 1
+        for threshold in (1, 5, 20, 1000):
+            expected = next(
+                (i for i, value in enumerate(imbalances) if abs(value) >= threshold),
+                len(imbalances),
+            )
+            index = get_imbalance_index(
+                buy_cumsum, sell_cumsum, threshold, start=10, imbalance=1
+            )
+            self.assertEqual(index, expected + 10)
+
+    def test_get_run_index(self):
+        """Run index is where the larger of buy and sell runs reaches threshold."""
+        buy_values = np.array([random.choice((0.0, 1.0)) for _ in range(1000)])
+        buy_cumsum = self.get_cumsum(buy_values)
+        sell_cumsum = self.get_cumsum(1 - buy_values)
+        runs = np.maximum(
+            np.cumsum(buy_values[10:]) + 2, np.cumsum(1 - buy_values[10:]) + 1
+        )
+        for threshold in (1, 5, 20, 1000):
+            expected = next(
+                (i for i, value in enumerate(runs) if value >= threshold),
+                len(runs),
+            )
+            index = get_run_index(
+                buy_cumsum, sell_cumsum, threshold, start=10, buy=2, sell=1
+            )
+            self.assertEqual(index, expected + 10)
+
+
+class DailySummaryTest(SimpleTestCase):
+    def get_trade_data(self, minute: int, price: int) -> dict:
+        """Get trade data."""
+        timestamp = get_min_time(get_current_time(), "1d") + pd.Timedelta(
+            f"{minute}min"
+        )
+        candle = {key: Decimal(price) for key in ("open", "high", "low", "close")}
+        candle.update({"notional": Decimal("10"), "ticks": 1})
+        return {"timestamp": timestamp, "frequency": 1, "json_data": {"candle": candle}}
+
+    def test_get_daily_summary(self):
+        """Daily summary, merged with a previous summary, is of all trade data."""
+        summary = get_daily_summary([self.get_trade_data(1, 2)])
+        summary = get_daily_summary(
+            [self.get_trade_data(0, 1), self.get_trade_data(2, 3)], summary
+        )
+        expected = get_daily_summary(
+            [self.get_trade_data(minute, minute + 1) for minute in range(3)]
+        )
+        self.assertEqual(summary, expected)
+        self.assertEqual(summary["minutes"], 3)
+        self.assertEqual(summary["open"], 1)
+        self.assertEqual(summary["close"], 3)
+        self.assertEqual(summary["notional"], 30)
+
+    def test_get_daily_summary_without_trades(self):
+        """Daily summary, without trades, has minutes only."""
+        summary = get_daily_summary(
+            [{"timestamp": get_current_time(), "frequency": 60, "json_data": None}]
+        )
+        self.assertEqual(summary["minutes"], 60)
+        self.assertIsNone(summary["open"])
+        self.assertEqual(summary["ticks"], 0)
+
+    def test_get_daily_summary_with_segments_without_trades(self):
+        """Daily summary, of trade data with segments without trades, has minutes only."""
+        summary = get_daily_summary(
+            [
+                {
+                    "timestamp": get_current_time(),
+                    "frequency": 60,
+                    "json_data": {"segments": 1},
+                }
+            ]
+        )
+        self.assertEqual(summary["minutes"], 60)
+        self.assertIsNone(summary["open"])
+        self.assertEqual(summary["ticks"], 0)
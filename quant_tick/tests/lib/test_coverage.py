@@ -0,0 +1,68 @@
+import pandas as pd
+from django.test import SimpleTestCase
+
+from quant_tick.lib import (
+    bitmap_to_mask,
+    get_coverage_existing,
+    get_current_time,
+    get_existing,
+    get_min_time,
+    has_coverage,
+    iter_coverage,
+    mask_to_bitmap,
+)
+
+
+class CoverageTest(SimpleTestCase):
+    def setUp(self):
+        self.timestamp_from = get_min_time(get_current_time(), value="1d")
+
+    def get_coverage(self, values: list) -> dict:
+        """Get coverage."""
+        coverage = {}
+        for item in values:
+            ts_from = item["timestamp"]
+            ts_to = ts_from + pd.Timedelta(f"{item['frequency']}min")
+            for day, mask in iter_coverage(ts_from, ts_to):
+                coverage[day.date()] = coverage.get(day.date(), 0) | mask
+        return coverage
+
+    def test_iter_coverage_across_days(self):
+        """Iter coverage, across days."""
+        ts_from = self.timestamp_from + pd.Timedelta("1439min")
+        ts_to = ts_from + pd.Timedelta("2min")
+        values = list(iter_coverage(ts_from, ts_to))
+        self.assertEqual(len(values), 2)
+        self.assertEqual(values[0], (self.timestamp_from, 1 << 1439))
+        self.assertEqual(values[1], (self.timestamp_from + pd.Timedelta("1d"), 1))
+
+    def test_bitmap_round_trip(self):
+        """Bitmap round trip."""
+        mask = (1 << 1440) - 1
+        bitmap = mask_to_bitmap(mask)
+        self.assertEqual(len(bitmap), 180)
+        self.assertEqual(bitmap_to_mask(bitmap), mask)
+
+    def test_get_coverage_existing(self):
+        """Get existing from coverage, is equivalent to get existing."""
+        values = [
+            {"timestamp": self.timestamp_from, "frequency": 60},
+            {"timestamp": self.timestamp_from + pd.Timedelta("2h"), "frequency": 1},
+            {"timestamp": self.timestamp_from + pd.Timedelta("1d"), "frequency": 1440},
+        ]
+        coverage = self.get_coverage(values)
+        ts_to = self.timestamp_from + pd.Timedelta("2d")
+        self.assertEqual(
+            get_coverage_existing(self.timestamp_from, ts_to, coverage),
+            get_existing(values),
+        )
+
+    def test_has_coverage(self):
+        """Has coverage, only if all minutes exist."""
+        values = [{"timestamp": self.timestamp_from, "frequency": 60}]
+        coverage = self.get_coverage(values)
+        one_hour = self.timestamp_from + pd.Timedelta("1h")
+        self.assertTrue(has_coverage(self.timestamp_from, one_hour, coverage))
+        self.assertFalse(
+            has_coverage(self.timestamp_from, one_hour + pd.Timedelta("1min"), coverage)
+        )
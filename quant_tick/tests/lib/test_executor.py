@@ -0,0 +1,58 @@
+import os
+import random
+import threading
+import time
+
+from django.test import SimpleTestCase
+
+from quant_tick.lib import iter_threaded, map_processes
+
+
+def get_pid(value: int) -> tuple[int, int]:
+    """Get process id, with value."""
+    return value, os.getpid()
+
+
+class IterThreadedTest(SimpleTestCase):
+    def test_iter_threaded_preserves_order(self):
+        """Results are in the same order as values."""
+
+        def func(value):
+            time.sleep(random.random() / 100)
+            return value
+
+        values = list(range(20))
+        self.assertEqual(list(iter_threaded(func, values, max_workers=4)), values)
+
+    def test_iter_threaded_is_bounded(self):
+        """No more than max workers are in flight."""
+        lock = threading.Lock()
+        in_flight = []
+        max_in_flight = []
+
+        def func(value):
+            with lock:
+                in_flight.append(value)
+                max_in_flight.append(len(in_flight))
+            time.sleep(0.001)
+            with lock:
+                in_flight.remove(value)
+            return value
+
+        for value in iter_threaded(func, range(20), max_workers=2):
+            time.sleep(0.001)
+        self.assertLessEqual(max(max_in_flight), 2)
+
+
+class MapProcessesTest(SimpleTestCase):
+    def test_map_processes_preserves_order(self):
+        """Results are in the same order as values, from other processes."""
+        values = list(range(20))
+        results = map_processes(get_pid, values, max_processes=2)
+        self.assertEqual([value for value, _ in results], values)
+        self.assertNotIn(os.getpid(), {pid for _, pid in results})
+
+    def test_map_processes_with_one_process(self):
+        """With 1 process, values are mapped in process."""
+        results = map_processes(get_pid, range(3), max_processes=1)
+        self.assertEqual(results, [(value, os.getpid()) for value in range(3)])
@@ -0,0 +1,27 @@
+from decimal import Decimal
+from io import BytesIO
+
+import pandas as pd
+from django.test import SimpleTestCase
+
+from quant_tick.lib import ParquetStreamWriter
+
+
+class ParquetStreamWriterTest(SimpleTestCase):
+    def test_write_data_frames_as_row_groups(self):
+        """Write data frames as row groups, with one schema."""
+        data_frames = [
+            pd.DataFrame([{"price": Decimal("1.1"), "tickRule": None}]),
+            pd.DataFrame([{"price": Decimal("1000.123"), "tickRule": 1}]),
+        ]
+        writer = ParquetStreamWriter()
+        for data_frame in data_frames:
+            writer.write(data_frame)
+        data_frame = pd.read_parquet(BytesIO(writer.close()))
+        self.assertEqual(list(data_frame.price), [Decimal("1.1"), Decimal("1000.123")])
+        self.assertTrue(pd.isna(data_frame.iloc[0].tickRule))
+        self.assertEqual(data_frame.iloc[1].tickRule, 1)
+
+    def test_write_nothing(self):
+        """Write nothing."""
+        self.assertIsNone(ParquetStreamWriter().close())
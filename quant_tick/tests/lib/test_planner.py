@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase
+
+from quant_tick.lib import (
+    get_current_time,
+    get_min_time,
+    get_minute_rows,
+    iter_timeframe,
+    plan_windows,
+)
+
+
+class PlanWindowsTest(SimpleTestCase):
+    def setUp(self):
+        self.timestamp_from = get_min_time(get_current_time(), "1d")
+        self.timestamp_to = self.timestamp_from + pd.Timedelta("1d")
+        self.windows = list(
+            iter_timeframe(self.timestamp_from, self.timestamp_to, value="1h")
+        )
+
+    def test_quiet_windows_are_merged(self):
+        """Quiet windows are merged, into 1 day."""
+        windows = plan_windows(self.windows, np.ones(1440), max_rows=1440)
+        self.assertEqual(windows, [(self.timestamp_from, self.timestamp_to)])
+
+    def test_quiet_windows_are_merged_within_max_rows(self):
+        """Quiet windows are merged, within max rows."""
+        windows = plan_windows(self.windows, np.ones(1440), max_rows=720)
+        twelve_hours = self.timestamp_from + pd.Timedelta("12h")
+        self.assertEqual(
+            windows,
+            [(self.timestamp_from, twelve_hours), (twelve_hours, self.timestamp_to)],
+        )
+
+    def test_hot_window_is_split(self):
+        """Hot window is split by step, and the last split is merged if quiet."""
+        rows = np.zeros(1440)
+        rows[:60] = 100
+        windows = plan_windows(self.windows, rows, step="15min", max_rows=1500)
+        timestamps = [
+            self.timestamp_from + pd.Timedelta(f"{minute}min")
+            for minute in range(0, 60, 15)
+        ] + [self.timestamp_to]
+        self.assertEqual(windows, list(zip(timestamps, timestamps[1:], strict=False)))
+
+    def test_non_consecutive_windows_are_not_merged(self):
+        """Non-consecutive windows are not merged, and are reversed."""
+        windows = [self.windows[0], self.windows[2]]
+        values = plan_windows(windows, np.zeros(1440), reverse=True)
+        self.assertEqual(values, windows[::-1])
+
+    def test_get_minute_rows(self):
+        """Get rows by minute, with hourly rows spread evenly."""
+        values = [
+            {"timestamp": self.timestamp_from, "frequency": 60, "rows": 120},
+            {"timestamp": self.windows[1][0], "frequency": 1, "rows": 5},
+        ]
+        rows = get_minute_rows(self.timestamp_from, values)
+        self.assertEqual(rows[0], 2)
+        self.assertEqual(rows[60], 5)
+        self.assertEqual(rows.sum(), 125)
+        values.append({"timestamp": self.windows[2][0], "frequency": 1, "rows": None})
+        self.assertIsNone(get_minute_rows(self.timestamp_from, values))
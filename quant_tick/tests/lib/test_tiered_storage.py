@@ -0,0 +1,70 @@
+from datetime import datetime
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+import time_machine
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.test import SimpleTestCase
+
+from quant_tick.lib import TieredStorage
+
+
+@time_machine.travel(datetime(2009, 1, 10), tick=False)
+class TieredStorageTest(SimpleTestCase):
+    def setUp(self):
+        self.hot_dir = TemporaryDirectory()
+        self.cold_dir = TemporaryDirectory()
+        self.hot = FileSystemStorage(location=self.hot_dir.name)
+        self.cold = FileSystemStorage(location=self.cold_dir.name)
+        self.storage = TieredStorage(self.hot, self.cold, hot_storage_days=7)
+        self.hot_name = "trades/raw/2009-01-09/0000.parquet"
+        self.cold_name = "trades/raw/2009-01-01/0000.parquet"
+
+    def tearDown(self):
+        self.hot_dir.cleanup()
+        self.cold_dir.cleanup()
+
+    def test_save_recent_file_to_hot_storage(self):
+        """Save recent file to hot storage."""
+        name = self.storage.save(self.hot_name, ContentFile(b"hot"))
+        self.assertEqual(name, self.hot_name)
+        self.assertTrue(self.hot.exists(name))
+        self.assertFalse(self.cold.exists(name))
+
+    def test_save_old_file_to_cold_storage(self):
+        """Save old file to cold storage."""
+        name = self.storage.save(self.cold_name, ContentFile(b"cold"))
+        self.assertTrue(self.cold.exists(name))
+        self.assertFalse(self.hot.exists(name))
+
+    def test_open_file_not_yet_migrated(self):
+        """Open file, not yet migrated."""
+        self.hot.save(self.cold_name, ContentFile(b"data"))
+        self.assertTrue(self.storage.exists(self.cold_name))
+        with self.storage.open(self.cold_name) as f:
+            self.assertEqual(f.read(), b"data")
+
+    def test_open_file_without_exists(self):
+        """Open file, by the date of the name, without checking whether it exists."""
+        self.storage.save(self.hot_name, ContentFile(b"data"))
+        with patch.object(self.hot, "exists") as mock_exists:
+            with self.storage.open(self.hot_name) as f:
+                self.assertEqual(f.read(), b"data")
+        mock_exists.assert_not_called()
+
+    def test_migrate(self):
+        """Migrate file from hot to cold storage, with the same name."""
+        self.hot.save(self.cold_name, ContentFile(b"data"))
+        self.assertTrue(self.storage.migrate(self.cold_name))
+        self.assertFalse(self.hot.exists(self.cold_name))
+        with self.cold.open(self.cold_name) as f:
+            self.assertEqual(f.read(), b"data")
+        self.assertFalse(self.storage.migrate(self.cold_name))
+
+    def test_delete_from_all_tiers(self):
+        """Delete from all tiers."""
+        self.hot.save(self.cold_name, ContentFile(b"data"))
+        self.cold.save(self.cold_name, ContentFile(b"data"))
+        self.storage.delete(self.cold_name)
+        self.assertFalse(self.storage.exists(self.cold_name))
@@ -2,7 +2,7 @@ import pandas as pd
 from django.test import TestCase
 
 from quant_tick.constants import FileData, Frequency, SampleType
-from quant_tick.lib import get_current_time
+from quant_tick.lib import get_current_time, get_min_time
 from quant_tick.models import AdaptiveCandle, TradeData
 from quant_tick.tests.base import BaseWriteTradeDataTest
 
@@ -40,3 +40,34 @@ class AdaptiveCandleTest(BaseWriteTradeDataTest, TestCase):
         now = get_current_time()
         cache = candle.get_cache_data(now, {"date": now.date(), "target_value": 123})
         self.assertEqual(cache["target_value"], 123)
+
+    def test_cache_target_value_is_moving_average(self):
+        """If not same day, cache target value is the moving average of days."""
+        today = get_min_time(get_current_time(), value="1d")
+        one_day_ago = today - pd.Timedelta("1d")
+        two_days_ago = today - pd.Timedelta("2d")
+        three_days_ago = today - pd.Timedelta("3d")
+        symbol = self.get_symbol()
+        candle = AdaptiveCandle.objects.create(
+            json_data={
+                "source_data": FileData.RAW,
+                "sample_type": SampleType.VOLUME,
+                "moving_average_number_of_days": 2,
+                "target_candles_per_day": 1,
+            },
+        )
+        candle.symbols.add(symbol)
+        for timestamp, notional in (
+            (three_days_ago, 1),
+            (two_days_ago, 300),
+            (one_day_ago, 100),
+        ):
+            filtered = self.get_filtered(timestamp, price=1, notional=notional)
+            trade_data = TradeData.objects.create(
+                symbol=symbol, timestamp=timestamp, frequency=Frequency.DAY
+            )
+            TradeData.write_data_frame(trade_data, filtered, pd.DataFrame([]))
+        cache = candle.get_cache_data(
+            today, {"date": one_day_ago.date(), "target_value": 0}
+        )
+        self.assertEqual(cache["target_value"], 200)
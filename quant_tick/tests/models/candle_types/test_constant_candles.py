@@ -1,8 +1,10 @@
+from datetime import datetime, timezone
+
 import pandas as pd
 from django.test import TestCase
 
 from quant_tick.constants import FileData, Frequency
-from quant_tick.lib import get_current_time
+from quant_tick.lib import get_current_time, get_min_time
 from quant_tick.models import ConstantCandle
 
 
@@ -53,3 +55,44 @@ class ConstantCandleTest(TestCase):
             next_sunday, {"date": next_sunday.date(), "sample_value": 123}
         )
         self.assertEqual(cache["sample_value"], 123)
+
+    def test_daily_cache_reset_shards(self):
+        """If cache resets daily, shards are by day."""
+        timestamp_from = get_min_time(get_current_time(), "1d")
+        timestamp_to = timestamp_from + pd.Timedelta("2d")
+        candle = ConstantCandle(
+            json_data={"source_data": FileData.RAW, "cache_reset": Frequency.DAY}
+        )
+        one_day_from_now = timestamp_from + pd.Timedelta("1d")
+        self.assertEqual(
+            candle.get_shards(timestamp_from, timestamp_to),
+            [(timestamp_from, one_day_from_now), (one_day_from_now, timestamp_to)],
+        )
+        self.assertTrue(candle.is_cache_reset(one_day_from_now))
+        self.assertFalse(candle.is_cache_reset(one_day_from_now + pd.Timedelta("1h")))
+
+    def test_weekly_cache_reset_shards(self):
+        """If cache resets weekly, shards are by week from Monday."""
+        # Saturday
+        timestamp_from = datetime(2009, 1, 3).replace(tzinfo=timezone.utc)
+        timestamp_to = timestamp_from + pd.Timedelta("7d")
+        monday = timestamp_from + pd.Timedelta("2d")
+        candle = ConstantCandle(
+            json_data={"source_data": FileData.RAW, "cache_reset": Frequency.WEEK}
+        )
+        self.assertEqual(
+            candle.get_shards(timestamp_from, timestamp_to),
+            [(timestamp_from, monday), (monday, timestamp_to)],
+        )
+        self.assertTrue(candle.is_cache_reset(monday))
+        self.assertFalse(candle.is_cache_reset(monday + pd.Timedelta("1d")))
+
+    def test_shards_without_cache_reset(self):
+        """Without cache reset, there is 1 shard."""
+        timestamp_from = get_min_time(get_current_time(), "1d")
+        timestamp_to = timestamp_from + pd.Timedelta("2d")
+        candle = ConstantCandle(json_data={"source_data": FileData.RAW})
+        self.assertEqual(
+            candle.get_shards(timestamp_from, timestamp_to),
+            [(timestamp_from, timestamp_to)],
+        )
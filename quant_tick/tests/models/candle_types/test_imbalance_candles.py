@@ -0,0 +1,81 @@
+import random
+from itertools import pairwise
+
+import pandas as pd
+from django.test import SimpleTestCase
+
+from quant_tick.constants import FileData, SampleType
+from quant_tick.models import ImbalanceCandle
+
+
+class ImbalanceCandleTest(SimpleTestCase):
+    """Imbalance candle test."""
+
+    def setUp(self):
+        self.candle = ImbalanceCandle(
+            json_data={
+                "source_data": FileData.RAW,
+                "sample_type": SampleType.TICK,
+                "ewma_span": 3,
+            }
+        )
+
+    def get_data_frame(self, tick_rules: list[int]) -> pd.DataFrame:
+        """Get data frame, with 1 tick per row."""
+        return pd.DataFrame(
+            [
+                {"totalTicks": 1, "totalBuyTicks": 1 if tick_rule == 1 else 0}
+                for tick_rule in tick_rules
+            ]
+        )
+
+    def get_cache_data(self) -> dict:
+        """Get cache data."""
+        return {
+            "target_value": 4,
+            "sample_value": 0,
+            "imbalance": 0,
+            "expected_value": 4.0,
+            "expected_imbalance": 0.5,
+        }
+
+    def test_candle_when_imbalance_exceeds_expected_value(self):
+        """Candle when imbalance exceeds expected value, then expected is updated."""
+        data_frame = self.get_data_frame([1, -1, 1, 1, -1])
+        cache_data = self.get_cache_data()
+        indexes = self.candle.get_indexes(data_frame, cache_data)
+        # Threshold is 4 * 0.5, so imbalance of 2 after 4 ticks.
+        self.assertEqual(indexes, [3])
+        self.assertEqual(cache_data["expected_value"], 4)
+        self.assertEqual(cache_data["expected_imbalance"], 0.5)
+        self.assertEqual(cache_data["sample_value"], 1)
+        self.assertEqual(cache_data["imbalance"], -1)
+
+    def test_imbalance_is_carried(self):
+        """Imbalance is carried to the next iteration."""
+        cache_data = self.get_cache_data()
+        for tick_rules in ([1], [-1, -1], [-1]):
+            indexes = self.candle.get_indexes(
+                self.get_data_frame(tick_rules), cache_data
+            )
+        self.assertEqual(indexes, [0])
+        self.assertEqual(cache_data["expected_value"], 4)
+        # Absolute imbalance of 2, divided by 4 ticks.
+        self.assertEqual(cache_data["expected_imbalance"], 0.5)
+
+    def test_balanced_flow_does_not_degenerate(self):
+        """Balanced flow does not degenerate, to 1 candle per row."""
+        rand = random.Random(0)
+        tick_rules = [rand.choice([1, -1]) for _ in range(1000)]
+        cache_data = {
+            **self.get_cache_data(),
+            "target_value": 100,
+            "expected_value": 100.0,
+            "expected_imbalance": 0.0,
+        }
+        indexes = self.candle.get_indexes(self.get_data_frame(tick_rules), cache_data)
+        # Threshold is at least 10% of target value, so at least 10 ticks a candle.
+        self.assertLessEqual(len(indexes), 100)
+        self.assertTrue(all(b - a >= 10 for a, b in pairwise([-1, *indexes])))
+        self.assertGreaterEqual(cache_data["expected_value"], 10)
+        self.assertGreater(cache_data["expected_imbalance"], 0)
@@ -0,0 +1,60 @@
+import pandas as pd
+from django.test import SimpleTestCase
+
+from quant_tick.constants import FileData, SampleType
+from quant_tick.models import RunCandle
+
+
+class RunCandleTest(SimpleTestCase):
+    """Run candle test."""
+
+    def setUp(self):
+        self.candle = RunCandle(
+            json_data={
+                "source_data": FileData.RAW,
+                "sample_type": SampleType.TICK,
+                "ewma_span": 3,
+            }
+        )
+
+    def get_data_frame(self, tick_rules: list[int]) -> pd.DataFrame:
+        """Get data frame, with 1 tick per row."""
+        return pd.DataFrame(
+            [
+                {"totalTicks": 1, "totalBuyTicks": 1 if tick_rule == 1 else 0}
+                for tick_rule in tick_rules
+            ]
+        )
+
+    def get_cache_data(self) -> dict:
+        """Get cache data."""
+        return {
+            "target_value": 4,
+            "sample_value": 0,
+            "imbalance": 0,
+            "expected_value": 4.0,
+            "expected_imbalance": 0.5,
+        }
+
+    def test_candle_when_run_exceeds_expected_value(self):
+        """Candle when run exceeds expected value, then expected is updated."""
+        data_frame = self.get_data_frame([1, -1, -1, 1, -1, 1])
+        cache_data = self.get_cache_data()
+        indexes = self.candle.get_indexes(data_frame, cache_data)
+        # Threshold is 4 * 0.75, so sell run of 3 after 5 ticks.
+        self.assertEqual(indexes, [4])
+        self.assertEqual(cache_data["expected_value"], 4.5)
+        # Absolute imbalance of 1, divided by 5 ticks.
+        self.assertAlmostEqual(cache_data["expected_imbalance"], 0.35)
+        self.assertEqual(cache_data["sample_value"], 1)
+        self.assertEqual(cache_data["imbalance"], 1)
+
+    def test_runs_are_carried(self):
+        """Runs are carried to the next iteration."""
+        cache_data = self.get_cache_data()
+        for tick_rules in ([1, -1], [1], [-1, 1]):
+            indexes = self.candle.get_indexes(
+                self.get_data_frame(tick_rules), cache_data
+            )
+        self.assertEqual(indexes, [1])
+        self.assertEqual(cache_data["expected_value"], 4.5)
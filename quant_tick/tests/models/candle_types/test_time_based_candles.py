@@ -0,0 +1,54 @@
+import pandas as pd
+from django.test import SimpleTestCase
+
+from quant_tick.constants import FileData
+from quant_tick.lib import get_current_time, get_min_time
+from quant_tick.models import TimeBasedCandle
+
+
+class TimeBasedCandleTest(SimpleTestCase):
+    """Time based candle test."""
+
+    def setUp(self):
+        timestamp = get_min_time(get_current_time(), "1d")
+        self.timestamp_from = timestamp + pd.Timedelta("1h")
+        self.timestamp_to = self.timestamp_from + pd.Timedelta("2d")
+
+    def get_candle(self, window: str) -> TimeBasedCandle:
+        """Get candle."""
+        return TimeBasedCandle(
+            json_data={"source_data": FileData.RAW, "window": window}
+        )
+
+    def test_shards_by_day(self):
+        """If window divides a day evenly, shards are by day."""
+        shards = self.get_candle("5min").get_shards(
+            self.timestamp_from, self.timestamp_to
+        )
+        self.assertEqual(len(shards), 3)
+        self.assertEqual(shards[0][0], self.timestamp_from)
+        self.assertEqual(shards[-1][1], self.timestamp_to)
+        self.assertTrue(all(ts_from.hour == 0 for ts_from, _ in shards[1:]))
+
+    def test_one_shard(self):
+        """If window does not divide a day evenly, there is 1 shard."""
+        shards = self.get_candle("7min").get_shards(
+            self.timestamp_from, self.timestamp_to
+        )
+        self.assertEqual(shards, [(self.timestamp_from, self.timestamp_to)])
+
+    def test_one_shard_if_not_aligned(self):
+        """If windows are not aligned to midnight, there is 1 shard."""
+        shards = self.get_candle("4h").get_shards(
+            self.timestamp_from, self.timestamp_to
+        )
+        self.assertEqual(shards, [(self.timestamp_from, self.timestamp_to)])
+
+    def test_one_shard_if_next_cache_not_aligned(self):
+        """If windows are not aligned to midnight, by next cache, there is 1 shard."""
+        timestamp_from = get_min_time(self.timestamp_from, "1d")
+        cache_data = {"next": {"timestamp": timestamp_from - pd.Timedelta("3h")}}
+        shards = self.get_candle("4h").get_shards(
+            timestamp_from, self.timestamp_to, cache_data
+        )
+        self.assertEqual(shards, [(timestamp_from, self.timestamp_to)])
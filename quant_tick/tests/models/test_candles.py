@@ -1,4 +1,6 @@
 import string
+from decimal import Decimal
+from unittest.mock import patch
 
 import pandas as pd
 from django.test import TestCase
@@ -102,6 +104,95 @@ class CandleTest(BaseWriteTradeDataTest, BaseCandleTest):
         self.assertTrue(all(data_frame.columns == df.columns))
         self.assertTrue(all(data_frame == df))
 
+    def test_get_data_frame_without_opening_files_outside_of_range(self):
+        """Get data frame, without opening files outside of range."""
+        symbol = self.get_symbol("test")
+        self.candle.symbols.add(symbol)
+        for minute in range(2):
+            ts_from = self.timestamp_from + pd.Timedelta(f"{minute}min")
+            ts_to = ts_from + pd.Timedelta("1min")
+            TradeData.write(
+                symbol, ts_from, ts_to, self.get_raw(ts_from), pd.DataFrame([])
+            )
+        ts_from = self.timestamp_to
+        ts_to = ts_from + pd.Timedelta("1min")
+        with patch.object(
+            TradeData,
+            "get_data_frame",
+            autospec=True,
+            side_effect=TradeData.get_data_frame,
+        ) as mock_get_data_frame:
+            df = self.candle.get_data_frame(ts_from, ts_to)
+        self.assertEqual(mock_get_data_frame.call_count, 1)
+        self.assertEqual(len(df), 1)
+
+    def test_get_data_frame_with_segments(self):
+        """Get data frame, with segments in place of data within their window."""
+        symbol = self.get_symbol("test")
+        self.candle.symbols.add(symbol)
+        timestamp_to = self.timestamp_from + pd.Timedelta("1h")
+        raw = pd.concat(
+            [self.get_raw(self.timestamp_from), self.get_raw(self.timestamp_to)]
+        )
+        TradeData.write(
+            symbol, self.timestamp_from, timestamp_to, raw, pd.DataFrame([])
+        )
+        segment = self.get_raw(self.timestamp_to, nanoseconds=1)
+        TradeData.write(
+            symbol,
+            self.timestamp_to,
+            self.timestamp_to + pd.Timedelta("1min"),
+            segment,
+            pd.DataFrame([]),
+        )
+        self.assertEqual(TradeData.objects.count(), 1)
+        df = self.candle.get_data_frame(self.timestamp_from, timestamp_to)
+        self.assertEqual(list(df.notional), [raw.iloc[0].notional, *segment.notional])
+
+    def test_get_minute_rows(self):
+        """Get rows, by minute of day, from statistics of trade data."""
+        symbol = self.get_symbol("test")
+        self.candle.symbols.add(symbol)
+        raw = self.get_raw(self.timestamp_from)
+        TradeData.write(
+            symbol, self.timestamp_from, self.timestamp_to, raw, pd.DataFrame([])
+        )
+        # Without trades.
+        TradeData.objects.create(
+            symbol=symbol, timestamp=self.timestamp_to, frequency=Frequency.MINUTE
+        )
+        timestamp_to = self.timestamp_to + pd.Timedelta("1min")
+        plan = self.candle.get_plan(self.timestamp_from, timestamp_to)
+        rows = self.candle.get_minute_rows(self.timestamp_from, plan)
+        minute = (
+            self.timestamp_from - get_min_time(self.timestamp_from, "1d")
+        ) // pd.Timedelta("1min")
+        self.assertEqual(rows[minute], 1)
+        self.assertEqual(rows.sum(), 1)
+        # Without statistics, rows are unknown.
+        TradeData.objects.filter(timestamp=self.timestamp_to).update(json_data={})
+        self.assertIsNone(self.candle.get_minute_rows(self.timestamp_from, plan))
+
+    def test_get_expected_daily_candles(self):
+        """Get expected daily candles, of complete days."""
+        timestamp_from = self.timestamp_from - pd.Timedelta("1d")
+        for name in ("test-1", "test-2"):
+            symbol = self.get_symbol(name)
+            self.candle.symbols.add(symbol)
+            for ts_from, ts_to in (
+                (timestamp_from, self.timestamp_from),
+                (self.timestamp_from, self.timestamp_to),
+            ):
+                raw = self.get_raw(ts_from, price=Decimal("1"), notional=Decimal("10"))
+                TradeData.write(symbol, ts_from, ts_to, raw, pd.DataFrame([]))
+        expected = self.candle.get_expected_daily_candles(
+            timestamp_from, self.timestamp_from + pd.Timedelta("1d")
+        )
+        self.assertEqual(expected["total_days"], 2)
+        self.assertEqual(expected["high"], 1)
+        self.assertEqual(expected["notional"], 20)
+        self.assertEqual(expected["ticks"], 2)
+
 
 class CandleCacheTest(BaseCandleTest):
     def setUp(self):
@@ -1,13 +1,47 @@
+import datetime
 import os
+import threading
+from decimal import Decimal
 from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
 
 import pandas as pd
-from django.test import TestCase
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db import transaction
+from django.test import TestCase, override_settings
+from pandas import DataFrame
 
-from quant_tick.constants import FileData
-from quant_tick.lib import get_min_time, get_next_time
-from quant_tick.models import TradeData
-from quant_tick.storage import convert_trade_data_to_hourly
+from quant_tick.constants import FileData, Frequency
+from quant_tick.lib import (
+    TieredStorage,
+    WriteBehind,
+    aggregate_candle,
+    combine_clustered_trades,
+    delete_files,
+    get_digest,
+    get_min_time,
+    get_next_time,
+)
+from quant_tick.lib.delete import flush_deletes
+from quant_tick.lib.mirror import get_mirror_path
+from quant_tick.models import (
+    SymbolDailySummary,
+    TradeData,
+    TradeDataCoverage,
+    TradeDataSegment,
+)
+from quant_tick.models.trades import (
+    SymbolDailySummaryQuerySet,
+    TradeDataCoverageQuerySet,
+)
+from quant_tick.storage import (
+    clean_trade_data,
+    compact_trade_data,
+    convert_trade_data_to_daily,
+    convert_trade_data_to_hourly,
+)
 
 from ..base import BaseWriteTradeDataTest
 
@@ -33,6 +67,53 @@ class WriteTradeDataTest(BaseWriteTradeDataTest, TestCase):
         self.assertEqual(t.timestamp, row.timestamp)
         self.assertFalse(t.ok)
 
+    def test_write_daily_trade_data(self):
+        """Write daily trade data, from a window of 1 day."""
+        symbol = self.get_symbol()
+        timestamp_from = get_min_time(self.timestamp_from, "1d")
+        timestamp_to = timestamp_from + pd.Timedelta("1d")
+        raw = self.get_raw(timestamp_from)
+        TradeData.write(symbol, timestamp_from, timestamp_to, raw, pd.DataFrame([]))
+        t = TradeData.objects.get()
+        self.assertEqual(t.frequency, Frequency.DAY)
+        self.assertEqual(t.timestamp, timestamp_from)
+
+    def test_write_trade_data_by_hour(self):
+        """Write trade data by hour, from a window of more than 1 hour."""
+        symbol = self.get_symbol()
+        timestamp_from = get_min_time(self.timestamp_from, "1d")
+        timestamp_to = timestamp_from + pd.Timedelta("3h")
+        raw = self.get_raw(timestamp_from + pd.Timedelta("1h"))
+        TradeData.write(symbol, timestamp_from, timestamp_to, raw, pd.DataFrame([]))
+        trade_data = TradeData.objects.all()
+        self.assertEqual(trade_data.count(), 3)
+        self.assertTrue(all(t.frequency == Frequency.HOUR for t in trade_data))
+        self.assertIsNone(trade_data[0].json_data)
+        self.assertEqual(trade_data[1].get_statistics(FileData.RAW)["rows"], 1)
+
+    def test_write_trade_data_by_minute(self):
+        """Write trade data by minute, in bulk."""
+        symbol = self.get_symbol()
+        timestamp_from = self.timestamp_from + pd.Timedelta("1min")
+        timestamp_to = timestamp_from + pd.Timedelta("3min")
+        raw = pd.concat(
+            [
+                self.get_raw(timestamp_from),
+                self.get_raw(timestamp_from + pd.Timedelta("2min")),
+            ]
+        )
+        TradeData.write(symbol, timestamp_from, timestamp_to, raw, pd.DataFrame([]))
+        trade_data = TradeData.objects.all()
+        self.assertEqual(trade_data.count(), 3)
+        self.assertTrue(all(t.frequency == Frequency.MINUTE for t in trade_data))
+        self.assertTrue(trade_data[0].raw_data.name)
+        self.assertFalse(trade_data[1].raw_data.name)
+        self.assertTrue(trade_data[2].raw_data.name)
+        self.assertEqual(len(trade_data[2].get_data_frame(FileData.RAW)), 1)
+        self.assertTrue(
+            TradeData.objects.has_timestamps(symbol, timestamp_from, timestamp_to)
+        )
+
     def test_retry_raw_trade(self):
         """Retry raw trade."""
         symbol = self.get_symbol(save_raw=True)
@@ -95,6 +176,119 @@ class WriteTradeDataTest(BaseWriteTradeDataTest, TestCase):
         fname = files[0]
         self.assertEqual(filename, fname)
 
+    def test_rewrite_unchanged_trade_data(self):
+        """Rewrite unchanged trade data, without rewriting files."""
+        symbol = self.get_symbol()
+        raw = self.get_raw(self.timestamp_from)
+        TradeData.write(
+            symbol, self.timestamp_from, self.timestamp_to, raw, pd.DataFrame([])
+        )
+        t = TradeData.objects.get()
+        name = t.raw_data.name
+        digest = t.get_statistics(FileData.RAW)["digest"]
+        storage = t.raw_data.storage
+        with patch.object(storage, "save", wraps=storage.save) as mock_save:
+            TradeData.write_data_frame(t, raw, pd.DataFrame([]))
+        mock_save.assert_not_called()
+        t.refresh_from_db()
+        self.assertEqual(t.raw_data.name, name)
+        self.assertEqual(t.get_statistics(FileData.RAW)["digest"], digest)
+        self.assertTrue(storage.exists(name))
+
+    def test_rewrite_changed_trade_data(self):
+        """Rewrite changed trade data."""
+        symbol = self.get_symbol()
+        raw = self.get_raw(self.timestamp_from)
+        TradeData.write(
+            symbol, self.timestamp_from, self.timestamp_to, raw, pd.DataFrame([])
+        )
+        t = TradeData.objects.get()
+        digest = t.get_statistics(FileData.RAW)["digest"]
+        TradeData.write_data_frame(
+            t, pd.concat([raw, self.get_raw(self.timestamp_from)]), pd.DataFrame([])
+        )
+        t.refresh_from_db()
+        self.assertNotEqual(t.get_statistics(FileData.RAW)["digest"], digest)
+        self.assertEqual(len(t.get_data_frame(FileData.RAW)), 2)
+
+    def test_digest_is_computed_once(self):
+        """Digest is computed once, for each file."""
+        symbol = self.get_symbol()
+        raw = self.get_raw(self.timestamp_from)
+        with patch(
+            "quant_tick.models.trades.get_digest", wraps=get_digest
+        ) as mock_get_digest:
+            TradeData.write(
+                symbol, self.timestamp_from, self.timestamp_to, raw, pd.DataFrame([])
+            )
+        t = TradeData.objects.get()
+        files = [file_data for file_data in FileData if t.has_data_frame(file_data)]
+        self.assertEqual(mock_get_digest.call_count, len(files))
+
+    def test_delete_trade_data_files_on_commit(self):
+        """Delete trade data files, batched, once the transaction is committed."""
+        symbol = self.get_symbol()
+        for minute in range(2):
+            ts_from = self.timestamp_from + pd.Timedelta(f"{minute}min")
+            TradeData.write(
+                symbol,
+                ts_from,
+                ts_from + pd.Timedelta("1min"),
+                self.get_raw(ts_from),
+                pd.DataFrame([]),
+            )
+        files = [(t.raw_data.storage, t.raw_data.name) for t in TradeData.objects.all()]
+        with patch(
+            "quant_tick.lib.delete.delete_files", wraps=delete_files
+        ) as mock_delete_files:
+            with self.captureOnCommitCallbacks(execute=True):
+                TradeData.objects.all().delete()
+                for storage, name in files:
+                    self.assertTrue(storage.exists(name))
+        mock_delete_files.assert_called_once()
+        for storage, name in files:
+            self.assertFalse(storage.exists(name))
+
+    def test_referenced_trade_data_files_are_not_deleted(self):
+        """Files queued by a rolled back transaction, and still referenced, are kept."""
+        symbol = self.get_symbol()
+        TradeData.write(
+            symbol,
+            self.timestamp_from,
+            self.timestamp_to,
+            self.get_raw(self.timestamp_from),
+            pd.DataFrame([]),
+        )
+        t = TradeData.objects.get()
+        with self.assertRaises(ValueError):
+            with transaction.atomic():
+                TradeData.objects.all().delete()
+                raise ValueError
+        flush_deletes()
+        self.assertTrue(t.raw_data.storage.exists(t.raw_data.name))
+
+    def test_write_trade_data_with_statistics(self):
+        """Write trade data with file statistics."""
+        symbol = self.get_symbol()
+        raw = self.get_raw(self.timestamp_from)
+        TradeData.write(
+            symbol, self.timestamp_from, self.timestamp_to, raw, pd.DataFrame([])
+        )
+        t = TradeData.objects.get()
+        stats = t.get_statistics(FileData.RAW)
+        self.assertEqual(stats["rows"], 1)
+        self.assertEqual(stats["timestamp_from"], raw.iloc[0].timestamp)
+        self.assertEqual(stats["timestamp_to"], raw.iloc[-1].timestamp)
+        self.assertEqual(stats["notional"], raw.notional.sum())
+        self.assertEqual(stats["volume"], raw.volume.sum())
+        self.assertEqual(stats["size"], t.raw_data.size)
+        self.assertTrue(
+            t.is_within_statistics(FileData.RAW, self.timestamp_from, self.timestamp_to)
+        )
+        self.assertFalse(
+            t.is_within_statistics(FileData.RAW, self.timestamp_to, self.timestamp_to)
+        )
+
     def test_convert_trade_data_to_hourly(self):
         """Convert trade data to hourly."""
         symbol = self.get_symbol()
@@ -136,3 +330,672 @@ class WriteTradeDataTest(BaseWriteTradeDataTest, TestCase):
         self.assertEqual(candle["buyNotional"], candles.buyNotional.sum())
         self.assertEqual(candle["ticks"], candles.ticks.sum())
         self.assertEqual(candle["buyTicks"], candles.buyTicks.sum())
+        stats = data.get_statistics(FileData.RAW)
+        self.assertEqual(stats["rows"], 60)
+        self.assertEqual(stats["notional"], raw.notional.sum())
+
+    def test_convert_clustered_trade_data_to_hourly(self):
+        """Convert clustered trade data to hourly, streaming clusters across minutes."""
+        symbol = self.get_symbol(
+            save_raw=False, save_filtered=True, save_clustered=True
+        )
+        symbol.significant_trade_filter = 1000
+        symbol.save()
+        timestamp_from = get_min_time(self.timestamp_from, "1h")
+        for minute in range(60):
+            ts_from = timestamp_from + pd.Timedelta(f"{minute}min")
+            ts_to = ts_from + pd.Timedelta("1min")
+            df = self.get_raw(ts_from)
+            TradeData.write(symbol, ts_from, ts_to, df, pd.DataFrame([]))
+
+        clustered = pd.concat(
+            [t.get_data_frame(FileData.CLUSTERED) for t in TradeData.objects.all()]
+        )
+        expected = combine_clustered_trades(clustered)
+
+        convert_trade_data_to_hourly(
+            symbol, timestamp_from, get_next_time(timestamp_from, value="1h")
+        )
+
+        data = TradeData.objects.get()
+        data_frame = data.get_data_frame(FileData.CLUSTERED)
+        self.assertEqual(len(data_frame), len(expected))
+        self.assertEqual(list(data_frame.tickRule), list(expected.tickRule))
+        self.assertEqual(data_frame.totalNotional.sum(), clustered.totalNotional.sum())
+        stats = data.get_statistics(FileData.CLUSTERED)
+        self.assertEqual(stats["rows"], len(expected))
+
+    def write_hours(self, symbol, timestamp_from) -> list:
+        """Write hours."""
+        data_frames = []
+        for hour in range(24):
+            ts_from = timestamp_from + pd.Timedelta(f"{hour}h")
+            ts_to = ts_from + pd.Timedelta("1h")
+            df = self.get_raw(ts_from)
+            TradeData.write(symbol, ts_from, ts_to, df, pd.DataFrame([]))
+            data_frames.append(df)
+        return data_frames
+
+    def test_convert_trade_data_to_daily(self):
+        """Convert trade data to daily."""
+        symbol = self.get_symbol()
+        timestamp_from = get_min_time(self.timestamp_from, "1d")
+        data_frames = self.write_hours(symbol, timestamp_from)
+        TradeData.objects.update(ok=True)
+        self.assertEqual(TradeData.objects.filter(frequency=Frequency.HOUR).count(), 24)
+
+        convert_trade_data_to_daily(
+            symbol, timestamp_from, get_next_time(timestamp_from, value="1d")
+        )
+
+        data = TradeData.objects.get()
+        self.assertEqual(data.frequency, Frequency.DAY)
+        self.assertEqual(data.timestamp, timestamp_from)
+        self.assertTrue(data.ok)
+        raw = pd.concat(data_frames).drop(columns=["uid"]).reset_index(drop=True)
+        self.assertTrue(data.get_data_frame(FileData.RAW).equals(raw))
+        self.assertEqual(data.get_statistics(FileData.RAW)["rows"], 24)
+
+    def test_trade_data_is_not_converted_to_daily_if_not_ok(self):
+        """Trade data is not converted to daily, if an hour is not ok."""
+        symbol = self.get_symbol()
+        timestamp_from = get_min_time(self.timestamp_from, "1d")
+        self.write_hours(symbol, timestamp_from)
+        TradeData.objects.exclude(timestamp=timestamp_from).update(ok=True)
+
+        convert_trade_data_to_daily(
+            symbol, timestamp_from, get_next_time(timestamp_from, value="1d")
+        )
+
+        self.assertFalse(TradeData.objects.filter(frequency=Frequency.DAY).exists())
+        self.assertEqual(TradeData.objects.filter(frequency=Frequency.HOUR).count(), 24)
+
+
+class TradeDataCoverageTest(BaseWriteTradeDataTest, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.symbol = self.get_symbol()
+        self.timestamp_from = get_min_time(self.timestamp_from, "1h")
+        self.timestamp_to = self.timestamp_from + pd.Timedelta("1h")
+
+    def write_minutes(self, total: int) -> None:
+        """Write minutes."""
+        for minute in range(total):
+            ts_from = self.timestamp_from + pd.Timedelta(f"{minute}min")
+            ts_to = ts_from + pd.Timedelta("1min")
+            TradeData.write(
+                self.symbol, ts_from, ts_to, self.get_raw(ts_from), pd.DataFrame([])
+            )
+
+    def get_existing(self) -> list:
+        """Get existing."""
+        return TradeDataCoverage.objects.get_existing(
+            self.symbol, self.timestamp_from, self.timestamp_to
+        )
+
+    def test_coverage_on_write(self):
+        """Coverage on write."""
+        self.write_minutes(2)
+        self.assertEqual(
+            self.get_existing(),
+            [self.timestamp_from, self.timestamp_from + pd.Timedelta("1min")],
+        )
+        self.assertFalse(
+            TradeData.objects.has_timestamps(
+                self.symbol, self.timestamp_from, self.timestamp_to
+            )
+        )
+
+    def test_coverage_on_convert(self):
+        """Coverage on convert."""
+        self.write_minutes(60)
+        convert_trade_data_to_hourly(
+            self.symbol, self.timestamp_from, self.timestamp_to
+        )
+        self.assertEqual(TradeData.objects.get().frequency, Frequency.HOUR)
+        self.assertEqual(len(self.get_existing()), 60)
+        self.assertTrue(
+            TradeData.objects.has_timestamps(
+                self.symbol, self.timestamp_from, self.timestamp_to
+            )
+        )
+
+    def test_coverage_on_delete(self):
+        """Coverage on delete."""
+        self.write_minutes(2)
+        TradeData.objects.get(timestamp=self.timestamp_from).delete()
+        self.assertEqual(
+            self.get_existing(), [self.timestamp_from + pd.Timedelta("1min")]
+        )
+        TradeData.objects.all().delete()
+        self.assertFalse(TradeDataCoverage.objects.exists())
+
+    def test_coverage_on_queryset_delete(self):
+        """Coverage is recomputed once per date, on queryset delete."""
+        self.write_minutes(3)
+        with patch.object(
+            TradeDataCoverageQuerySet,
+            "recompute",
+            autospec=True,
+            side_effect=TradeDataCoverageQuerySet.recompute,
+        ) as mock_recompute:
+            TradeData.objects.filter(
+                timestamp__lt=self.timestamp_from + pd.Timedelta("2min")
+            ).delete()
+        mock_recompute.assert_called_once()
+        self.assertEqual(
+            self.get_existing(), [self.timestamp_from + pd.Timedelta("2min")]
+        )
+
+
+class SymbolDailySummaryTest(BaseWriteTradeDataTest, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.symbol = self.get_symbol()
+        self.timestamp_from = get_min_time(self.timestamp_from, "1h")
+        self.timestamp_to = self.timestamp_from + pd.Timedelta("1h")
+
+    def write_minute(self, minute: int, price: Decimal) -> None:
+        """Write minute."""
+        ts_from = self.timestamp_from + pd.Timedelta(f"{minute}min")
+        ts_to = ts_from + pd.Timedelta("1min")
+        raw = self.get_raw(ts_from, price=price, notional=Decimal("10"))
+        TradeData.write(self.symbol, ts_from, ts_to, raw, pd.DataFrame([]))
+
+    def test_summary_on_write(self):
+        """Summary on write, with open and close of first and last trade data."""
+        self.write_minute(2, Decimal("3"))
+        self.write_minute(0, Decimal("1"))
+        self.write_minute(1, Decimal("2"))
+        summary = SymbolDailySummary.objects.get()
+        self.assertEqual(summary.date, self.timestamp_from.date())
+        self.assertEqual(summary.minutes, 3)
+        self.assertEqual(summary.open, 1)
+        self.assertEqual(summary.high, 3)
+        self.assertEqual(summary.low, 1)
+        self.assertEqual(summary.close, 3)
+        self.assertEqual(summary.notional, 30)
+        self.assertEqual(summary.ticks, 3)
+
+    def test_summary_on_bulk_write(self):
+        """Summary on bulk write, of minutes."""
+        raw = pd.concat(
+            [
+                self.get_raw(self.timestamp_from, price=Decimal("1")),
+                self.get_raw(
+                    self.timestamp_from + pd.Timedelta("2min"), price=Decimal("2")
+                ),
+            ]
+        )
+        ts_to = self.timestamp_from + pd.Timedelta("3min")
+        TradeData.write(self.symbol, self.timestamp_from, ts_to, raw, pd.DataFrame([]))
+        summary = SymbolDailySummary.objects.get()
+        self.assertEqual(summary.minutes, 3)
+        self.assertEqual(summary.open, 1)
+        self.assertEqual(summary.close, 2)
+        self.assertEqual(summary.ticks, 2)
+
+    def test_summary_on_convert(self):
+        """Summary on convert."""
+        for minute in range(60):
+            self.write_minute(minute, Decimal(minute + 1))
+        convert_trade_data_to_hourly(
+            self.symbol, self.timestamp_from, self.timestamp_to
+        )
+        summary = SymbolDailySummary.objects.get()
+        self.assertEqual(summary.minutes, 60)
+        self.assertEqual(summary.open, 1)
+        self.assertEqual(summary.close, 60)
+        self.assertEqual(summary.notional, 600)
+
+    def test_summary_on_delete(self):
+        """Summary on delete."""
+        self.write_minute(0, Decimal("1"))
+        self.write_minute(1, Decimal("2"))
+        TradeData.objects.get(timestamp=self.timestamp_from).delete()
+        summary = SymbolDailySummary.objects.get()
+        self.assertEqual(summary.minutes, 1)
+        self.assertEqual(summary.open, 2)
+        self.assertEqual(summary.notional, 10)
+        TradeData.objects.all().delete()
+        self.assertFalse(SymbolDailySummary.objects.exists())
+
+    def test_summary_on_queryset_delete(self):
+        """Summary is recomputed once per date, on queryset delete."""
+        for minute in range(3):
+            self.write_minute(minute, Decimal(minute + 1))
+        with patch.object(
+            SymbolDailySummaryQuerySet,
+            "recompute",
+            autospec=True,
+            side_effect=SymbolDailySummaryQuerySet.recompute,
+        ) as mock_recompute:
+            TradeData.objects.filter(
+                timestamp__lt=self.timestamp_from + pd.Timedelta("2min")
+            ).delete()
+        mock_recompute.assert_called_once()
+        summary = SymbolDailySummary.objects.get()
+        self.assertEqual(summary.minutes, 1)
+        self.assertEqual(summary.open, 3)
+
+    def test_summary_is_not_recomputed_if_candle_unchanged(self):
+        """Summary is only recomputed on save, if the candle changed."""
+        self.write_minute(0, Decimal("1"))
+        t = TradeData.objects.get()
+        with patch.object(
+            SymbolDailySummaryQuerySet,
+            "recompute",
+            autospec=True,
+            side_effect=SymbolDailySummaryQuerySet.recompute,
+        ) as mock_recompute:
+            t.ok = True
+            t.save()
+            mock_recompute.assert_not_called()
+            t.json_data["candle"]["close"] = Decimal("2")
+            t.save()
+            mock_recompute.assert_called_once()
+        self.assertEqual(SymbolDailySummary.objects.get().close, 2)
+
+
+class CleanTradeDataTest(BaseWriteTradeDataTest, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.symbol = self.get_symbol()
+        for minute in range(2):
+            ts_from = self.timestamp_from + pd.Timedelta(f"{minute}min")
+            TradeData.write(
+                self.symbol,
+                ts_from,
+                ts_from + pd.Timedelta("1min"),
+                self.get_raw(ts_from),
+                pd.DataFrame([]),
+            )
+
+    def clean(self) -> None:
+        """Clean."""
+        with self.captureOnCommitCallbacks(execute=True):
+            clean_trade_data(
+                self.symbol,
+                self.timestamp_from,
+                self.timestamp_from + pd.Timedelta("2min"),
+            )
+
+    def test_clean_trade_data_with_non_existing_files(self):
+        """Clean trade data with non-existing files."""
+        first, last = TradeData.objects.all()
+        first.raw_data.storage.delete(first.raw_data.name)
+        self.clean()
+        self.assertEqual(list(TradeData.objects.all()), [last])
+        self.assertTrue(last.raw_data.storage.exists(last.raw_data.name))
+
+    @override_settings(QUANT_TICK_CLEAN_GRACE_PERIOD=datetime.timedelta(0))
+    def test_clean_unlinked_trade_data_files(self):
+        """Clean unlinked trade data files."""
+        t = TradeData.objects.first()
+        storage = t.raw_data.storage
+        name = str(Path(t.raw_data.name).with_name("unlinked.parquet"))
+        storage.save(name, ContentFile(b"unlinked"))
+        self.clean()
+        self.assertFalse(storage.exists(name))
+        self.assertEqual(TradeData.objects.count(), 2)
+        for t in TradeData.objects.all():
+            self.assertTrue(storage.exists(t.raw_data.name))
+
+    def test_clean_recent_unlinked_trade_data_files(self):
+        """Unlinked trade data files within the grace period, may be in flight."""
+        t = TradeData.objects.first()
+        storage = t.raw_data.storage
+        name = str(Path(t.raw_data.name).with_name("unlinked.parquet"))
+        storage.save(name, ContentFile(b"unlinked"))
+        self.clean()
+        self.assertTrue(storage.exists(name))
+        storage.delete(name)
+        self.assertEqual(TradeData.objects.count(), 2)
+        for t in TradeData.objects.all():
+            self.assertTrue(storage.exists(t.raw_data.name))
+
+
+class TieredCleanTradeDataTest(CleanTradeDataTest):
+    def setUp(self):
+        cold_dir = TemporaryDirectory()
+        self.addCleanup(cold_dir.cleanup)
+        self.cold = FileSystemStorage(location=cold_dir.name)
+        storage = TieredStorage(default_storage, self.cold)
+        field = TradeData._meta.get_field(FileData.RAW)
+        patcher = patch.object(field, "storage", storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        super().setUp()
+
+    @override_settings(QUANT_TICK_CLEAN_GRACE_PERIOD=datetime.timedelta(0))
+    def test_clean_unlinked_trade_data_files_of_cold_storage(self):
+        """Clean unlinked trade data files, not yet migrated to hot storage."""
+        t = TradeData.objects.first()
+        name = str(Path(t.raw_data.name).with_name("unlinked.parquet"))
+        self.cold.save(name, ContentFile(b"unlinked"))
+        self.clean()
+        self.assertFalse(self.cold.exists(name))
+        self.assertEqual(TradeData.objects.count(), 2)
+
+
+class WriteBehindTest(BaseWriteTradeDataTest, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.symbol = self.get_symbol()
+
+    def write(self, minute: int) -> None:
+        """Write."""
+        ts_from = self.timestamp_from + pd.Timedelta(f"{minute}min")
+        ts_to = ts_from + pd.Timedelta("1min")
+        TradeData.write(
+            self.symbol, ts_from, ts_to, self.get_raw(ts_from), pd.DataFrame([])
+        )
+
+    def test_write_behind(self):
+        """Objects are saved, once files are uploaded."""
+        with WriteBehind():
+            for minute in range(3):
+                self.write(minute)
+        trade_data = TradeData.objects.all()
+        self.assertEqual(trade_data.count(), 3)
+        for t in trade_data:
+            self.assertTrue(t.raw_data.storage.exists(t.raw_data.name))
+            self.assertEqual(len(t.get_data_frame(FileData.RAW)), 1)
+
+    def test_write_behind_with_backpressure(self):
+        """Oldest object is saved, if more than max pending."""
+        with patch.object(WriteBehind, "is_done", return_value=False):
+            with WriteBehind(max_pending=1):
+                self.write(0)
+                self.assertFalse(TradeData.objects.exists())
+                self.write(1)
+                self.assertEqual(TradeData.objects.count(), 1)
+        self.assertEqual(TradeData.objects.count(), 2)
+
+    def test_write_behind_with_exception(self):
+        """Objects are not saved, and uploaded files are deleted, on exception."""
+        with patch.object(WriteBehind, "is_done", return_value=False):
+            with self.assertRaises(ValueError):
+                with WriteBehind() as write_behind:
+                    self.write(0)
+                    _, uploads = write_behind.pending[0]
+                    field, future = uploads[0]
+                    name = future.result()
+                    self.assertTrue(field.storage.exists(name))
+                    raise ValueError
+        self.assertFalse(TradeData.objects.exists())
+        self.assertFalse(field.storage.exists(name))
+
+    def test_write_behind_generates_names_on_calling_thread(self):
+        """Names are generated on the calling thread, as upload to may query."""
+        field = TradeData._meta.get_field(FileData.RAW)
+        threads = []
+
+        def generate_filename(obj, filename):
+            threads.append(threading.current_thread())
+            return type(field).generate_filename(field, obj, filename)
+
+        with patch.object(field, "generate_filename", side_effect=generate_filename):
+            with WriteBehind():
+                self.write(0)
+        self.assertEqual(threads, [threading.current_thread()])
+        t = TradeData.objects.get()
+        self.assertTrue(t.raw_data.storage.exists(t.raw_data.name))
+
+    def test_write_behind_with_failed_upload(self):
+        """Object is not saved, and uploaded files are deleted, if an upload fails."""
+        symbol = self.get_symbol(api_symbol="aggregated", save_aggregated=True)
+        names = []
+
+        def upload_file(storage, name, content, max_length):
+            if Path(name).parent.parent.name == "aggregated":
+                raise OSError
+            names.append(storage.save(name, content, max_length))
+            return names[-1]
+
+        ts_to = self.timestamp_from + pd.Timedelta("1min")
+        raw = self.get_raw(self.timestamp_from)
+        with patch("quant_tick.lib.executor.upload_file", side_effect=upload_file):
+            with self.assertRaises(OSError):
+                with WriteBehind():
+                    TradeData.write(
+                        symbol, self.timestamp_from, ts_to, raw, pd.DataFrame([])
+                    )
+        self.assertFalse(TradeData.objects.exists())
+        self.assertTrue(names)
+        for name in names:
+            self.assertFalse(TradeData.raw_data.field.storage.exists(name))
+
+    def test_write_behind_with_failed_save(self):
+        """Uploaded files are deleted, if save fails."""
+        with patch.object(WriteBehind, "is_done", return_value=False):
+            with patch.object(TradeData, "save", side_effect=ValueError):
+                with self.assertRaises(ValueError):
+                    with WriteBehind() as write_behind:
+                        self.write(0)
+                        _, uploads = write_behind.pending[0]
+                        field, future = uploads[0]
+                        name = future.result()
+        self.assertFalse(TradeData.objects.exists())
+        self.assertFalse(field.storage.exists(name))
+
+    def test_replaced_file_is_kept_until_saved(self):
+        """Replaced file is deleted, only once object is saved and committed."""
+        self.write(0)
+        t = TradeData.objects.get()
+        name = t.raw_data.name
+        storage = t.raw_data.storage
+        with patch.object(WriteBehind, "is_done", return_value=False):
+            with self.captureOnCommitCallbacks(execute=True):
+                with WriteBehind():
+                    TradeData.write_data_frame(
+                        t, self.get_raw(self.timestamp_from), pd.DataFrame([])
+                    )
+                    self.assertTrue(storage.exists(name))
+        t.refresh_from_db()
+        self.assertNotEqual(t.raw_data.name, name)
+        self.assertFalse(storage.exists(name))
+        self.assertTrue(storage.exists(t.raw_data.name))
+
+
+class LocalMirrorTest(BaseWriteTradeDataTest, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.timestamp_to = self.timestamp_from + pd.Timedelta("1min")
+        self.temp_dir = TemporaryDirectory()
+
+    def tearDown(self):
+        super().tearDown()
+        self.temp_dir.cleanup()
+
+    def write(self, symbol):
+        """Write."""
+        raw = self.get_raw(self.timestamp_from)
+        TradeData.write(
+            symbol, self.timestamp_from, self.timestamp_to, raw, pd.DataFrame([])
+        )
+        return TradeData.objects.get(symbol=symbol)
+
+    def test_read_through_local_mirror(self):
+        """Data frame is read through local mirror."""
+        symbol = self.get_symbol()
+        t = self.write(symbol)
+        expected = t.get_data_frame(FileData.RAW)
+        with override_settings(QUANT_TICK_LOCAL_MIRROR=self.temp_dir.name):
+            path = get_mirror_path(t.raw_data.name)
+            self.assertFalse(path.exists())
+            data_frame = t.get_data_frame(FileData.RAW)
+            self.assertTrue(path.exists())
+            self.assertTrue(data_frame.equals(expected))
+            self.assertTrue(t.get_data_frame(FileData.RAW).equals(expected))
+
+    def test_local_mirror_is_invalidated(self):
+        """Local mirror is invalidated, if file is rewritten."""
+        symbol = self.get_symbol()
+        with override_settings(QUANT_TICK_LOCAL_MIRROR=self.temp_dir.name):
+            t = self.write(symbol)
+            t.get_data_frame(FileData.RAW)
+            path = get_mirror_path(t.raw_data.name)
+            self.assertTrue(path.exists())
+            raw = self.get_raw(self.timestamp_from)
+            with self.captureOnCommitCallbacks(execute=True):
+                TradeData.write_data_frame(t, raw, pd.DataFrame([]))
+                # Replaced file is deleted, once committed.
+                self.assertTrue(path.exists())
+            self.assertFalse(path.exists())
+            data_frame = t.get_data_frame(FileData.RAW)
+            self.assertTrue(data_frame.equals(pd.read_parquet(t.raw_data.open())))
+
+    def test_stale_local_mirror_is_not_read(self):
+        """Local mirror is not read, if file is rewritten without invalidation."""
+        symbol = self.get_symbol()
+        with override_settings(QUANT_TICK_LOCAL_MIRROR=self.temp_dir.name):
+            t = self.write(symbol)
+            t.get_data_frame(FileData.RAW)
+        name = t.raw_data.name
+        # Rewritten elsewhere, so the mirror isn't invalidated.
+        raw = self.get_raw(self.timestamp_from)
+        with self.captureOnCommitCallbacks(execute=True):
+            TradeData.write_data_frame(t, raw, pd.DataFrame([]))
+        # Name is reused.
+        storage = t.raw_data.storage
+        t.raw_data.name = storage.save(name, t.raw_data.open())
+        self.assertEqual(t.raw_data.name, name)
+        with override_settings(QUANT_TICK_LOCAL_MIRROR=self.temp_dir.name):
+            path = get_mirror_path(t.raw_data.name)
+            self.assertTrue(path.exists())
+            data_frame = t.get_data_frame(FileData.RAW)
+            self.assertTrue(data_frame.equals(pd.read_parquet(t.raw_data.open())))
+        storage.delete(name)
+
+    def test_local_mirror_is_evicted(self):
+        """Local mirror is evicted, if greater than max size."""
+        symbols = [self.get_symbol(api_symbol=f"test-{i}") for i in range(2)]
+        with override_settings(
+            QUANT_TICK_LOCAL_MIRROR=self.temp_dir.name,
+            QUANT_TICK_LOCAL_MIRROR_MAX_SIZE=1,
+        ):
+            paths = []
+            for symbol in symbols:
+                t = self.write(symbol)
+                t.get_data_frame(FileData.RAW)
+                paths.append(get_mirror_path(t.raw_data.name))
+            self.assertFalse(any(path.exists() for path in paths))
+
+
+class TradeDataSegmentTest(BaseWriteTradeDataTest, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.symbol = self.get_symbol()
+        self.one_hour_from_now = self.timestamp_from + pd.Timedelta("1h")
+        self.raw = pd.concat(
+            [
+                self.get_raw(self.timestamp_from + pd.Timedelta(f"{minute}min"))
+                for minute in range(3)
+            ]
+        ).reset_index(drop=True)
+        TradeData.write(
+            self.symbol,
+            self.timestamp_from,
+            self.one_hour_from_now,
+            self.raw,
+            pd.DataFrame([]),
+        )
+
+    def write_segment(self) -> DataFrame:
+        """Write segment, of the second minute."""
+        ts_from = self.timestamp_from + pd.Timedelta("1min")
+        raw = self.get_raw(ts_from, nanoseconds=1)
+        TradeData.write(
+            self.symbol, ts_from, ts_from + pd.Timedelta("1min"), raw, pd.DataFrame([])
+        )
+        return raw
+
+    def get_expected(self, raw: DataFrame) -> DataFrame:
+        """Get expected, with raw in place of the second minute."""
+        return pd.concat([self.raw.iloc[:1], raw, self.raw.iloc[2:]])
+
+    def test_write_segment(self):
+        """Write segment, within hourly data, without rewriting files of the hour."""
+        t = TradeData.objects.get()
+        name = t.raw_data.name
+        storage = t.raw_data.storage
+        with patch.object(storage, "save", wraps=storage.save) as mock_save:
+            raw = self.write_segment()
+        self.assertEqual(mock_save.call_count, 2)
+        t = TradeData.objects.get()
+        self.assertEqual(t.raw_data.name, name)
+        self.assertEqual(TradeDataSegment.objects.filter(trade_data=t).count(), 1)
+        expected = self.get_expected(raw)
+        data_frame = t.get_data_frame(FileData.RAW)
+        self.assertEqual(list(data_frame.notional), list(expected.notional))
+        candle = aggregate_candle(expected)
+        self.assertEqual(t.json_data["candle"]["notional"], candle["notional"])
+        self.assertEqual(t.json_data["candle"]["close"], candle["close"])
+
+    def test_write_segment_keeps_statistics(self):
+        """Write segment, with statistics of files kept, and ok combined."""
+        TradeData.objects.update(ok=True)
+        t = TradeData.objects.get()
+        stats = t.get_statistics(FileData.RAW)
+        self.write_segment()
+        t = TradeData.objects.get()
+        self.assertEqual(t.get_statistics(FileData.RAW), stats)
+        self.assertTrue(t.has_segments())
+        self.assertTrue(
+            t.is_within_statistics(
+                FileData.RAW, self.one_hour_from_now, self.one_hour_from_now
+            )
+        )
+        self.assertIsNone(t.ok)
+
+    def test_compact_trade_data(self):
+        """Compact trade data, by merging segments into files."""
+        raw = self.write_segment()
+        with self.captureOnCommitCallbacks(execute=True):
+            compact_trade_data(self.symbol, self.timestamp_from, self.one_hour_from_now)
+        self.assertFalse(TradeDataSegment.objects.exists())
+        t = TradeData.objects.get()
+        self.assertFalse(t.has_segments())
+        expected = self.get_expected(raw)
+        data_frame = t.get_data_frame(FileData.RAW)
+        self.assertEqual(list(data_frame.notional), list(expected.notional))
+        self.assertEqual(t.get_statistics(FileData.RAW)["rows"], len(expected))
+
+    def test_rewrite_trade_data_with_segments(self):
+        """Segments are superseded, if trade data is rewritten."""
+        self.write_segment()
+        TradeData.write(
+            self.symbol,
+            self.timestamp_from,
+            self.one_hour_from_now,
+            self.raw,
+            pd.DataFrame([]),
+        )
+        self.assertFalse(TradeDataSegment.objects.exists())
+        t = TradeData.objects.get()
+        data_frame = t.get_data_frame(FileData.RAW)
+        self.assertEqual(list(data_frame.notional), list(self.raw.notional))
+
+    def test_convert_trade_data_with_segments(self):
+        """Convert trade data, with segments merged."""
+        raw = self.write_segment()
+        for hour in range(1, 24):
+            ts_from = self.timestamp_from + pd.Timedelta(f"{hour}h")
+            TradeData.write(
+                self.symbol,
+                ts_from,
+                ts_from + pd.Timedelta("1h"),
+                pd.DataFrame([]),
+                pd.DataFrame([]),
+            )
+        TradeData.objects.update(ok=True)
+        convert_trade_data_to_daily(
+            self.symbol, self.timestamp_from, self.timestamp_from + pd.Timedelta("1d")
+        )
+        self.assertFalse(TradeDataSegment.objects.exists())
+        t = TradeData.objects.get()
+        self.assertEqual(t.frequency, Frequency.DAY)
+        expected = self.get_expected(raw)
+        data_frame = t.get_data_frame(FileData.RAW)
+        self.assertEqual(list(data_frame.notional), list(expected.notional))
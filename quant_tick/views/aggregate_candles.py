@@ -5,10 +5,10 @@ from rest_framework.generics import ListAPIView
 from rest_framework.request import Request
 from rest_framework.response import Response
 
-from quant_tick.controllers import aggregate_candles
+from quant_tick.controllers import aggregate_candle_groups, aggregate_candles
 from quant_tick.filters import CandleFilter
 from quant_tick.models import Candle
-from quant_tick.serializers import TimeAgoWithRetrySerializer
+from quant_tick.serializers import TimeAgoWithRetryAndFanOutSerializer
 from quant_tick.storage import convert_candle_cache_to_daily
 
 logger = logging.getLogger(__name__)
@@ -23,7 +23,7 @@ class AggregateCandleView(ListAPIView):
 
     def get_params(self, request: Request) -> list[tuple]:
         """Get params."""
-        serializer = TimeAgoWithRetrySerializer(data=request.data)
+        serializer = TimeAgoWithRetryAndFanOutSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         data = serializer.validated_data
         queryset = self.get_queryset()
@@ -33,14 +33,29 @@ class AggregateCandleView(ListAPIView):
                 data["timestamp_from"],
                 data["timestamp_to"],
                 data["retry"],
+                data["fan_out"],
             )
             for candle in self.filter_queryset(queryset)
         ]
 
     def get(self, request: Request, *args, **kwargs) -> Response:
         """Get data for each symbol."""
-        for candle, timestamp_from, timestamp_to, retry in self.get_params(request):
-            logger.info("{candle}: starting...".format(**{"candle": str(candle)}))
-            aggregate_candles(candle, timestamp_from, timestamp_to, retry)
-            convert_candle_cache_to_daily(candle)
+        params = self.get_params(request)
+        # Processes are not forked, within a request.
+        # Fan out, reading trade data once for candles with the same symbols.
+        if params and params[0][-1]:
+            candles = [candle for candle, *_ in params]
+            __, timestamp_from, timestamp_to, retry, __ = params[0]
+            aggregate_candle_groups(
+                candles, timestamp_from, timestamp_to, retry, max_processes=1
+            )
+            for candle in candles:
+                convert_candle_cache_to_daily(candle)
+        else:
+            for candle, timestamp_from, timestamp_to, retry, __ in params:
+                logger.info("{candle}: starting...".format(**{"candle": str(candle)}))
+                aggregate_candles(
+                    candle, timestamp_from, timestamp_to, retry, max_processes=1
+                )
+                convert_candle_cache_to_daily(candle)
         return Response({"ok": True})
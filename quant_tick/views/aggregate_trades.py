@@ -9,7 +9,10 @@ from quant_tick.exchanges import api
 from quant_tick.filters import SymbolFilter
 from quant_tick.models import Symbol, TradeData
 from quant_tick.serializers import TimeAgoWithRetrySerializer
-from quant_tick.storage import convert_trade_data_to_hourly
+from quant_tick.storage import (
+    convert_trade_data_to_daily,
+    convert_trade_data_to_hourly,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -51,4 +54,5 @@ class AggregateTradeDataView(ListAPIView):
             logger.info("{symbol}: starting...".format(**{"symbol": str(symbol)}))
             api(symbol, timestamp_from, timestamp_to, retry)
             convert_trade_data_to_hourly(symbol, timestamp_from, timestamp_to)
+            convert_trade_data_to_daily(symbol, timestamp_from, timestamp_to)
         return Response({"ok": True})